@@ -1,75 +1,310 @@
 import os
+import json
+import asyncio
 import threading
-from fastapi import FastAPI, Request, Response
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
+import pandas as pd
+from contextlib import asynccontextmanager
+from typing import Optional, List
+from fastapi import FastAPI, Request, Response, Query
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, StreamingResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
-from .pipeline import run_pipeline_html, get_report_history, get_log_history, pipeline_status, pipeline_logs
+from starlette.concurrency import run_in_threadpool
+from .pipeline import get_report_history, get_log_history, pipeline_status, pipeline_logs
+from .jobs import job_manager
+from .models import PipelineRequest, WarmStreetsRequest
+from .street_store import street_store
+from .online import geocode_payload, validate_payload, is_ndjson, PayloadError
+from src.utils.logger import get_logger
+from src.utils.run_manifest import backfill, query_runs, get_run, results_dirs
+from src.storage.results_store import read_results, list_runs, TABLES, DEFAULT_RESULTS_DIR
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 templates = Jinja2Templates(directory=TEMPLATES_DIR)
+# Seconds between checks for new log lines, and between keep-alive comments
+STREAM_INTERVAL = 0.25
+STREAM_KEEPALIVE = 15
 
-app = FastAPI()
+def _preload_streets():
+    """
+    Warms the street datasets listed in POI_PRELOAD_STREETS (separated by
+    os.pathsep) so the first runs on those regions skip the street stage.
+    """
+    logger = get_logger("api")
+    for streets_dir in filter(None, os.environ.get("POI_PRELOAD_STREETS", "").split(os.pathsep)):
+        try:
+            street_store.get(streets_dir, logger)
+        except Exception as e:
+            logger.error(f"Could not preload streets from {streets_dir}: {e}")
+
+@asynccontextmanager
+async def lifespan(app):
+    threading.Thread(target=_preload_streets, daemon=True).start()
+    threading.Thread(target=backfill, daemon=True).start()
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 # Serve index.html directly on "/"
 @app.get("/", response_class=HTMLResponse)
 def index(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
-# Launch the pipeline as a background thread
+# Launch the pipeline as a queued job
 @app.post("/run_pipeline")
 async def run_pipeline_api(request: Request):
-    params = await request.json()
-    pipeline_logs.clear()
-    pipeline_status["running"] = True
-    pipeline_status["emergency_stop"] = False
-
-    def log_callback(msg):
-        pipeline_logs.append(msg)
-    
-    def pipeline_thread():
-        html_path = run_pipeline_html(
-            pois_dir=params.get("pois_dir", "data/POIs"),
-            streets_dir=params.get("streets_dir", "data/STREETS_NAMING_ADDRESSING"),
-            output_dir=params.get("output_dir", "output"),
-            test_mode=params.get("test_mode", True),
-            test_file=params.get("test_file"),
-            base_logdir="logs",
-            logger_callback=log_callback
-        )
-        pipeline_status["running"] = False
-        if html_path:
-            pipeline_status["last_report"] = html_path
-
-    threading.Thread(target=pipeline_thread, daemon=True).start()
-    return {"status": "started"}
-
-# Real-time logs/status
-@app.get("/logs")
-def get_logs():
+    try:
+        params = json.loads(await request.body() or b"{}")
+        if not isinstance(params, dict):
+            raise ValueError("Expected a JSON object of pipeline parameters")
+        req = PipelineRequest(**{"test_mode": True, **params})
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=422)
+    job = job_manager.submit(req.model_dump())
+    return {"status": "started", "job_id": job.id}
+
+def _log_source(job_id=None):
+    """
+    (job, log buffer, status dict) of the given job, else of the most recent
+    one, else the shared state of direct run_pipeline_html calls.
+    """
+    job = job_manager.get(job_id) if job_id else job_manager.latest()
+    if job is None:
+        return None, pipeline_logs, pipeline_status
+    return job, job.logs, job.status
+
+def _status_payload(job, status):
     return {
-        "logs": list(pipeline_logs),
-        "running": pipeline_status.get("running", False),
-        "last_report": pipeline_status.get("last_report"),
+        "running": status.get("running", False),
+        "last_report": status.get("last_report"),
+        "metrics": status.get("metrics", []),
+        "job_id": job.id if job else None,
     }
 
+# Real-time logs/status of a job (the most recent one by default).
+# With ?since=N only the lines from sequence number N on are returned,
+# together with the cursor to pass next time.
+@app.get("/logs")
+def get_logs(since: int = 0, job_id: Optional[str] = None):
+    job, logs, status = _log_source(job_id)
+    lines, cursor = logs.since(since)
+    return {"logs": lines, "next": cursor, **_status_payload(job, status)}
+
+# Server-sent events: one "message" per log line (its id is the next
+# cursor, so reconnecting resumes via Last-Event-ID), a "status" event when
+# the status changes and a "reset" event when a newer job takes over.
+@app.get("/logs/stream")
+async def stream_logs(request: Request, since: int = 0, job_id: Optional[str] = None):
+    cursor = int(request.headers.get("last-event-id", since))
+
+    async def events(cursor):
+        job, logs, status = _log_source(job_id)
+        last_status, quiet = None, 0.0
+        while not await request.is_disconnected():
+            latest = job_manager.latest()
+            if not job_id and latest is not None and latest is not job:
+                job, logs, status = _log_source(latest.id)
+                cursor = 0
+                yield "event: reset\ndata: {}\n\n"
+            lines, end = logs.since(cursor)
+            for seq, line in enumerate(lines, start=end - len(lines) + 1):
+                yield f"id: {seq}\ndata: " + line.replace("\n", "\ndata: ") + "\n\n"
+            cursor = end
+            current = _status_payload(job, status)
+            if current != last_status:
+                last_status = current
+                yield f"event: status\ndata: {json.dumps(current)}\n\n"
+            elif not lines:
+                quiet += STREAM_INTERVAL
+                if quiet >= STREAM_KEEPALIVE:
+                    quiet = 0.0
+                    yield ": keep-alive\n\n"
+            await asyncio.sleep(STREAM_INTERVAL)
+
+    return StreamingResponse(events(cursor), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# Jobs
+@app.post("/jobs")
+def create_job(req: PipelineRequest):
+    job = job_manager.submit(req.model_dump())
+    return job.summary()
+
+@app.get("/jobs")
+def list_jobs():
+    return {"max_workers": job_manager.max_workers, "jobs": job_manager.list()}
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse({"error": "Job not found"}, status_code=404)
+    return job.details()
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return JSONResponse({"error": "Job not found"}, status_code=404)
+    return job.summary()
+
+# The report page links its table pages relatively, so it is served from
+# /jobs/{id}/files/ next to them
+@app.get("/jobs/{job_id}/report")
+def show_job_report(job_id: str):
+    job = job_manager.get(job_id)
+    report = job.status.get("last_report") if job else None
+    if report and os.path.exists(report):
+        return RedirectResponse(f"/jobs/{job_id}/files/{os.path.basename(report)}")
+    return JSONResponse({"error": "No report found"}, status_code=404)
+
+@app.get("/jobs/{job_id}/files/{name:path}")
+def job_report_file(job_id: str, name: str):
+    job = job_manager.get(job_id)
+    report = job.status.get("last_report") if job else None
+    if report:
+        report_dir = os.path.realpath(os.path.dirname(report))
+        path = os.path.realpath(os.path.join(report_dir, name))
+        if path.startswith(report_dir + os.sep) and os.path.isfile(path):
+            media = "application/pdf" if path.endswith(".pdf") else "text/html"
+            return FileResponse(path, media_type=media)
+    return JSONResponse({"error": "File not found"}, status_code=404)
+
+# Resident street datasets
+@app.post("/streets/warm")
+def warm_streets(req: WarmStreetsRequest):
+    if not os.path.isdir(req.streets_dir):
+        return JSONResponse({"error": "Streets directory not found"}, status_code=404)
+    streets_gdf, _, hit = street_store.get(req.streets_dir, get_logger("api"), fast=req.fast_load)
+    return {"streets_dir": req.streets_dir, "segments": len(streets_gdf), "already_resident": hit}
+
+@app.get("/streets/cache")
+def street_cache_info():
+    return street_store.info()
+
+@app.delete("/streets/cache")
+def clear_street_cache(streets_dir: Optional[str] = None):
+    street_store.drop(streets_dir)
+    return street_store.info()
+
+def _ndjson_response(request):
+    accept = request.headers.get("accept", "")
+    return True if is_ndjson(accept) else (False if "application/json" in accept else None)
+
+async def _online(request, handler, *args):
+    body = await request.body()
+    try:
+        content, media_type = await run_in_threadpool(
+            handler, body, is_ndjson(request.headers.get("content-type")), *args, ndjson_response=_ndjson_response(request))
+    except PayloadError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    except FileNotFoundError as e:
+        return JSONResponse({"error": f"Streets directory not found: {e}"}, status_code=404)
+    return Response(content, media_type=media_type)
+
+# Online geocoding against the resident street index. The body is JSON (a
+# list of {st_name, st_num_ful} records, or {"records": [...], "streets_dir":
+# ...}) or NDJSON; parsing, matching and serialization run off the event
+# loop. Answers in NDJSON when asked for it (Accept) or sent it.
+@app.post("/geocode")
+async def geocode(request: Request, streets_dir: Optional[str] = None, fast_load: Optional[bool] = None):
+    return await _online(request, geocode_payload, streets_dir, fast_load)
+
+# Online validation of POI records with the pipeline's rules, streets joined
+# through the resident link_id index; ?fix=true adds proposed corrections.
+# Same body and response formats as /geocode.
+@app.post("/validate")
+async def validate(request: Request, streets_dir: Optional[str] = None, fast_load: Optional[bool] = None,
+                   fix: Optional[bool] = None):
+    return await _online(request, validate_payload, streets_dir, fast_load, fix)
+
 # Serve the last report inline (iframe)
 @app.get("/report")
 def show_last_report():
+    job = job_manager.latest()
+    if job is not None:
+        return show_job_report(job.id)
     last_html = pipeline_status.get("last_report")
     if last_html and os.path.exists(last_html):
         return FileResponse(last_html, media_type="text/html")
     return JSONResponse({"error": "No report found"}, status_code=404)
 
+# Run history from the run manifest, newest first. Filters: status
+# (done/failed/cancelled), source (main/api), since/until (start time,
+# "YYYY-MM-DD[ HH:MM:SS]") and q (substring of the input directories).
+@app.get("/history")
+def run_history(limit: int = 50, offset: int = 0, status: Optional[str] = None, source: Optional[str] = None,
+                since: Optional[str] = None, until: Optional[str] = None, q: Optional[str] = None):
+    backfill()
+    limit = max(1, min(limit, 500))
+    total, runs = query_runs(limit=limit, offset=max(0, offset), status=status, source=source,
+                             since=since, until=until, search=q)
+    return {"total": total, "limit": limit, "offset": offset, "runs": runs}
+
 # Report History
 @app.get("/history/reports")
-def report_history():
-    return get_report_history()
+def report_history(limit: int = 200, offset: int = 0):
+    return get_report_history(limit=max(1, min(limit, 1000)), offset=max(0, offset))
 
 # Logs History
 @app.get("/history/logs")
-def log_history():
-    return get_log_history()
+def log_history(limit: int = 200, offset: int = 0):
+    return get_log_history(limit=max(1, min(limit, 1000)), offset=max(0, offset))
+
+@app.get("/history/{run_id}")
+def run_details(run_id: str):
+    run = get_run(run_id)
+    if run is None:
+        return JSONResponse({"error": "Run not found"}, status_code=404)
+    return run
+
+def _results_dirs(run_id=None):
+    """
+    Where stored results are looked up: the run's own results_dir, or
+    without a run every results_dir in the manifest plus the default.
+    """
+    if run_id:
+        run = get_run(run_id)
+        return [((run or {}).get("params") or {}).get("results_dir") or DEFAULT_RESULTS_DIR]
+    dirs = {}
+    for path in [DEFAULT_RESULTS_DIR] + results_dirs():
+        if os.path.isdir(path):
+            dirs.setdefault(os.path.abspath(path), path)
+    return list(dirs.values())
+
+# Stored results (Parquet, see src/storage/results_store.py) of past runs,
+# filtered without rerunning the pipeline. violation_code and poi_id may
+# be repeated; geometries are returned as WKT.
+@app.get("/results")
+def query_results(table: str = "validation", run_id: Optional[str] = None, run_date: Optional[str] = None,
+                  source_file: Optional[str] = None, violation_code: Optional[List[str]] = Query(None),
+                  poi_id: Optional[List[int]] = Query(None), limit: int = 1000):
+    if table not in TABLES:
+        return JSONResponse({"error": f"Unknown table, expected one of {', '.join(TABLES)}"}, status_code=400)
+    limit = max(1, min(limit, 100000))
+    records = []
+    for results_dir in _results_dirs(run_id):
+        frame = read_results(results_dir, table, run_id=run_id, run_date=run_date, source_file=source_file,
+                             violation_codes=violation_code, poi_ids=poi_id, limit=limit - len(records))
+        if "geometry" in frame.columns:
+            frame = pd.DataFrame(frame).assign(geometry=frame.geometry.to_wkt())
+        frame = frame.astype(object).where(frame.notna(), None)
+        records += frame.to_dict(orient="records")
+        if len(records) >= limit:
+            break
+    return {"table": table, "rows": len(records), "records": records}
+
+@app.get("/results/runs")
+def stored_result_runs():
+    runs = {}
+    for results_dir in _results_dirs():
+        for run in list_runs(results_dir):
+            runs.setdefault(run["run_id"], {**run, "results_dir": results_dir})
+    return sorted(runs.values(), key=lambda run: run["run_id"], reverse=True)
 
 # Download files
 @app.get("/logfile")
@@ -86,10 +321,12 @@ def download_report(path: str):
         return FileResponse(path, media_type=media)
     return JSONResponse({"error": "Report not found"}, status_code=404)
 
-# Emergency Stop
+# Emergency Stop (most recent job)
 @app.post("/stop_pipeline")
 def stop_pipeline():
-    pipeline_status["emergency_stop"] = True
-    pipeline_logs.append("EMERGENCY STOP! Pipeline terminated by user.")
-    pipeline_status["running"] = False
-    return {"status": "stopping"}
+    job = job_manager.latest()
+    if job is None or job.state not in ("queued", "running"):
+        return {"status": "idle"}
+    job_manager.cancel(job.id)
+    job.logs.append("EMERGENCY STOP! Pipeline terminated by user.")
+    return {"status": "stopping", "job_id": job.id}
@@ -0,0 +1,134 @@
+# api/jobs.py
+
+import os
+import uuid
+import datetime
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .pipeline import run_pipeline_html
+from .state import LogBuffer
+from src.utils.logger import release_logger
+
+# Pipelines allowed to run at once; further jobs wait in the queue
+MAX_JOBS = int(os.environ.get("POI_MAX_JOBS", "2"))
+# Finished jobs kept for inspection before the oldest are forgotten
+MAX_FINISHED_JOBS = 100
+
+def _now():
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+class Job:
+    """
+    One pipeline run. `status` has the same keys as api.state.pipeline_status
+    and, like `logs`, is updated in place by run_pipeline_html.
+    """
+
+    def __init__(self, params):
+        self.id = uuid.uuid4().hex[:12]
+        self.params = dict(params)
+        self.state = "queued"
+        self.created = _now()
+        self.started = None
+        self.finished = None
+        self.error = None
+        self.status = {"running": False, "emergency_stop": False, "last_report": None, "metrics": []}
+        self.logs = LogBuffer()
+        self.future = None
+
+    def summary(self):
+        return {
+            "job_id": self.id,
+            "state": self.state,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "report": self.status.get("last_report"),
+            "params": self.params,
+        }
+
+    def details(self):
+        return {**self.summary(), "error": self.error, "metrics": self.status.get("metrics", []), "logs": list(self.logs)}
+
+class JobManager:
+    """
+    Runs pipeline jobs on a bounded thread pool. Every job gets its own
+    status, log list, log file and report paths, so concurrent runs do not
+    share state. Geocoding can still use processes through geocode_workers.
+    """
+
+    def __init__(self, max_workers=MAX_JOBS):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, params):
+        job = Job(params)
+        # The job becomes visible together with its future; cancel() holds the same lock
+        with self._lock:
+            self._jobs[job.id] = job
+            self._forget_finished()
+            job.future = self._pool.submit(self._run, job)
+        return job
+
+    def _run(self, job):
+        with self._lock:
+            if job.state == "cancelled":
+                return
+            job.state = "running"
+            job.started = _now()
+        try:
+            html_path = run_pipeline_html(**job.params, status=job.status, logs=job.logs, run_id=job.id)
+            if job.status["emergency_stop"]:
+                job.state = "cancelled"
+            elif html_path:
+                job.state = "done"
+            else:
+                job.state = "failed"
+                job.error = job.logs.last()
+        except Exception as e:
+            job.state = "failed"
+            job.error = str(e)
+        finally:
+            job.status["running"] = False
+            job.finished = _now()
+            # Close the job's log file and drop its logger
+            release_logger(f"api.{job.id}")
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return [job.summary() for job in reversed(self._jobs.values())]
+
+    def latest(self):
+        with self._lock:
+            return next(reversed(self._jobs.values()), None)
+
+    def cancel(self, job_id):
+        """
+        Drops a queued job; asks a running one to stop at the next chunk boundary.
+        Returns the job, or None if unknown.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.state == "queued":
+                # A worker that already picked the job up sees the state and returns
+                job.future.cancel()
+                job.state = "cancelled"
+                job.finished = _now()
+            elif job.state == "running":
+                job.status["emergency_stop"] = True
+        return job
+
+    def _forget_finished(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.state in ("done", "failed", "cancelled")]
+        for job_id in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self._jobs[job_id]
+
+job_manager = JobManager()
@@ -8,3 +8,12 @@ class PipelineRequest(BaseModel):
     test_mode: bool = False
     test_file: Optional[str] = None
     base_logdir: str = "logs"
+    geocode_workers: int = 1
+    fast_load: bool = False
+    rebuild_street_cache: bool = False
+    chunk_size: int = 100000
+    compact: bool = False
+
+class WarmStreetsRequest(BaseModel):
+    streets_dir: str = "data/STREETS_NAMING_ADDRESSING"
+    fast_load: bool = False
@@ -0,0 +1,192 @@
+# api/online.py
+
+import os
+import json
+from collections import Counter
+import numpy as np
+import pandas as pd
+import shapely
+
+from src.preprocessing.geocode import match_addresses, interpolate_matches
+from src.preprocessing.spatial import poi_points, nearest_segments
+from src.validation.validator import validate_pois
+from src.validation.fixer import fix_pois
+from .street_store import street_store
+
+# Records accepted in one request
+MAX_RECORDS = int(os.environ.get("POI_ONLINE_MAX_RECORDS", "100000"))
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+# POI columns fix_pois may correct
+FIX_COLUMNS = ("poi_st_sd", "percfrref")
+# Streets used when a request names none: the first preloaded dataset
+DEFAULT_STREETS_DIR = (os.environ.get("POI_PRELOAD_STREETS", "").split(os.pathsep)[0]
+                       or "data/STREETS_NAMING_ADDRESSING")
+
+class PayloadError(ValueError):
+    """
+    A request body that cannot be read as records (answered with 400).
+    """
+
+def is_ndjson(content_type):
+    return (content_type or "").split(";")[0].strip().lower() in NDJSON_TYPES
+
+def parse_records(body, ndjson=False):
+    """
+    Reads a request body as a list of record dicts plus request options.
+    JSON bodies are a list of records, one record, or
+    {"records": [...], "streets_dir": ..., "fast_load": ...};
+    NDJSON bodies hold one record per line.
+    """
+    options = {}
+    try:
+        if ndjson:
+            records = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            data = json.loads(body or b"[]")
+            if isinstance(data, dict) and "records" in data:
+                records = data.pop("records")
+                options = data
+            else:
+                records = [data] if isinstance(data, dict) else data
+    except json.JSONDecodeError as e:
+        raise PayloadError(f"Invalid JSON: {e}") from e
+    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+        raise PayloadError("Expected a list of JSON objects")
+    if len(records) > MAX_RECORDS:
+        raise PayloadError(f"At most {MAX_RECORDS} records per request")
+    return records, options
+
+def _scalars(values):
+    # JSON lists and objects are not usable field values; treated as missing
+    return [v if v is None or isinstance(v, (str, int, float)) else None for v in values]
+
+def _link_key(value, link_index):
+    # A link_id sent as a string ("1100") also finds a numeric street link_id
+    if isinstance(value, str) and value not in link_index:
+        number = pd.to_numeric(value, errors="coerce")
+        return value if pd.isna(number) else number
+    return value
+
+def _json_values(values):
+    # NaN is not valid JSON; numpy scalars are not serializable
+    return [None if v is None or v != v else v for v in np.asarray(values).tolist()]
+
+def geocode_records(street_index, records):
+    """
+    Geocodes {st_name, st_num_ful} records in one vectorized batch, the same
+    way the pipeline's batch mode does. Every record comes back with its
+    own fields plus matched, link_id, side and x/y in the streets' CRS.
+    """
+    n = len(records)
+    names = _scalars(r.get("st_name") for r in records)
+    nums = _scalars(r.get("st_num_ful") for r in records)
+    positions, fractions, sides = match_addresses(street_index, names, nums)
+    points = interpolate_matches(street_index, positions, fractions)
+    matched = positions >= 0
+    if len(street_index):
+        link_ids = street_index.link_id[np.maximum(positions, 0)].astype(object)
+        link_ids[~matched] = None
+    else:
+        link_ids = np.full(n, None, dtype=object)
+    xs, ys = _json_values(shapely.get_x(points)), _json_values(shapely.get_y(points))
+    results = [
+        {**record, "matched": hit, "link_id": link_id, "side": side, "x": x, "y": y}
+        for record, hit, link_id, side, x, y in zip(records, matched.tolist(), _json_values(link_ids),
+                                                   sides.tolist(), xs, ys)
+    ]
+    return results, int(matched.sum())
+
+def _request(body, ndjson, streets_dir, fast_load):
+    records, options = parse_records(body, ndjson)
+    streets_dir = streets_dir or options.get("streets_dir") or DEFAULT_STREETS_DIR
+    fast_load = bool(options.get("fast_load", False) if fast_load is None else fast_load)
+    if not os.path.isdir(streets_dir):
+        raise FileNotFoundError(streets_dir)
+    return records, options, streets_dir, fast_load
+
+def _response(results, ndjson_response, **summary):
+    if ndjson_response:
+        lines = "".join(json.dumps(result) + "\n" for result in results)
+        return lines.encode("utf-8"), "application/x-ndjson"
+    return json.dumps({**summary, "results": results}).encode("utf-8"), "application/json"
+
+def geocode_payload(body, ndjson=False, streets_dir=None, fast_load=None, ndjson_response=None):
+    """
+    Handles one /geocode request body against the resident street index.
+    Returns (response bytes, media type); the response is NDJSON (one
+    result per line) when `ndjson_response`, else when the request was.
+    Raises PayloadError for unreadable bodies and FileNotFoundError for an
+    unknown streets directory.
+    """
+    records, _, streets_dir, fast_load = _request(body, ndjson, streets_dir, fast_load)
+    street_index = street_store.index(streets_dir, fast=fast_load)
+    results, matched = geocode_records(street_index, records)
+    crs = street_index.crs.to_string() if street_index.crs else None
+    return _response(results, ndjson if ndjson_response is None else ndjson_response,
+                     crs=crs, records=len(results), matched=matched)
+
+def validate_records(streets_gdf, street_index, link_index, records, fix=False):
+    """
+    Validates POI records with the pipeline's rules (validate_pois), joining
+    streets through the resident LinkIndex (a numeric link_id may be sent as
+    a string; list or object values count as missing). Records with
+    coordinates (lat/lon or x/y) also get the geometry side check, as after
+    geocode_pois.
+    Every record comes back with its own fields plus violation_code and
+    violation_detail; with fix=True also `fixed`, the record as fix_pois
+    would correct it (None when it would be deleted), and for
+    FIX_MULTIDIGIT `street_fix`, the proposed change to its street.
+    Returns (results, violation counts).
+    """
+    n = len(records)
+    frame = pd.DataFrame.from_records(records, index=range(n))
+    for col in ("poi_name", "link_id"):
+        if col not in frame.columns:
+            frame[col] = None
+    frame["link_id"] = [_link_key(v, link_index) for v in _scalars(frame["link_id"])]
+    # Records are checked independently, whatever poi_id they carry
+    frame["poi_id"] = np.arange(n)
+    points = poi_points(frame, street_index.crs)
+    if points is not None and len(street_index):
+        near_pos, _, near_sides = nearest_segments(street_index, points)
+        near_links = street_index.link_id[np.maximum(near_pos, 0)].astype(object)
+        near_links[near_pos < 0] = None
+        frame["near_link_id"] = near_links
+        frame["near_side"] = near_sides
+
+    validation = validate_pois(frame, streets_gdf, link_index=link_index)
+    codes = validation["violation_code"].astype(str).tolist()
+    details = validation["violation_detail"].astype(str).tolist()
+    results = [{**record, "violation_code": code, "violation_detail": detail}
+               for record, code, detail in zip(records, codes, details)]
+
+    if fix:
+        fixed = fix_pois(validation, frame, streets_gdf, update_streets=False).set_index("poi_id")
+        kept = np.isin(np.arange(n), fixed.index.to_numpy())
+        fixed = fixed.reindex(range(n))
+        changes = {}
+        for col in (c for c in FIX_COLUMNS if c in fixed.columns):
+            before, after = frame[col].astype(object), fixed[col].astype(object)
+            changed = kept & ~((before == after) | (before.isna() & after.isna())).to_numpy()
+            changes[col] = (changed, _json_values(after.to_numpy()))
+        for i, result in enumerate(results):
+            if not kept[i]:
+                result["fixed"] = None
+                continue
+            result["fixed"] = {**records[i], **{col: values[i] for col, (changed, values) in changes.items()
+                                                if changed[i]}}
+            if codes[i] == "FIX_MULTIDIGIT" and "multidigit" in streets_gdf.columns:
+                result["street_fix"] = {"link_id": records[i].get("link_id"), "multidigit": "N"}
+    return results, dict(Counter(codes).most_common())
+
+def validate_payload(body, ndjson=False, streets_dir=None, fast_load=None, fix=None, ndjson_response=None):
+    """
+    Handles one /validate request body; like geocode_payload. `fix` (or a
+    "fix" option in a JSON body) adds the proposed corrections.
+    """
+    records, options, streets_dir, fast_load = _request(body, ndjson, streets_dir, fast_load)
+    fix = bool(options.get("fix", False) if fix is None else fix)
+    streets_gdf, street_index, link_index = street_store.resident(streets_dir, fast=fast_load)
+    results, counts = validate_records(streets_gdf, street_index, link_index, records, fix)
+    return _response(results, ndjson if ndjson_response is None else ndjson_response,
+                     records=len(results), violation_counts=counts)
@@ -3,14 +3,20 @@
 import os
 import datetime
 from src.utils.logger import get_logger
-from src.data_loader.data_loader import load_pois, load_streets
-from src.preprocessing.normalizer import normalize_pois, normalize_streets
-from src.preprocessing.geocode import geocode_pois
-from src.validation.validator import validate_pois
-from src.validation.fixer import fix_pois
+from src.data_loader.data_loader import load_pois
+from src.data_loader.street_cache import street_data_key
+from src.preprocessing.normalizer import normalize_pois
+from src.preprocessing.geocode_cache import open_geocode_cache, cache_summary
+from src.pipeline.chunked import run_chunked, DEFAULT_CHUNK_SIZE, DEFAULT_CHECKPOINT_DIR
 from src.analysis.report import generate_report
+from src.validation.validator import violation_counts
+from src.utils.metrics import StageMetrics, metrics_path_for
+from src.utils.cancellation import CancellationToken, PipelineCancelled
+from src.storage.results_store import write_results, source_files_of
+from src.utils.run_manifest import record_run, backfill, artifact_paths, DEFAULT_MANIFEST
 
 from .state import pipeline_status, pipeline_logs, append_log
+from .street_store import street_store
 
 def run_pipeline_html(
     pois_dir,
@@ -20,16 +26,47 @@ def run_pipeline_html(
     test_file=None,
     base_logdir="logs",
     logger_callback=None,
+    geocode_workers=1,
+    fast_load=False,
+    rebuild_street_cache=False,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    compact=False,
+    checkpoint_dir=DEFAULT_CHECKPOINT_DIR,
+    status=None,
+    logs=None,
+    run_id=None,
+    manifest=DEFAULT_MANIFEST,
 ):
+    """
+    Runs the pipeline, reporting progress into `status` / `logs` (the shared
+    pipeline_status / pipeline_logs by default; a job passes its own).
+    `run_id` keeps log and report file names of concurrent runs apart.
+    Geocoding, validation and fixing run in chunks of `chunk_size`; an
+    emergency stop is honoured at the next chunk, and finished chunks are
+    checkpointed under `checkpoint_dir` so rerunning the same input resumes.
+    Every run, finished or not, is recorded in the run manifest; the stage
+    outputs are stored as partitioned Parquet under <output_dir>/results.
+    compact=True keeps the POIs in compact dtypes and reports the in-memory
+    size of every stage's output with the stage metrics.
+    """
+    if status is None:
+        status = pipeline_status
+        # Clear the previous direct run's stop request; a job's status starts clear,
+        # and a stop requested while the job starts must stand
+        status["emergency_stop"] = False
+    logs = pipeline_logs if logs is None else logs
     # Reset status/logs
-    pipeline_status["running"] = True
-    pipeline_status["emergency_stop"] = False
-    pipeline_status["last_report"] = None
-    pipeline_logs.clear()
+    status["running"] = True
+    status["last_report"] = None
+    status["metrics"] = []
+    status["summary"] = None
+    logs.clear()
 
     now = datetime.datetime.now()
     date_str = now.strftime("%Y%m%d")
     hour_str = now.strftime("%H%M%S")
+    if run_id:
+        hour_str = f"{hour_str}_{run_id}"
     logs_path = os.path.join(base_logdir, date_str)
     os.makedirs(logs_path, exist_ok=True)
     log_file = os.path.join(logs_path, f"api_{date_str}_{hour_str}.log")
@@ -38,116 +75,162 @@ def run_pipeline_html(
     html_path = os.path.join(report_dir, f"report_ex_{date_str}_{hour_str}.html")
     pdf_path = os.path.join(report_dir, f"report_ex_{date_str}_{hour_str}.pdf")
 
-    logger = get_logger("api", log_file=log_file)
+    logger = get_logger(f"api.{run_id}" if run_id else "api", log_file=log_file)
+    if run_id:
+        logger.propagate = False  # keep job lines out of the shared "api" log
+    metrics = StageMetrics(memory=compact)
+    manifest_id = os.path.splitext(os.path.basename(log_file))[0]
+    results_dir = os.path.join(output_dir, "results")
+    started = now.strftime("%Y-%m-%d %H:%M:%S")
+
+    def stage_done():
+        status["metrics"] = metrics.as_list()
+        metrics.write_json(metrics_path_for(log_file))
 
     def log(msg):
         line = f"{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {msg}"
-        append_log(line)
+        append_log(line, logs)
         logger.info(msg)
         if logger_callback:
             logger_callback(msg)
 
     try:
         # 1. Load POIs
-        if test_mode and test_file:
-            log(f"Loading test POIs from {test_file}")
-            import pandas as pd
-            pois_df = pd.read_csv(test_file)
-        else:
-            log(f"Loading POIs from {pois_dir}")
-            pois_df = load_pois(pois_dir)
+        with metrics.stage("load_pois") as stage:
+            if test_mode and test_file:
+                log(f"Loading test POIs from {test_file}")
+                import pandas as pd
+                pois_df = pd.read_csv(test_file)
+            else:
+                log(f"Loading POIs from {pois_dir}")
+                pois_df = load_pois(pois_dir, logger, fast=fast_load)
+            stage["rows"] = len(pois_df)
+            stage["output"] = pois_df
+        stage_done()
         log(f"Raw POIs loaded: {len(pois_df)} records")
-        if pipeline_status["emergency_stop"]:
+        if status["emergency_stop"]:
             log("EMERGENCY STOP! Pipeline terminated after loading POIs.")
-            pipeline_status["running"] = False
+            status["running"] = False
             return None
 
         # 2. Normalize POIs
-        pois_df = normalize_pois(pois_df, logger)
+        with metrics.stage("normalize", rows=len(pois_df)) as stage:
+            pois_df = normalize_pois(pois_df, logger, compact=compact)
+            stage["output"] = pois_df
+        stage_done()
         log(f"Normalized POIs: {len(pois_df)}")
-        if pipeline_status["emergency_stop"]:
+        if status["emergency_stop"]:
             log("EMERGENCY STOP! Pipeline terminated after normalizing POIs.")
-            pipeline_status["running"] = False
+            status["running"] = False
             return None
 
-        # 3. Load and normalize streets
+        # 3. Load and normalize streets (resident across runs, see street_store)
         log(f"Loading streets from {streets_dir}")
-        streets_gdf = load_streets(streets_dir)
-        log(f"Raw street segments loaded: {len(streets_gdf)}")
-        streets_gdf = normalize_streets(streets_gdf, logger)
-        log(f"Normalized street segments: {len(streets_gdf)}")
-        if pipeline_status["emergency_stop"]:
+        with metrics.stage("load_streets") as stage:
+            streets_gdf, street_index, hit = street_store.get(streets_dir, logger, fast=fast_load, rebuild=rebuild_street_cache)
+            stage["rows"] = len(streets_gdf)
+        stage_done()
+        log(f"Normalized street segments: {len(streets_gdf)}" + (" (resident, not reloaded)" if hit else ""))
+        if status["emergency_stop"]:
             log("EMERGENCY STOP! Pipeline terminated after loading streets.")
-            pipeline_status["running"] = False
+            status["running"] = False
             return None
 
         # 4. Optional: Limit POIs for test
         if test_mode and not test_file:
             log("Test mode enabled: Limiting to first 1001 POIs")
             pois_df = pois_df.iloc[:1001].copy()
-        if pipeline_status["emergency_stop"]:
+        if status["emergency_stop"]:
             log("EMERGENCY STOP! Pipeline terminated after limiting POIs.")
-            pipeline_status["running"] = False
+            status["running"] = False
             return None
 
-        # 5. Geocoding
-        pois_geo = geocode_pois(pois_df, streets_gdf, logger)
-        log(f"Geocoded POIs: {pois_geo.geometry.notnull().sum()} out of {len(pois_geo)}")
-        if pipeline_status["emergency_stop"]:
-            log("EMERGENCY STOP! Pipeline terminated after geocoding.")
-            pipeline_status["running"] = False
+        # 5-7. Geocoding, validation and auto-fixing, chunk by chunk so a stop
+        # request takes effect at the next chunk and finished chunks are kept
+        def chunk_done(chunk_no, n_chunks):
+            stage_done()
+            log(f"Chunk {chunk_no}/{n_chunks} geocoded, validated and fixed")
+
+        token = CancellationToken(lambda: status["emergency_stop"])
+        # The resident dataset's key stands for its content, so no run re-hashes the streets
+        street_key = street_store.signature(streets_dir, fast=fast_load)
+        geocode_cache = open_geocode_cache(streets_dir, street_data_key(streets_dir), logger=logger)
+        cache_before = geocode_cache.stats()
+        try:
+            pois_geo, validation_results, pois_fixed = run_chunked(
+                pois_df, streets_gdf, logger, chunk_size=chunk_size, token=token,
+                checkpoint_dir=checkpoint_dir, geocode_workers=geocode_workers,
+                street_index=street_index, metrics=metrics, progress=chunk_done, geocode_cache=geocode_cache,
+                street_key=street_key)
+        except PipelineCancelled as e:
+            log(f"EMERGENCY STOP! Pipeline terminated: {e}. Finished chunks are kept for the next run.")
+            status["running"] = False
             return None
-
-        # 6. Validation
-        validation_results = validate_pois(pois_geo, streets_gdf, logger)
+        log(f"Geocoded POIs: {pois_geo.geometry.notnull().sum()} out of {len(pois_geo)}")
+        log(cache_summary(cache_before, geocode_cache.stats()))
         log(f"Validation finished for {len(pois_geo)} POIs.")
-        if pipeline_status["emergency_stop"]:
-            log("EMERGENCY STOP! Pipeline terminated after validation.")
-            pipeline_status["running"] = False
-            return None
-
-        # 7. Auto-fixing
-        pois_fixed = fix_pois(validation_results, pois_geo, streets_gdf, logger)
         log(f"Auto-fix applied. Final POIs: {len(pois_fixed)}")
-        if pipeline_status["emergency_stop"]:
-            log("EMERGENCY STOP! Pipeline terminated after fixing.")
-            pipeline_status["running"] = False
-            return None
 
-        # 8. Generate reports
-        generate_report(
-            pois_fixed,
-            validation_results,
-            output_dir=report_dir,
-            logger=logger,
-            pdf_path=pdf_path,
-            html_path=html_path,
-        )
+        # 8. Persist the stage outputs for downstream queries
+        with metrics.stage("store", rows=len(pois_fixed)):
+            write_results(results_dir, manifest_id, date_str,
+                          {"pois_geo": pois_geo, "validation": validation_results, "pois_fixed": pois_fixed},
+                          source_files=source_files_of(pois_geo), logger=logger)
+        stage_done()
+        log(f"Results stored in {results_dir}")
+
+        # 9. Generate reports
+        with metrics.stage("report", rows=len(validation_results)):
+            generate_report(
+                pois_fixed,
+                validation_results,
+                output_dir=report_dir,
+                logger=logger,
+                pdf_path=pdf_path,
+                html_path=html_path,
+                metrics=metrics.as_list(),
+            )
+        stage_done()
         log(f"Detailed reports generated: {pdf_path}, {html_path}")
-        pipeline_status["last_report"] = html_path
+        status["last_report"] = html_path
+        status["summary"] = {"total_pois": len(pois_fixed),
+                             "violation_counts": violation_counts(validation_results)}
+
+        log("Pipeline finished successfully.")
+        status["running"] = False
+        return html_path
 
     except Exception as e:
         log(f"Pipeline error: {e}")
-        pipeline_status["running"] = False
+        status["running"] = False
         return None
 
-    log("Pipeline finished successfully.")
-    pipeline_status["running"] = False
-    return html_path
-
-# Helper functions for history endpoints
-def get_report_history():
-    history = []
-    for root, dirs, files in os.walk("output"):
-        for f in files:
-            if f.endswith(".html") or f.endswith(".pdf"):
-                history.append(os.path.join(root, f))
-    return sorted(history, reverse=True)
-
-def get_log_history():
-    history = []
-    for root, dirs, files in os.walk("logs"):
-        for f in files:
-            if f.endswith(".log"):
-                history.append(os.path.join(root, f))
-    return sorted(history, reverse=True)
+    finally:
+        done = status["last_report"] is not None
+        record_run({
+            "run_id": manifest_id,
+            "source": "api",
+            "started": started,
+            "finished": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "status": "done" if done else "cancelled" if status["emergency_stop"] else "failed",
+            "pois_dir": test_file if test_mode and test_file else pois_dir,
+            "streets_dir": streets_dir,
+            "params": {"test_mode": test_mode, "chunk_size": chunk_size, "geocode_workers": geocode_workers,
+                       "fast_load": fast_load, "compact": compact, "job_id": run_id, "results_dir": results_dir},
+            "total_pois": (status["summary"] or {}).get("total_pois"),
+            "violation_counts": (status["summary"] or {}).get("violation_counts"),
+            "metrics": metrics.as_list(),
+            "log_path": log_file,
+            "html_path": html_path if done else None,
+            "pdf_path": pdf_path if done else None,
+        }, manifest)
+
+# Helper functions for history endpoints, served from the run manifest
+# (runs from before the manifest existed are imported on first use)
+def get_report_history(limit=200, offset=0, manifest=DEFAULT_MANIFEST):
+    backfill(manifest)
+    return artifact_paths(("html", "pdf"), manifest, limit=limit, offset=offset)
+
+def get_log_history(limit=200, offset=0, manifest=DEFAULT_MANIFEST):
+    backfill(manifest)
+    return artifact_paths(("log",), manifest, limit=limit, offset=offset)
@@ -1,11 +1,66 @@
+import threading
+from collections import deque
+from itertools import islice
+
+MAX_LOG_LINES = 1000
+
+class LogBuffer:
+    """
+    Ring buffer of log lines with monotonically increasing sequence numbers.
+    Readers keep a cursor (the next sequence number they want) and only
+    receive lines appended after it; the oldest lines drop out in O(1).
+    """
+
+    def __init__(self, maxlen=MAX_LOG_LINES):
+        self._lines = deque(maxlen=maxlen)
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def append(self, line):
+        with self._lock:
+            self._lines.append(line)
+            self._next += 1
+
+    def clear(self):
+        # Sequence numbers keep growing so existing cursors stay valid
+        with self._lock:
+            self._lines.clear()
+
+    @property
+    def cursor(self):
+        """
+        Sequence number the next appended line will get.
+        """
+        return self._next
+
+    def since(self, cursor=0):
+        """
+        Returns (lines with sequence >= cursor, next cursor). Lines that
+        already dropped out of the buffer are skipped.
+        """
+        with self._lock:
+            if cursor >= self._next:
+                return [], self._next
+            first = self._next - len(self._lines)
+            return list(islice(self._lines, max(cursor - first, 0), None)), self._next
+
+    def last(self):
+        with self._lock:
+            return self._lines[-1] if self._lines else None
+
+    def __iter__(self):
+        return iter(self.since(0)[0])
+
+    def __len__(self):
+        return len(self._lines)
+
 pipeline_status = {
     "running": False,
     "emergency_stop": False,
-    "last_report": None
+    "last_report": None,
+    "metrics": []
 }
-pipeline_logs = []
+pipeline_logs = LogBuffer()
 
-def append_log(line):
-    pipeline_logs.append(line)
-    if len(pipeline_logs) > 1000:
-        pipeline_logs.pop(0)
+def append_log(line, logs=None):
+    (pipeline_logs if logs is None else logs).append(line)
@@ -17,21 +17,58 @@ function updateStatus(status) {
   }
 }
 
-function pollLogs() {
-  fetch('/logs').then(res => res.json()).then(status => {
-    let logs = document.getElementById("logs");
-    logs.textContent = (status.logs || []).join("\n");
-    logs.scrollTop = logs.scrollHeight;
-    updateStatus(status);
+let logCursor = 0;
+let logJob;
+let logSource = null;
+
+function appendLogLines(lines) {
+  if (!lines.length) return;
+  let logs = document.getElementById("logs");
+  logs.textContent += (logs.textContent ? "\n" : "") + lines.join("\n");
+  logs.scrollTop = logs.scrollHeight;
+}
 
-    let frame = document.getElementById("report-frame");
-    if (frame && status.last_report) {
-      frame.style.display = 'block';
-      frame.src = '/report';
+function resetLogs() {
+  document.getElementById("logs").textContent = "";
+  logCursor = 0;
+}
+
+function applyStatus(status) {
+  updateStatus(status);
+  let frame = document.getElementById("report-frame");
+  if (frame && status.last_report) {
+    frame.style.display = 'block';
+    frame.src = '/report';
+  }
+}
+
+// Push updates: log lines, status changes and job switches as server-sent events
+function streamLogs() {
+  logSource = new EventSource('/logs/stream');
+  logSource.onmessage = e => appendLogLines([e.data]);
+  logSource.addEventListener('reset', resetLogs);
+  logSource.addEventListener('status', e => applyStatus(JSON.parse(e.data)));
+}
+
+// Fallback without EventSource: poll only the lines after our cursor
+function pollLogs() {
+  fetch('/logs?since=' + logCursor).then(res => res.json()).then(status => {
+    if (status.job_id !== logJob) {
+      logJob = status.job_id;
+      resetLogs();
+      return;
     }
+    appendLogLines(status.logs);
+    logCursor = status.next;
+    applyStatus(status);
   });
 }
-setInterval(pollLogs, 1200);
+
+if (window.EventSource) {
+  streamLogs();
+} else {
+  setInterval(pollLogs, 1200);
+}
 
 document.getElementById('pipeline-form').onsubmit = function(e) {
   e.preventDefault();
@@ -47,7 +84,7 @@ document.getElementById('pipeline-form').onsubmit = function(e) {
     headers: {'Content-Type': 'application/json'},
     body: JSON.stringify(params)
   }).then(res => res.json())
-    .then(data => setTimeout(pollLogs, 500));
+    .then(data => { if (!logSource) setTimeout(pollLogs, 500); });
 };
 
 function stopPipeline() {
@@ -0,0 +1,151 @@
+# api/street_store.py
+
+import os
+import time
+import threading
+from collections import OrderedDict
+import shapely
+
+from src.data_loader.street_cache import load_normalized_streets, street_files_signature, street_cache_key
+from src.preprocessing.street_index import build_street_index
+from src.validation.validator import LinkIndex
+
+# Memory the resident street datasets may use together before the least
+# recently used ones are dropped
+STREET_CACHE_MB = float(os.environ.get("POI_STREET_CACHE_MB", "2048"))
+
+def estimate_bytes(streets_gdf):
+    """
+    Rough resident size of a normalized street dataset plus its index:
+    attribute columns (twice, the index keeps sorted copies) and coordinates.
+    """
+    frame = int(streets_gdf.drop(columns=streets_gdf.geometry.name).memory_usage(deep=True).sum())
+    geometry = int(shapely.get_num_coordinates(streets_gdf.geometry.values).sum()) * 16 + len(streets_gdf) * 100
+    return 2 * frame + geometry
+
+class StreetStore:
+    """
+    Keeps loaded, normalized and indexed street datasets in memory across
+    pipeline runs, keyed by streets_dir (and loader mode).
+
+    Every lookup re-checks the files' signature (paths, sizes, mtimes), so a
+    changed directory is reloaded. Datasets are evicted least recently used
+    first once their estimated size exceeds `budget_mb`; the most recent one
+    always stays.
+    """
+
+    def __init__(self, budget_mb=STREET_CACHE_MB):
+        self.budget = int(budget_mb * 1024 * 1024)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    def _entry(self, streets_dir, logger=None, fast=False, rebuild=False):
+        key = (os.path.abspath(streets_dir), bool(fast))
+        with self._lock:
+            load_lock = self._loading.setdefault(key, threading.Lock())
+        # One load per directory at a time; other directories are not blocked
+        with load_lock:
+            signature = street_cache_key(street_files_signature(streets_dir, fast=fast))
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and not rebuild and entry["signature"] == signature:
+                    self._entries.move_to_end(key)
+                    entry["hits"] += 1
+                    return entry, True
+
+            started = time.perf_counter()
+            streets_gdf, _ = load_normalized_streets(streets_dir, logger, fast=fast, rebuild=rebuild)
+            entry = {
+                "streets": streets_gdf,
+                "index": build_street_index(streets_gdf, logger),
+                "signature": signature,
+                "bytes": estimate_bytes(streets_gdf) if len(streets_gdf) else 0,
+                "loaded": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "load_s": round(time.perf_counter() - started, 3),
+                "hits": 0,
+            }
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                self._evict(logger)
+            if logger:
+                logger.info(f"Street dataset for {streets_dir} loaded and kept resident "
+                            f"(~{entry['bytes'] / 1024 ** 2:.1f} MB)")
+            return entry, False
+
+    def get(self, streets_dir, logger=None, fast=False, rebuild=False):
+        """
+        Returns (streets_gdf, street_index, hit). The frame is a shallow
+        copy with its own `multidigit` column, the one pipeline fixes write
+        (apply_multidigit_fixes), so they never reach the resident dataset,
+        with or without pandas copy-on-write.
+        """
+        entry, hit = self._entry(streets_dir, logger, fast, rebuild)
+        if hit and logger:
+            logger.info(f"Resident street dataset reused for {streets_dir} ({len(entry['streets'])} segments)")
+        streets = entry["streets"].copy(deep=False)
+        if "multidigit" in streets.columns:
+            streets["multidigit"] = streets["multidigit"].copy()
+        return streets, entry["index"], hit
+
+    def index(self, streets_dir, logger=None, fast=False):
+        """
+        The resident StreetIndex alone (no frame copy), for per-request
+        lookups such as the /geocode endpoint.
+        """
+        return self._entry(streets_dir, logger, fast)[0]["index"]
+
+    def signature(self, streets_dir, logger=None, fast=False):
+        """
+        Cache key of the resident dataset's files (street_cache_key), which
+        identifies its content for chunk checkpoints and the geocode cache.
+        """
+        return self._entry(streets_dir, logger, fast)[0]["signature"]
+
+    def resident(self, streets_dir, logger=None, fast=False):
+        """
+        (streets_gdf, street_index, link_index) of the resident dataset for
+        per-request validation. The frame is not copied, so callers must not
+        modify it; the LinkIndex is built on first use and kept with it.
+        """
+        entry, _ = self._entry(streets_dir, logger, fast)
+        if "links" not in entry:
+            links = LinkIndex(entry["streets"])
+            with self._lock:
+                if "links" not in entry:
+                    entry["links"] = links
+                    entry["bytes"] += len(links) * 100
+        return entry["streets"], entry["index"], entry["links"]
+
+    def _evict(self, logger=None):
+        while len(self._entries) > 1 and sum(e["bytes"] for e in self._entries.values()) > self.budget:
+            (streets_dir, _), _ = self._entries.popitem(last=False)
+            if logger:
+                logger.info(f"Resident street dataset evicted: {streets_dir}")
+
+    def drop(self, streets_dir=None):
+        """
+        Forgets one directory's datasets, or all of them.
+        """
+        with self._lock:
+            for key in list(self._entries):
+                if streets_dir is None or key[0] == os.path.abspath(streets_dir):
+                    del self._entries[key]
+
+    def info(self):
+        with self._lock:
+            entries = [{
+                "streets_dir": streets_dir,
+                "fast_load": fast,
+                "segments": len(e["streets"]),
+                "mb": round(e["bytes"] / 1024 ** 2, 1),
+                "loaded": e["loaded"],
+                "load_s": e["load_s"],
+                "hits": e["hits"],
+            } for (streets_dir, fast), e in reversed(self._entries.items())]
+        return {"budget_mb": round(self.budget / 1024 ** 2, 1),
+                "used_mb": round(sum(e["mb"] for e in entries), 1),
+                "datasets": entries}
+
+street_store = StreetStore()
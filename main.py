@@ -1,14 +1,24 @@
 import argparse
 import os
 import sys
+import shutil
 import datetime
 from src.utils.logger import get_logger
-from src.data_loader.data_loader import load_pois, load_streets
-from src.preprocessing.normalizer import normalize_pois, normalize_streets
+from src.data_loader.data_loader import load_pois, street_filter_for
+from src.data_loader.street_cache import load_normalized_streets, street_data_key
+from src.preprocessing.normalizer import normalize_pois
 from src.preprocessing.geocode import geocode_pois
-from src.validation.validator import validate_pois
+from src.preprocessing.geocode_cache import open_geocode_cache, cache_summary
+from src.validation.validator import validate_pois, violation_counts
 from src.validation.fixer import fix_pois
 from src.analysis.report import generate_report
+from src.pipeline.streaming import run_streaming
+from src.pipeline.incremental import run_incremental, DEFAULT_STATE_DIR
+from src.pipeline.chunked import run_chunked, DEFAULT_CHUNK_SIZE
+from src.pipeline.stages import StageCheckpoints, stage_keys, stage_dir_for, find_stage_dir
+from src.utils.metrics import StageMetrics, track, metrics_path_for
+from src.utils.run_manifest import record_run, DEFAULT_MANIFEST
+from src.storage.results_store import write_results, source_files_of
 
 def main(
     pois_dir,
@@ -16,11 +26,41 @@ def main(
     output_dir,
     test_mode=False,
     test_file=None,
-    base_logdir="logs"
+    base_logdir="logs",
+    geocode_workers=1,
+    fast_load=False,
+    rebuild_street_cache=False,
+    stream=False,
+    chunk_size=100000,
+    incremental=False,
+    state_dir=DEFAULT_STATE_DIR,
+    profile=False,
+    checkpoint_dir=None,
+    manifest=DEFAULT_MANIFEST,
+    results_dir=None,
+    compact=False,
+    memory_report=False,
+    resume=None,
+    stage_checkpoints=False,
+    keep_stages=False,
+    use_geocode_cache=True,
+    filter_streets=False
 ):
     """
     Main pipeline for POI Data Processing. Handles all stages.
-    If KeyboardInterrupt or error occurs in a stage, logs and proceeds.
+    Per-stage timings are saved next to the log as <log>_metrics.json;
+    profile=True also dumps a cProfile file per stage.
+    Geocoded, validated and fixed POIs are kept as partitioned Parquet in
+    results_dir (<output_dir>/results by default).
+    compact=True keeps POIs in compact dtypes; memory_report=True adds the
+    in-memory size of each stage's output to the stage metrics.
+    With stage_checkpoints, batch stage outputs are checkpointed in
+    <report_dir>/<run id>_stages (removed after a successful run unless
+    keep_stages); resume (a run id or stage directory) continues in that
+    run's stage directory instead.
+    use_geocode_cache keeps per-address geocode results in .cache/geocode.
+    filter_streets loads only the streets the POIs reference by name or
+    link_id or that lie around them (batch runs; see street_filter_for).
     """
 
     # Prepare timestamped log/output paths
@@ -40,93 +80,294 @@ def main(
     pdf_path = os.path.join(report_dir, f"report_ex_{date_str}_{hour_str}.pdf")
     html_path = os.path.join(report_dir, f"report_ex_{date_str}_{hour_str}.html")
 
+    run_id = f"main_{date_str}_{hour_str}"
+    results_dir = results_dir or os.path.join(output_dir, "results")
+    stage_dir = stage_dir_for(report_dir, run_id) if stage_checkpoints and not stream else None
+    if resume:
+        stage_dir = find_stage_dir(resume, output_dir, manifest)
+        if stage_dir is None:
+            logger.error(f"Nothing to resume: no stage checkpoints found for {resume}")
+            return
+        logger.info(f"Resuming from stage checkpoints in {stage_dir}")
+
+    metrics = StageMetrics(profile_dir=os.path.join(logs_path, f"profile_{date_str}_{hour_str}") if profile else None,
+                           memory=memory_report)
+    started = now.strftime("%Y-%m-%d %H:%M:%S")
+    summary = None
+    try:
+        if stream and not test_file:
+            if filter_streets:
+                logger.warning("--filter_streets is ignored when streaming: streets are loaded before any POI is read")
+            summary = run_streaming_pipeline(pois_dir, streets_dir, report_dir, f"{date_str}_{hour_str}", logger,
+                                   chunk_size=chunk_size, limit=1001 if test_mode else None, fast=fast_load,
+                                   geocode_workers=geocode_workers, rebuild_street_cache=rebuild_street_cache,
+                                   pdf_path=pdf_path, html_path=html_path, metrics=metrics,
+                                   results_dir=results_dir, run_id=run_id, run_date=date_str, compact=compact,
+                                   use_geocode_cache=use_geocode_cache)
+        else:
+            summary = run_batch_pipeline(pois_dir, streets_dir, report_dir, logger, test_mode=test_mode, test_file=test_file,
+                               fast=fast_load, rebuild_street_cache=rebuild_street_cache, incremental=incremental,
+                               state_dir=state_dir, geocode_workers=geocode_workers,
+                               checkpoint_dir=checkpoint_dir, chunk_size=chunk_size,
+                               pdf_path=pdf_path, html_path=html_path, metrics=metrics,
+                               results_dir=results_dir, run_id=run_id, run_date=date_str, compact=compact,
+                               stage_dir=stage_dir, use_geocode_cache=use_geocode_cache,
+                               filter_streets=filter_streets)
+        if summary and stage_dir and not keep_stages:
+            shutil.rmtree(stage_dir, ignore_errors=True)
+    finally:
+        metrics_file = metrics.write_json(metrics_path_for(log_file))
+        logger.info(f"Stage metrics saved in {metrics_file}")
+        record_run({
+            "run_id": run_id,
+            "source": "main",
+            "started": started,
+            "finished": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "status": "done" if summary else "failed",
+            "pois_dir": pois_dir,
+            "streets_dir": streets_dir,
+            "params": {"test_mode": test_mode, "test_file": test_file, "stream": stream, "incremental": incremental,
+                       "chunk_size": chunk_size, "geocode_workers": geocode_workers, "fast_load": fast_load,
+                       "results_dir": results_dir, "compact": compact, "stage_dir": stage_dir, "resume": resume,
+                       "filter_streets": filter_streets},
+            "total_pois": (summary or {}).get("total_pois"),
+            "violation_counts": (summary or {}).get("violation_counts"),
+            "metrics": metrics.as_list(),
+            "log_path": log_file,
+            "html_path": html_path if os.path.exists(html_path) else None,
+            "pdf_path": pdf_path if summary else None,
+        }, manifest)
+
+def _resume_hint(stage_dir, checkpoint_dir=None):
+    hints = []
+    if stage_dir:
+        hints.append(f"finished stages are kept in {stage_dir}, rerun with --resume {stage_dir} to continue")
+    if checkpoint_dir:
+        hints.append(f"finished chunks are kept in {checkpoint_dir}")
+    return f" Stopping: {'; '.join(hints)}." if hints else " Stopping."
+
+def run_batch_pipeline(pois_dir, streets_dir, report_dir, logger, test_mode=False, test_file=None, fast=False,
+                       rebuild_street_cache=False, incremental=False, state_dir=DEFAULT_STATE_DIR,
+                       geocode_workers=1, pdf_path=None, html_path=None, metrics=None,
+                       checkpoint_dir=None, chunk_size=DEFAULT_CHUNK_SIZE, results_dir=None, run_id=None,
+                       run_date=None, compact=False, stage_dir=None, use_geocode_cache=True, filter_streets=False):
+    """
+    Batch variant of the pipeline: every stage runs over the full POI set.
+    compact=True keeps the POIs in compact dtypes (see compact_dtypes).
+    With stage_dir every stage's output is checkpointed there (see
+    src/pipeline/stages.py); stages whose checkpoint matches the current
+    inputs, parameters and code are reloaded instead of rerun. A failed or
+    interrupted stage stops the run (later stages never see its missing
+    output); rerun with --resume to continue from the last finished stage.
+    With results_dir the stage outputs are stored as partitioned Parquet.
+    use_geocode_cache reuses geocode results per address across runs of
+    the same street data (see src/preprocessing/geocode_cache.py).
+    filter_streets keeps only the streets the POIs need (see
+    street_filter_for); without POIs at hand (a resumed run past the
+    POI stages) the full network is loaded.
+    Returns the report summary, or None when no report was produced.
+    """
     pois_df = None
+    geocode_cache = None
     streets_gdf = None
     pois_geo = None
     validation_results = None
     pois_fixed = None
 
-    # 1. Load POIs
-    try:
+    mode = "incremental" if incremental else "chunked" if checkpoint_dir else "batch"
+    checkpoints = None
+    if stage_dir:
+        keys = stage_keys(pois_dir, streets_dir, test_file=test_file if test_mode else None, fast=fast,
+                          compact=compact, test_mode=test_mode, mode=mode, chunk_size=chunk_size,
+                          filter_streets=filter_streets)
+        checkpoints = StageCheckpoints(stage_dir, keys, logger)
+
+    def run_stage(name, compute, rows=None, save=True):
+        """
+        Output of a stage: its checkpoint when still valid, else computed
+        (timed as the stage) and checkpointed unless save=False.
+        """
+        current["stage"] = name
+        if checkpoints and checkpoints.completed(name):
+            with track(metrics, f"{name}_checkpoint"):
+                return checkpoints.load(name)
+        with track(metrics, name, rows=rows) as stage:
+            output = compute()
+            if rows is None:
+                stage["rows"] = len(output)
+            stage["output"] = output
+        if checkpoints and save:
+            checkpoints.save(name, output)
+        return output
+
+    def load_raw_pois():
         if test_mode and test_file:
             logger.info(f"Loading test POIs from {test_file}")
             import pandas as pd
-            pois_df = pd.read_csv(test_file)
+            return pd.read_csv(test_file)
+        logger.info(f"Loading POIs from {pois_dir}")
+        return load_pois(pois_dir, logger, fast=fast)
+
+    # Stages after the POIs are prepared: geocode -> validate -> fix, or one
+    # combined stage in incremental / checkpointed mode. Everything before
+    # the first one without a valid checkpoint is reloaded, not recomputed.
+    tail = ["process"] if mode != "batch" else ["geocode", "validate", "fix"]
+    first = next((i for i, name in enumerate(tail) if not (checkpoints and checkpoints.completed(name))), len(tail))
+    current = {"stage": None}
+    try:
+        if first == 0:
+            # 1-2. Load and normalize POIs
+            if checkpoints and checkpoints.completed("normalize"):
+                pois_df = run_stage("normalize", None)
+            else:
+                # Raw POIs are cheap to reload, only the normalized ones are kept
+                pois_df = run_stage("load_pois", load_raw_pois, save=False)
+                logger.info(f"Raw POIs loaded: {len(pois_df)} records")
+                pois_df = run_stage("normalize", lambda: normalize_pois(pois_df, logger, compact=compact),
+                                    rows=len(pois_df))
+            logger.info(f"Normalized POIs: {len(pois_df)}")
+
+        # 3. (Optional) Limit POIs for test
+        if pois_df is not None and test_mode and not test_file:
+            logger.info("Test mode enabled: Limiting to first 1001 POIs")
+            pois_df = pois_df.iloc[:1001].copy()
+
+        if first < len(tail):
+            # 4. Load and normalize streets (only those the POIs need with filter_streets)
+            current["stage"] = "load_streets"
+            street_filter = street_filter_for(pois_df) if filter_streets and pois_df is not None else None
+            logger.info(f"Loading streets from {streets_dir}" + (" (filtered to the POIs)" if street_filter else ""))
+            with track(metrics, "load_streets") as stage:
+                streets_gdf, street_key = load_normalized_streets(streets_dir, logger, fast=fast, rebuild=rebuild_street_cache,
+                                                                  street_filter=street_filter)
+                stage["rows"] = len(streets_gdf)
+                stage["output"] = streets_gdf
+            logger.info(f"Normalized street segments: {len(streets_gdf)}")
+            if use_geocode_cache:
+                geocode_cache = open_geocode_cache(streets_dir, street_data_key(streets_dir), logger=logger)
+                cache_before = geocode_cache.stats()
+
+        if mode == "incremental":
+            # 5-7. Incremental mode: only changed POIs go through geocode/validate/fix
+            pois_geo, validation_results, pois_fixed = run_stage("process", lambda: run_incremental(
+                pois_df, streets_gdf, state_dir, logger, geocode_workers=geocode_workers, metrics=metrics,
+                geocode_cache=geocode_cache),
+                rows=len(pois_df) if pois_df is not None else None)
+        elif mode == "chunked":
+            # 5-7. Checkpointed mode: chunks of chunk_size, finished chunks survive an interruption
+            pois_geo, validation_results, pois_fixed = run_stage("process", lambda: run_chunked(
+                pois_df, streets_gdf, logger, chunk_size=chunk_size, checkpoint_dir=checkpoint_dir,
+                geocode_workers=geocode_workers, metrics=metrics, geocode_cache=geocode_cache),
+                rows=len(pois_df) if pois_df is not None else None)
         else:
-            logger.info(f"Loading POIs from {pois_dir}")
-            pois_df = load_pois(pois_dir)
-        logger.info(f"Raw POIs loaded: {len(pois_df)} records")
+            # 5. Geocoding POIs
+            pois_geo = run_stage("geocode", lambda: geocode_pois(pois_df, streets_gdf, logger, workers=geocode_workers,
+                                                                 cache=geocode_cache))
+            logger.info(f"Geocoded POIs: {pois_geo.geometry.notnull().sum()} out of {len(pois_geo)}")
+            # 6. Validation
+            validation_results = run_stage("validate", lambda: validate_pois(pois_geo, streets_gdf, logger))
+            logger.info(f"Validation finished for {len(pois_geo)} POIs.")
+            # 7. Auto-fixing
+            pois_fixed = run_stage("fix", lambda: fix_pois(validation_results, pois_geo, streets_gdf, logger))
+        if mode != "batch":
+            logger.info(f"Geocoded POIs: {pois_geo.geometry.notnull().sum()} out of {len(pois_geo)}")
+        logger.info(f"Auto-fix applied. Final POIs: {len(pois_fixed)}")
+        if geocode_cache:
+            logger.info(f"{cache_summary(cache_before, geocode_cache.stats())} (whole run)")
+    except KeyboardInterrupt:
+        logger.warning(f"Stage {current['stage']} interrupted by user (Ctrl+C).{_resume_hint(stage_dir, checkpoint_dir)}")
+        return None
     except Exception as e:
-        logger.exception("Error loading POIs.")
-        return
+        logger.exception(f"Error in stage {current['stage']}.{_resume_hint(stage_dir, checkpoint_dir)}")
+        return None
 
-    # 2. Normalize POIs
+    # 8. Persist the stage outputs for downstream queries (see src/storage)
+    if results_dir:
+        try:
+            with track(metrics, "store", rows=len(pois_fixed) if pois_fixed is not None else 0):
+                write_results(results_dir, run_id, run_date,
+                              {"pois_geo": pois_geo, "validation": validation_results, "pois_fixed": pois_fixed},
+                              source_files=source_files_of(pois_geo), logger=logger)
+        except Exception as e:
+            logger.exception("Error storing results.")
+
+    # 9. Generate reports (PDF, HTML, etc)
     try:
-        pois_df = normalize_pois(pois_df, logger)
-        logger.info(f"Normalized POIs: {len(pois_df)}")
+        # Your generate_report can handle pdf_path and/or html_path
+        with track(metrics, "report", rows=len(validation_results)):
+            generate_report(
+                pois_fixed,
+                validation_results,
+                output_dir=report_dir,
+                logger=logger,
+                pdf_path=pdf_path,     # If implemented in your function
+                html_path=html_path,   # If implemented in your function
+                metrics=metrics.as_list() if metrics else None
+            )
+        logger.info(f"Detailed reports generated: {pdf_path}, {html_path}")
     except Exception as e:
-        logger.exception("Error normalizing POIs.")
-        return
+        logger.exception("Error during report generation.")
+        return None
+
+    logger.info("Pipeline finished.")
+    return {"total_pois": len(pois_fixed), "violation_counts": violation_counts(validation_results)}
 
-    # 3. Load and normalize streets
+def run_streaming_pipeline(pois_dir, streets_dir, report_dir, stamp, logger, chunk_size, limit=None, fast=False,
+                           geocode_workers=1, rebuild_street_cache=False, pdf_path=None, html_path=None, metrics=None,
+                           results_dir=None, run_id=None, run_date=None, compact=False, use_geocode_cache=True):
+    """
+    Streaming variant of the pipeline: streets stay resident, POIs flow
+    through every stage chunk by chunk and only aggregates reach the report.
+    Returns the report summary, or None when no report was produced.
+    """
     try:
         logger.info(f"Loading streets from {streets_dir}")
-        streets_gdf = load_streets(streets_dir)
-        logger.info(f"Raw street segments loaded: {len(streets_gdf)}")
-        streets_gdf = normalize_streets(streets_gdf, logger)
+        with track(metrics, "load_streets") as stage:
+            streets_gdf, street_key = load_normalized_streets(streets_dir, logger, fast=fast, rebuild=rebuild_street_cache)
+            stage["rows"] = len(streets_gdf)
+            stage["output"] = streets_gdf
         logger.info(f"Normalized street segments: {len(streets_gdf)}")
     except Exception as e:
         logger.exception("Error loading or normalizing streets.")
         return
 
-    # 4. (Optional) Limit POIs for test
-    if test_mode and not test_file:
-        logger.info("Test mode enabled: Limiting to first 1001 POIs")
-        pois_df = pois_df.iloc[:1001].copy()
-
-    # 5. Geocoding POIs
-    try:
-        pois_geo = geocode_pois(pois_df, streets_gdf, logger)
-        logger.info(f"Geocoded POIs: {pois_geo.geometry.notnull().sum()} out of {len(pois_geo)}")
-    except KeyboardInterrupt:
-        logger.warning("Geocoding interrupted by user (Ctrl+C). Proceeding to validation stage.")
-    except Exception as e:
-        logger.exception("Error during geocoding POIs.")
-
-    # 6. Validation
-    try:
-        validation_results = validate_pois(pois_geo, streets_gdf, logger)
-        logger.info(f"Validation finished for {len(pois_geo)} POIs.")
-    except KeyboardInterrupt:
-        logger.warning("Validation interrupted by user (Ctrl+C). Proceeding to fixing stage.")
-    except Exception as e:
-        logger.exception("Error during validation.")
-
-    # 7. Auto-fixing
+    geocode_cache = open_geocode_cache(streets_dir, street_data_key(streets_dir), logger=logger) if use_geocode_cache else None
     try:
-        pois_fixed = fix_pois(validation_results, pois_geo, streets_gdf, logger)
-        logger.info(f"Auto-fix applied. Final POIs: {len(pois_fixed)}")
+        logger.info(f"Streaming POIs from {pois_dir} in chunks of {chunk_size}")
+        result = run_streaming(pois_dir, streets_gdf, report_dir, stamp, logger, chunk_size=chunk_size,
+                               limit=limit, fast=fast, geocode_workers=geocode_workers, metrics=metrics,
+                               results_dir=results_dir, run_id=run_id, run_date=run_date, compact=compact,
+                               geocode_cache=geocode_cache)
+        logger.info(f"Results written to {result['validation_path']}, {result['pois_fixed_path']}")
+        if geocode_cache:
+            logger.info(f"{cache_summary({}, geocode_cache.stats())} (whole run)")
     except KeyboardInterrupt:
-        logger.warning("Fixing interrupted by user (Ctrl+C). Proceeding to report stage.")
+        logger.warning("Streaming interrupted by user (Ctrl+C).")
+        return
     except Exception as e:
-        logger.exception("Error during auto-fixing.")
+        logger.exception("Error during streaming pipeline.")
+        return
 
-    # 8. Generate reports (PDF, HTML, etc)
     try:
-        # Your generate_report can handle pdf_path and/or html_path
-        generate_report(
-            pois_fixed,
-            validation_results,
-            output_dir=report_dir,
-            logger=logger,
-            pdf_path=pdf_path,     # If implemented in your function
-            html_path=html_path    # If implemented in your function
-        )
+        with track(metrics, "report"):
+            # Full tables are paged straight from the CSVs the chunks were appended to
+            generate_report(
+                result["pois_fixed_path"],
+                result["validation_path"],
+                output_dir=report_dir,
+                logger=logger,
+                pdf_path=pdf_path,
+                html_path=html_path,
+                summary=result["summary"],
+                metrics=metrics.as_list() if metrics else None,
+            )
         logger.info(f"Detailed reports generated: {pdf_path}, {html_path}")
     except Exception as e:
         logger.exception("Error during report generation.")
+        return None
 
     logger.info("Pipeline finished.")
+    return result["summary"]
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="POI Data Processing Pipeline")
@@ -136,6 +377,24 @@ if __name__ == "__main__":
     parser.add_argument("--test_mode", action="store_true", help="Enable test mode (limits to first 1001 POIs unless test_file is specified).")
     parser.add_argument("--test_file", type=str, default=None, help="Optional: Path to scenario/test CSV for test mode.")
     parser.add_argument("--base_logdir", type=str, default="logs", help="Base name for log directory.")
+    parser.add_argument("--fast_load", action="store_true", help="Read input files concurrently with pyarrow/pyogrio, only the columns the pipeline uses.")
+    parser.add_argument("--rebuild_street_cache", action="store_true", help="Ignore the cached normalized street network and rebuild it.")
+    parser.add_argument("--stream", action="store_true", help="Process POIs in chunks with memory bounded by --chunk_size.")
+    parser.add_argument("--chunk_size", type=int, default=100000, help="POI rows per chunk in streaming and checkpointed modes.")
+    parser.add_argument("--checkpoint_dir", type=str, default=None, help="Geocode/validate/fix in chunks, keeping finished chunks here so an interrupted run resumes.")
+    parser.add_argument("--incremental", action="store_true", help="Only reprocess POIs whose rows or referenced streets changed since the last run.")
+    parser.add_argument("--state_dir", type=str, default=DEFAULT_STATE_DIR, help="Where incremental mode keeps the previous run's results.")
+    parser.add_argument("--geocode_workers", type=int, default=1, help="Processes used for geocoding (1 = single process).")
+    parser.add_argument("--results_dir", type=str, default=None, help="Where geocoded/validated/fixed POIs are stored as partitioned Parquet (default <output_dir>/results).")
+    parser.add_argument("--manifest", type=str, default=DEFAULT_MANIFEST, help="SQLite run manifest the run is recorded in.")
+    parser.add_argument("--compact", action="store_true", help="Keep POIs in compact dtypes (categoricals, downcast integers).")
+    parser.add_argument("--memory_report", action="store_true", help="Record the in-memory size of each stage's output in the stage metrics.")
+    parser.add_argument("--resume", type=str, default=None, help="Run id or stage directory of an earlier run to continue from its last finished stage.")
+    parser.add_argument("--stage_checkpoints", action="store_true", help="Checkpoint stage outputs so a failed run can be continued with --resume.")
+    parser.add_argument("--keep_stages", action="store_true", help="Keep the stage checkpoints after a successful run.")
+    parser.add_argument("--no_geocode_cache", action="store_true", help="Geocode every address afresh instead of reusing cached results.")
+    parser.add_argument("--filter_streets", action="store_true", help="Load only the streets the POIs reference (st_name, link_id) or lie around (batch runs).")
+    parser.add_argument("--profile", action="store_true", help="Dump a cProfile file per stage next to the log.")
 
     args = parser.parse_args()
 
@@ -146,4 +405,22 @@ if __name__ == "__main__":
         test_mode=args.test_mode,
         test_file=args.test_file,
         base_logdir=args.base_logdir,
+        geocode_workers=args.geocode_workers,
+        fast_load=args.fast_load,
+        rebuild_street_cache=args.rebuild_street_cache,
+        stream=args.stream,
+        chunk_size=args.chunk_size,
+        incremental=args.incremental,
+        state_dir=args.state_dir,
+        checkpoint_dir=args.checkpoint_dir,
+        manifest=args.manifest,
+        results_dir=args.results_dir,
+        compact=args.compact,
+        memory_report=args.memory_report,
+        resume=args.resume,
+        stage_checkpoints=args.stage_checkpoints,
+        keep_stages=args.keep_stages,
+        use_geocode_cache=not args.no_geocode_cache,
+        filter_streets=args.filter_streets,
+        profile=args.profile,
     )
@@ -0,0 +1,73 @@
+# src/analysis/pdf.py
+
+import os
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+MARGIN = 40
+FONTS = {"regular": "Helvetica", "bold": "Helvetica-Bold", "mono": "Courier"}
+
+def _escape(text):
+    text = str(text).encode("cp1252", "replace").decode("cp1252")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)").replace("\r", "").replace("\n", " ")
+
+def _layout(lines):
+    """
+    Splits (text, font, size) lines into pages of positioned lines.
+    """
+    pages, page, y = [], [], PAGE_HEIGHT - MARGIN
+    for text, font, size in lines:
+        leading = size * 1.35
+        if y - leading < MARGIN and page:
+            pages.append(page)
+            page, y = [], PAGE_HEIGHT - MARGIN
+        y -= leading
+        if text:
+            page.append((text, font, size, y))
+    pages.append(page)
+    return pages
+
+def write_pdf(path, lines):
+    """
+    Writes a plain text PDF, flowing `lines` over as many A4 pages as needed.
+    Each line is a string or a (text, font, size) tuple, font being one of
+    "regular", "bold" or "mono"; an empty string adds vertical space.
+    Text outside WinAnsi (cp1252) is replaced by '?'.
+    """
+    lines = [(line, "regular", 10) if isinstance(line, str) else line for line in lines]
+    pages = _layout(lines)
+    font_ids = {name: 3 + i for i, name in enumerate(FONTS)}
+    first_page = 3 + len(FONTS)
+
+    objects = {1: "<< /Type /Catalog /Pages 2 0 R >>"}
+    kids = " ".join(f"{first_page + 2 * i} 0 R" for i in range(len(pages)))
+    objects[2] = f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>"
+    for name, obj_id in font_ids.items():
+        objects[obj_id] = f"<< /Type /Font /Subtype /Type1 /BaseFont /{FONTS[name]} /Encoding /WinAnsiEncoding >>"
+    resources = " ".join(f"/F{obj_id} {obj_id} 0 R" for obj_id in font_ids.values())
+    for i, page in enumerate(pages):
+        page_id, content_id = first_page + 2 * i, first_page + 2 * i + 1
+        stream = "\n".join(
+            f"BT /F{font_ids[font]} {size} Tf {MARGIN} {y:.1f} Td ({_escape(text)}) Tj ET"
+            for text, font, size, y in page
+        ).encode("cp1252")
+        objects[page_id] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                            f"/Resources << /Font << {resources} >> >> /Contents {content_id} 0 R >>")
+        objects[content_id] = b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = {}
+        for obj_id in sorted(objects):
+            offsets[obj_id] = f.tell()
+            body = objects[obj_id]
+            f.write(f"{obj_id} 0 obj\n".encode("latin-1"))
+            f.write(body if isinstance(body, bytes) else body.encode("latin-1"))
+            f.write(b"\nendobj\n")
+        xref = f.tell()
+        f.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1"))
+        for obj_id in sorted(objects):
+            f.write(f"{offsets[obj_id]:010d} 00000 n \n".encode("latin-1"))
+        f.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1"))
+    os.replace(tmp_path, path)
+    return path
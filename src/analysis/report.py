@@ -1,67 +1,291 @@
 # src/analysis/report.py
+import os
+import threading
+from collections import Counter
+from html import escape
 import pandas as pd
+import geopandas as gpd
+import shapely
 from datetime import datetime
+from .pdf import write_pdf
+from ..validation import validator
 
-def generate_report(pois_fixed, validation_results, output_dir, logger=None, html_path=None, **kwargs):
-    """
-    Generates a Bootstrap-styled HTML report for the POI pipeline.
-    """
-    now = datetime.now()
-    date_str = now.strftime("%Y-%m-%d %H:%M:%S")
-    summary = validation_results["violation_code"].value_counts().to_dict()
+# Rows per page of the full tables, rows in the inline samples and in the PDF
+PAGE_ROWS = 5000
+SAMPLE_ROWS = 10
+PDF_ROWS = 500
+TABLE_CLASSES = "table table-bordered table-sm"
 
-    html = f"""
-    <!DOCTYPE html>
+# How geocode_pois located the POIs (geo_source), as shown in the report
+GEO_SOURCES = {"address": "Address match", "nearest": "Nearest segment (own coordinates)",
+               "not located": "Not located"}
+
+# PDFs still being rendered in the background (finished ones are pruned
+# whenever a new one starts)
+_pdf_threads = []
+_pdf_lock = threading.Lock()
+
+def _page_head(title):
+    return f"""<!DOCTYPE html>
     <html lang="en">
     <head>
       <meta charset="UTF-8">
-      <title>POI Pipeline Report</title>
+      <title>{escape(title)}</title>
       <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css" rel="stylesheet">
       <style>
         body {{ background: #f9fafb; }}
         .container {{ margin-top: 40px; }}
         .table-responsive {{ font-size: 0.98rem; }}
         .card {{ margin-bottom: 24px; }}
+        .pages a {{ margin-right: 8px; }}
       </style>
     </head>
     <body>
     <div class="container">
+    """
+
+_PAGE_TAIL = """
+    </div>
+    </body>
+    </html>
+    """
+
+def _card(title, body):
+    return f"""
       <div class="card shadow-sm">
         <div class="card-body">
-          <h2 class="card-title text-primary mb-3">POI Pipeline Report</h2>
-          <div class="mb-2 text-muted">Generated: {date_str}</div>
-          <div><b>Total POIs Processed:</b> {len(pois_fixed)}</div>
-        </div>
-      </div>
-      <div class="card shadow-sm">
-        <div class="card-body">
-          <h4 class="card-title">Validation Summary</h4>
-          <ul>
-            {"".join([f"<li><b>{k}:</b> {v}</li>" for k, v in summary.items()])}
-          </ul>
-        </div>
-      </div>
-      <div class="card shadow-sm">
-        <div class="card-body">
-          <h4 class="card-title">Sample of Corrected POIs</h4>
-          <div class="table-responsive">
-            {pois_fixed.head(10).to_html(classes="table table-bordered table-sm", index=False, border=0)}
-          </div>
+          <h4 class="card-title">{title}</h4>
+          {body}
         </div>
-      </div>
+      </div>"""
+
+def _cells(values):
+    """
+    HTML-escaped text of a column, empty for missing values.
+    """
+    if isinstance(values.dtype, gpd.array.GeometryDtype):
+        text = pd.Series(shapely.to_wkt(values.to_numpy(), rounding_precision=-1), dtype=object)
+    else:
+        text = pd.Series(values.to_numpy(dtype=object)).astype(str)
+    text = text.where(values.notna().to_numpy(), "")
+    for char, entity in (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;")):
+        text = text.str.replace(char, entity, regex=False)
+    return text
+
+def _table(df):
+    """
+    Renders a frame as a Bootstrap table, column-wise (DataFrame.to_html
+    formats cell by cell and is ~10x slower on full-size pages).
+    """
+    head = "".join(f"<th>{escape(str(col))}</th>" for col in df.columns)
+    rows = pd.Series("<tr>", index=range(len(df)), dtype=object)
+    for col in df.columns:
+        rows = rows + "<td>" + _cells(df[col]) + "</td>"
+    body = "\n".join(rows + "</tr>")
+    return (f'<div class="table-responsive"><table class="{TABLE_CLASSES}"><thead><tr>{head}</tr></thead>'
+            f'<tbody>\n{body}\n</tbody></table></div>')
+
+def _iter_frames(source, rows):
+    """
+    Yields consecutive frames of `rows` rows from a DataFrame or a CSV path.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        if os.path.exists(source) and os.path.getsize(source):
+            yield from pd.read_csv(source, chunksize=rows)
+        return
+    for start in range(0, len(source), rows):
+        yield source.iloc[start:start + rows]
+
+def _write_table_pages(source, name, title, files_dir, report_name, on_page=None):
+    """
+    Writes a full table as <files_dir>/<name>_<n>.html pages of PAGE_ROWS
+    rows, each linked to its neighbours and back to the report, holding one
+    page in memory at a time. on_page(frame) sees every page as it goes.
+    Returns (page file names, row count).
+    """
+    pages, rows = [], 0
+    frames = _iter_frames(source, PAGE_ROWS)
+    frame = next(frames, None)
+    while frame is not None:
+        following = next(frames, None)
+        number = len(pages) + 1
+        page_name = f"{name}_{number:05d}.html"
+        nav = [f'<a href="../{escape(report_name)}">Back to report</a>']
+        if number > 1:
+            nav.append(f'<a href="{name}_{number - 1:05d}.html">&laquo; Previous</a>')
+        if following is not None:
+            nav.append(f'<a href="{name}_{number + 1:05d}.html">Next &raquo;</a>')
+        nav_html = f'<div class="pages mb-2">{" ".join(nav)}</div>'
+        with open(os.path.join(files_dir, page_name), "w", encoding="utf-8") as f:
+            f.write(_page_head(f"{title} - page {number}"))
+            f.write(f'<h4>{escape(title)} &middot; page {number} (rows {rows + 1}-{rows + len(frame)})</h4>')
+            f.write(nav_html)
+            f.write(_table(frame))
+            f.write(nav_html)
+            f.write(_PAGE_TAIL)
+        if on_page:
+            on_page(frame)
+        pages.append(page_name)
+        rows += len(frame)
+        frame = following
+    return pages, rows
+
+def _source_counts(sources):
+    # Known sources in GEO_SOURCES order, labelled
+    ordered = [k for k in GEO_SOURCES if k in sources] + [k for k in sources if k not in GEO_SOURCES]
+    return {GEO_SOURCES.get(k, k): sources[k] for k in ordered}
+
+def _pdf_lines(date_str, total_pois, violation_counts, metrics, validation_rows, sources=None):
+    lines = [("POI Pipeline Report", "bold", 16), f"Generated: {date_str}", f"Total POIs Processed: {total_pois}", "",
+             ("Validation Summary", "bold", 12)]
+    lines += [f"{code}: {count}" for code, count in violation_counts.items()]
+    if sources:
+        lines += ["", ("Geocoding", "bold", 12)]
+        lines += [f"{label}: {count}" for label, count in _source_counts(sources).items()]
+    if metrics:
+        lines += ["", ("Stage Timings", "bold", 12),
+                  (f"{'Stage':<16}{'Wall (s)':>10}{'CPU (s)':>10}{'Rows':>12}{'Rows/s':>14}{'Peak (MB)':>10}"
+                   f"{'Frame (MB)':>12}", "mono", 8)]
+        for m in metrics:
+            lines.append((f"{m['stage']:<16}{m['wall_s']:>10}{m['cpu_s']:>10}{m.get('rows') or '':>12}"
+                          f"{m.get('rows_per_s') or '':>14}{m.get('peak_rss_mb') or '':>10}"
+                          f"{m.get('frame_mb') or '':>12}", "mono", 8))
+    if validation_rows is not None and len(validation_rows):
+        lines += ["", (f"First {len(validation_rows)} validation results (full tables in the HTML report)", "bold", 12),
+                  (f"{'poi_id':>12}  {'violation_code':<18}violation_detail", "mono", 7)]
+        for row in validation_rows.itertuples(index=False):
+            detail = str(getattr(row, "violation_detail", ""))[:90]
+            lines.append((f"{str(row.poi_id):>12}  {str(row.violation_code):<18}{detail}", "mono", 7))
+    return lines
+
+def _render_pdf(pdf_path, lines, logger=None):
+    try:
+        write_pdf(pdf_path, lines)
+        if logger:
+            logger.info(f"PDF report saved at {pdf_path}")
+    except Exception as e:
+        if logger:
+            logger.error(f"PDF report failed: {e}")
+
+def wait_for_pdfs(timeout=None):
+    """
+    Blocks until the PDFs started by generate_report are written.
+    """
+    while True:
+        with _pdf_lock:
+            if not _pdf_threads:
+                return
+            thread = _pdf_threads.pop()
+        thread.join(timeout)
+
+def generate_report(pois_fixed, validation_results, output_dir, logger=None, html_path=None, summary=None,
+                    metrics=None, pdf_path=None, **kwargs):
+    """
+    Generates a Bootstrap-styled HTML report for the POI pipeline.
+
+    `pois_fixed` and `validation_results` are DataFrames or paths to CSVs
+    (as written by the streaming mode). With html_path the full tables are
+    written page by page (PAGE_ROWS rows each) into <report>_files/ next to
+    the report, which itself only holds the summary, page links and small
+    samples, so memory and page size stay bounded for any number of POIs.
+    Totals and violation counts are gathered in the same pass, unless
+    `summary` ({"total_pois", "violation_counts"}) is given.
+    `metrics` (StageMetrics.as_list()) adds a per-stage timing table.
+    POIs with a `geo_source` column are counted by how they were located,
+    so spatial fallbacks are not reported as address matches.
+    With pdf_path a PDF (summary, timings, first PDF_ROWS validation rows)
+    is rendered in a background thread; see wait_for_pdfs().
+    Returns the HTML of the report page.
+    """
+    now = datetime.now()
+    date_str = now.strftime("%Y-%m-%d %H:%M:%S")
+    counts, sources, totals, samples = Counter(), Counter(), {"pois": 0}, {}
+
+    def count_violations(frame):
+        counts.update(validator.violation_counts(frame))
+
+    def count_sources(frame):
+        if "geo_source" in frame.columns:
+            sources.update(frame["geo_source"].fillna("not located").tolist())
+
+    def keep_sample(name, frame, rows):
+        if name not in samples:
+            samples[name] = frame.head(rows)
+        elif len(samples[name]) < rows:
+            samples[name] = pd.concat([samples[name], frame.head(rows - len(samples[name]))])
+
+    table_links = {}
+    if html_path:
+        report_name = os.path.basename(html_path)
+        files_name = f"{os.path.splitext(report_name)[0]}_files"
+        files_dir = os.path.join(os.path.dirname(html_path), files_name)
+        os.makedirs(files_dir, exist_ok=True)
+
+        def on_validation_page(frame):
+            count_violations(frame)
+            keep_sample("validation", frame, PDF_ROWS)
+
+        def on_fixed_page(frame):
+            count_sources(frame)
+            keep_sample("pois_fixed", frame, SAMPLE_ROWS)
+
+        for name, title, source, on_page in (
+            ("validation", "Validation Results", validation_results, on_validation_page),
+            ("pois_fixed", "Corrected POIs", pois_fixed, on_fixed_page),
+        ):
+            pages, rows = _write_table_pages(source, name, title, files_dir, report_name, on_page)
+            table_links[title] = (rows, [f"{files_name}/{page}" for page in pages])
+            if name == "pois_fixed":
+                totals["pois"] = rows
+    else:
+        for frame in _iter_frames(validation_results, PAGE_ROWS):
+            count_violations(frame)
+            keep_sample("validation", frame, PDF_ROWS)
+        for frame in _iter_frames(pois_fixed, PAGE_ROWS):
+            count_sources(frame)
+            keep_sample("pois_fixed", frame, SAMPLE_ROWS)
+            totals["pois"] += len(frame)
+
+    summary = summary or {"total_pois": totals["pois"], "violation_counts": dict(counts)}
+    total_pois = summary["total_pois"]
+    violation_counts = summary["violation_counts"]
+
+    parts = [_page_head("POI Pipeline Report"), f"""
       <div class="card shadow-sm">
         <div class="card-body">
-          <h4 class="card-title">Sample of Validation Results</h4>
-          <div class="table-responsive">
-            {validation_results.head(10).to_html(classes="table table-bordered table-sm", index=False, border=0)}
-          </div>
+          <h2 class="card-title text-primary mb-3">POI Pipeline Report</h2>
+          <div class="mb-2 text-muted">Generated: {date_str}</div>
+          <div><b>Total POIs Processed:</b> {total_pois}</div>
         </div>
-      </div>
-      <div class="text-center text-secondary mb-4">End of Report</div>
-    </div>
-    </body>
-    </html>
-    """
+      </div>""",
+        _card("Validation Summary", f"""<ul>
+            {"".join([f"<li><b>{k}:</b> {v}</li>" for k, v in violation_counts.items()])}
+          </ul>""")]
+    if sources:
+        parts.append(_card("Geocoding", f"""<ul>
+            {"".join([f"<li><b>{k}:</b> {v}</li>" for k, v in _source_counts(sources).items()])}
+          </ul>"""))
+    if metrics:
+        columns = ["stage", "wall_s", "cpu_s", "rows", "rows_per_s", "peak_rss_mb"]
+        titles = ["Stage", "Wall (s)", "CPU (s)", "Rows", "Rows/s", "Stage peak RSS (MB)"]
+        if any(m.get("frame_mb") is not None for m in metrics):
+            columns.append("frame_mb")
+            titles.append("Frame (MB)")
+        timings = pd.DataFrame(metrics).reindex(columns=columns)
+        timings.columns = titles
+        parts.append(_card("Stage Timings", _table(timings)))
+    if table_links:
+        body = ""
+        for title, (rows, links) in table_links.items():
+            anchors = " ".join(f'<a href="{escape(link)}" target="_self">{i}</a>' for i, link in enumerate(links, 1))
+            body += f'<div class="mb-2"><b>{title}</b> ({rows} rows, {len(links)} pages of {PAGE_ROWS}):</div>'
+            body += f'<div class="pages mb-3">{anchors or "<i>empty</i>"}</div>'
+        parts.append(_card("Full Tables", body))
+    parts.append(_card("Sample of Corrected POIs", _table(samples.get("pois_fixed", pd.DataFrame()).head(SAMPLE_ROWS))))
+    parts.append(_card("Sample of Validation Results", _table(samples.get("validation", pd.DataFrame()).head(SAMPLE_ROWS))))
+    parts.append('\n      <div class="text-center text-secondary mb-4">End of Report</div>')
+    parts.append(_PAGE_TAIL)
+    html = "".join(parts)
 
     # Save as HTML file if requested
     if html_path:
@@ -70,4 +294,14 @@ def generate_report(pois_fixed, validation_results, output_dir, logger=None, htm
         if logger:
             logger.info(f"HTML report saved at {html_path}")
 
+    if pdf_path:
+        lines = _pdf_lines(date_str, total_pois, violation_counts, metrics, samples.get("validation"), sources)
+        thread = threading.Thread(target=_render_pdf, args=(pdf_path, lines, logger), name="report-pdf")
+        thread.start()
+        with _pdf_lock:
+            _pdf_threads[:] = [t for t in _pdf_threads if t.is_alive()]
+            _pdf_threads.append(thread)
+        if logger:
+            logger.info(f"PDF report rendering in background: {pdf_path}")
+
     return html
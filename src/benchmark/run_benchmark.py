@@ -0,0 +1,155 @@
+# src/benchmark/run_benchmark.py
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import datetime
+from ..utils.logger import get_logger
+from ..utils.metrics import StageMetrics
+from ..data_loader.data_loader import load_pois, load_streets
+from ..preprocessing.normalizer import normalize_pois, normalize_streets
+from ..preprocessing.geocode import geocode_pois
+from ..validation.validator import validate_pois
+from ..validation.fixer import fix_pois
+from ..analysis.report import generate_report
+from .synthetic import write_dataset
+
+DEFAULT_DATA_DIR = os.path.join(".cache", "benchmark")
+DEFAULT_SIZES = "1k,100k"
+# Stages faster than this (seconds) are too noisy to flag as regressions
+MIN_SECONDS = 0.05
+
+def parse_size(text):
+    """
+    '1k' -> 1000, '10M' -> 10000000, '2500' -> 2500.
+    """
+    text = text.strip()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:].lower(), 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+def run_size(n_pois, data_dir, logger=None, fast=False, geocode_workers=1, seed=0):
+    """
+    Generates (or reuses) an n_pois dataset and times every pipeline stage
+    on it, plus the whole run end to end. Returns the stage list and totals.
+    """
+    pois_dir, streets_dir = write_dataset(os.path.join(data_dir, str(n_pois)), n_pois, seed, logger)
+    metrics = StageMetrics()
+    start = time.perf_counter()
+
+    with metrics.stage("load_pois") as stage:
+        pois_df = load_pois(pois_dir, fast=fast)
+        stage["rows"] = len(pois_df)
+    with metrics.stage("normalize_pois", rows=len(pois_df)):
+        pois_df = normalize_pois(pois_df)
+    with metrics.stage("load_streets") as stage:
+        streets_gdf = normalize_streets(load_streets(streets_dir, fast=fast))
+        stage["rows"] = len(streets_gdf)
+    with metrics.stage("geocode_pois", rows=len(pois_df)):
+        pois_geo = geocode_pois(pois_df, streets_gdf, workers=geocode_workers)
+    with metrics.stage("validate_pois", rows=len(pois_geo)):
+        validation_results = validate_pois(pois_geo, streets_gdf)
+    with metrics.stage("fix_pois", rows=len(validation_results)):
+        pois_fixed = fix_pois(validation_results, pois_geo, streets_gdf)
+    with metrics.stage("generate_report", rows=len(validation_results)):
+        report_dir = os.path.join(data_dir, str(n_pois), "report")
+        os.makedirs(report_dir, exist_ok=True)
+        generate_report(pois_fixed, validation_results, output_dir=report_dir,
+                        html_path=os.path.join(report_dir, "report.html"))
+
+    end_to_end = time.perf_counter() - start
+    if logger:
+        logger.info(f"{n_pois} POIs: end to end {end_to_end:.2f}s, "
+                    f"{len(validation_results)} validated, {len(pois_fixed)} after fixes")
+    return {
+        "n_pois": n_pois,
+        "stages": metrics.as_list(),
+        "end_to_end_s": round(end_to_end, 4),
+        "peak_rss_mb": metrics.peak_mb(),
+    }
+
+def _timings(size_result):
+    timings = {s["stage"]: s["wall_s"] for s in size_result["stages"]}
+    timings["end_to_end"] = size_result["end_to_end_s"]
+    return timings
+
+def compare_results(results, baseline, threshold=0.25, min_seconds=MIN_SECONDS):
+    """
+    Lists every stage (and end-to-end run) whose wall time grew by more than
+    `threshold` (0.25 = 25%) over the baseline results for the same size.
+    Sizes or stages missing from the baseline are not compared.
+    """
+    regressions = []
+    for size, current in results["sizes"].items():
+        previous = baseline.get("sizes", {}).get(size)
+        if not previous:
+            continue
+        before = _timings(previous)
+        for stage, seconds in _timings(current).items():
+            if stage not in before or max(seconds, before[stage]) < min_seconds:
+                continue
+            if seconds > before[stage] * (1 + threshold):
+                regressions.append({
+                    "size": size,
+                    "stage": stage,
+                    "baseline_s": before[stage],
+                    "current_s": seconds,
+                    "change": round(seconds / before[stage] - 1, 3) if before[stage] else None,
+                })
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthetic benchmark of every POI pipeline stage")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated POI counts, e.g. 1k,100k,1M,10M.")
+    parser.add_argument("--data_dir", default=DEFAULT_DATA_DIR, help="Where synthetic datasets are generated and reused.")
+    parser.add_argument("--output", default=os.path.join("output", "benchmark_results.json"), help="Results JSON file.")
+    parser.add_argument("--baseline", help="Results JSON of a previous run to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown per stage (0.25 = 25%%).")
+    parser.add_argument("--update_baseline", action="store_true",
+                        help="Overwrite --baseline with these results, accepting any regressions (manual re-baselining).")
+    parser.add_argument("--fast_load", action="store_true", help="Benchmark the concurrent, schema-projected loaders.")
+    parser.add_argument("--geocode_workers", type=int, default=1, help="Processes used for geocoding.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic data.")
+    args = parser.parse_args(argv)
+
+    logger = get_logger("benchmark")
+    results = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "options": {"fast_load": args.fast_load, "geocode_workers": args.geocode_workers, "seed": args.seed},
+        "sizes": {},
+    }
+    for size in args.sizes.split(","):
+        n_pois = parse_size(size)
+        logger.info(f"Benchmarking {n_pois} POIs")
+        results["sizes"][size.strip()] = run_size(n_pois, args.data_dir, logger, fast=args.fast_load,
+                                                  geocode_workers=args.geocode_workers, seed=args.seed)
+
+    regressions = []
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_results(results, json.load(f), args.threshold)
+        for r in regressions:
+            logger.error(f"Regression at {r['size']} / {r['stage']}: {r['baseline_s']}s -> {r['current_s']}s")
+    elif args.baseline:
+        logger.warning(f"Baseline {args.baseline} not found; nothing to compare")
+    results["regressions"] = regressions
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    logger.info(f"Benchmark results saved in {args.output}")
+
+    if args.baseline and args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Baseline updated: {args.baseline}" + (f" ({len(regressions)} regressions accepted)" if regressions else ""))
+        return 0
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
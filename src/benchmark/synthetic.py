@@ -0,0 +1,130 @@
+# src/benchmark/synthetic.py
+
+import os
+import json
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+
+SEGMENTS_PER_STREET = 10
+POIS_PER_SEGMENT = 20
+FILE_ROWS = 1_000_000
+# Share of POIs that carry each kind of defect the validator looks for
+DEFECT_RATES = {
+    "missing_name": 0.03,
+    "bad_percfrref": 0.03,
+    "unknown_link": 0.02,
+    "wrong_side": 0.05,
+    "unknown_street": 0.02,
+    "bad_number": 0.01,
+}
+
+def generate_streets(n_segments, seed=0):
+    """
+    Street network of straight segments laid out on a grid: every street has
+    SEGMENTS_PER_STREET consecutive segments with left (even) and right (odd)
+    address ranges of 100 numbers per segment, alternating digitizing
+    direction, random multidigit flags and unique link_ids.
+    """
+    rng = np.random.default_rng(seed)
+    seg = np.arange(n_segments)
+    street, block = np.divmod(seg, SEGMENTS_PER_STREET)
+    x0 = (street % 1000) * 0.01 + block * 0.001
+    y0 = (street // 1000) * 0.01
+    coords = np.stack([np.stack([x0, y0], axis=1), np.stack([x0 + 0.001, y0], axis=1)], axis=1)
+
+    low, high = block * 100, block * 100 + 98
+    reverse = seg % 2 == 1
+    l_ref, l_nref = np.where(reverse, high, low), np.where(reverse, low, high)
+    return gpd.GeoDataFrame({
+        "LINK_ID": 100000 + seg,
+        "ST_NAME": pd.Series(street).map("Street {}".format).to_numpy(dtype=object),
+        "L_REFADDR": l_ref,
+        "L_NREFADDR": l_nref,
+        "R_REFADDR": l_ref + 1,
+        "R_NREFADDR": l_nref + 1,
+        "MULTIDIGIT": np.where(rng.random(n_segments) < 0.2, "Y", "N"),
+    }, geometry=shapely.linestrings(coords), crs="EPSG:4326")
+
+def generate_pois(n_pois, streets, seed=0, start_id=0):
+    """
+    POIs placed on random segments of `streets` with a matching name, house
+    number, side and percfrref, then perturbed per DEFECT_RATES so every
+    validation rule fires on a predictable share of rows.
+    """
+    rng = np.random.default_rng(seed)
+    pick = rng.integers(0, len(streets), n_pois)
+    left = rng.random(n_pois) < 0.5
+    offset = rng.integers(0, 50, n_pois) * 2
+
+    l_ref = streets["L_REFADDR"].to_numpy()[pick]
+    l_nref = streets["L_NREFADDR"].to_numpy()[pick]
+    ref = np.where(left, l_ref, l_ref + 1)
+    step = np.sign(l_nref - l_ref)
+    number = ref + step * offset
+    percfrref = (offset / 98 * 100).round(1)
+
+    names = streets["ST_NAME"].to_numpy()[pick].astype(object)
+    link_ids = streets["LINK_ID"].to_numpy()[pick].copy()
+    poi_names = pd.Series(start_id + np.arange(n_pois)).map("POI {}".format).to_numpy(dtype=object)
+    sides = np.where(left, "L", "R").astype(object)
+    numbers = number.astype(str).astype(object)
+
+    def defect(kind):
+        return rng.random(n_pois) < DEFECT_RATES[kind]
+
+    poi_names[defect("missing_name")] = ""
+    bad = defect("bad_percfrref")
+    percfrref[bad] = rng.choice([-5.0, 150.0], int(bad.sum()))
+    link_ids[defect("unknown_link")] = 1
+    flip = defect("wrong_side")
+    sides[flip] = np.where(left[flip], "R", "L")
+    names[defect("unknown_street")] = "Nowhere Street"
+    numbers[defect("bad_number")] = "N/A"
+
+    return pd.DataFrame({
+        "POI_ID": start_id + np.arange(n_pois),
+        "POI_NAME": poi_names,
+        "LINK_ID": link_ids,
+        "POI_ST_SD": sides,
+        "PERCFRREF": percfrref,
+        "ST_NAME": names,
+        "ST_NUM_FUL": numbers,
+    })
+
+def write_dataset(data_dir, n_pois, seed=0, logger=None):
+    """
+    Writes a synthetic dataset with n_pois POIs to <data_dir>/POIs (CSV files
+    of at most FILE_ROWS rows) and <data_dir>/STREETS (one GeoJSON), sized at
+    POIS_PER_SEGMENT POIs per street segment. An existing dataset with the
+    same size and seed is reused. Returns (pois_dir, streets_dir).
+    """
+    pois_dir = os.path.join(data_dir, "POIs")
+    streets_dir = os.path.join(data_dir, "STREETS")
+    marker = os.path.join(data_dir, "dataset.json")
+    spec = {"n_pois": int(n_pois), "seed": int(seed)}
+    if os.path.exists(marker):
+        with open(marker, encoding="utf-8") as f:
+            if json.load(f) == spec:
+                if logger:
+                    logger.info(f"Reusing synthetic dataset in {data_dir}")
+                return pois_dir, streets_dir
+
+    for d in (pois_dir, streets_dir):
+        os.makedirs(d, exist_ok=True)
+        for f in os.listdir(d):
+            os.remove(os.path.join(d, f))
+
+    n_segments = max(SEGMENTS_PER_STREET, -(-n_pois // POIS_PER_SEGMENT))
+    streets = generate_streets(n_segments, seed)
+    streets.to_file(os.path.join(streets_dir, "streets.geojson"), driver="GeoJSON")
+    for part, start in enumerate(range(0, n_pois, FILE_ROWS)):
+        rows = min(FILE_ROWS, n_pois - start)
+        pois = generate_pois(rows, streets, seed + part + 1, start_id=start)
+        pois.to_csv(os.path.join(pois_dir, f"pois_{part:03d}.csv"), index=False)
+    with open(marker, "w", encoding="utf-8") as f:
+        json.dump(spec, f)
+    if logger:
+        logger.info(f"Synthetic dataset written to {data_dir}: {n_pois} POIs, {n_segments} street segments")
+    return pois_dir, streets_dir
@@ -1,7 +1,45 @@
 import os
 import glob
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 import geopandas as gpd
+import shapely
+
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
+try:
+    import pyogrio
+except ImportError:
+    pyogrio = None
+
+# Columns the pipeline actually reads, with their explicit dtypes
+POI_SCHEMA = {
+    "poi_id": "Int64",
+    "poi_name": "string",
+    "link_id": "Int64",
+    "poi_st_sd": "string",
+    "percfrref": "float64",
+    "st_name": "string",
+    "st_num_ful": "string",
+}
+STREET_SCHEMA = {
+    "link_id": "Int64",
+    "st_name": "string",
+    "l_refaddr": "float64",
+    "l_nrefaddr": "float64",
+    "r_refaddr": "float64",
+    "r_nrefaddr": "float64",
+    "multidigit": "string",
+}
+# Degrees (EPSG:4326) the POI bounding box is grown by when filtering streets
+STREET_BBOX_MARGIN = 0.01
+COORD_NAMES = ("latitud", "latitude", "lat", "y", "longitud", "longitude", "lon", "lng", "x")
 
 def find_coord_columns(df: pd.DataFrame):
     """
@@ -11,48 +49,167 @@ def find_coord_columns(df: pd.DataFrame):
     lon_candidates = [c for c in df.columns if c.lower() in ("longitud", "longitude", "lon", "lng", "x")]
     return lat_candidates[0] if lat_candidates else None, lon_candidates[0] if lon_candidates else None
 
-def load_pois(poi_dir, logger=None):
+def _column_key(name):
+    # Column names as normalize_pois / normalize_streets standardize them
+    return name.strip().lower().replace(" ", "_")
+
+def _project(available, schema, extra=()):
     """
-    Loads all POI CSVs and concatenates them into a DataFrame.
-    If there is a lat/lon, it creates a GeoDataFrame; if not, it returns a regular DataFrame.
+    Maps the wanted (standardized) columns to the file's actual column names.
+    Returns (columns to read, dtypes keyed by actual name).
     """
-    files = glob.glob(os.path.join(poi_dir, "*.csv"))
-    dfs = []
-    for f in files:
+    wanted = set(schema) | set(extra)
+    columns = [c for c in available if _column_key(c) in wanted]
+    dtypes = {c: schema[_column_key(c)] for c in columns if _column_key(c) in schema}
+    return columns, dtypes
+
+def _read_poi_csv_fast(f, logger=None):
+    header = pd.read_csv(f, nrows=0).columns
+    columns, dtypes = _project(header, POI_SCHEMA, COORD_NAMES)
+    try:
+        return pd.read_csv(f, usecols=columns, dtype=dtypes, engine=CSV_ENGINE)
+    except (ValueError, TypeError) as e:
+        # Values that don't fit the schema (e.g. a text percfrref): keep the file, infer dtypes
+        if logger:
+            logger.warning(f"Schema mismatch in {f} ({e}); reading with inferred dtypes")
+        return pd.read_csv(f, usecols=columns, engine=CSV_ENGINE)
+
+def _load_files(files, reader, workers, logger=None, label="File"):
+    """
+    Reads files with `reader`, concurrently when workers > 1, logging per-file timings.
+    Returns the loaded frames in file order, skipping files that failed.
+    """
+    def timed(f):
+        start = time.perf_counter()
         try:
-            df = pd.read_csv(f)
-            if logger:
-                logger.info(f"POI CSV loadind: {f}, filas: {len(df)}")
-            df['source_file'] = os.path.basename(f)
-            dfs.append(df)
+            df = reader(f)
         except Exception as e:
             if logger:
-                logger.error(f"Error cargando {f}: {e}")
+                logger.error(f"Error loading {f}: {e}")
+            return None
+        if logger:
+            logger.info(f"{label} loaded: {f}, rows: {len(df)}, {time.perf_counter() - start:.2f}s")
+        return df
+
+    if workers and workers > 1 and len(files) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            frames = list(pool.map(timed, files))
+    else:
+        frames = [timed(f) for f in files]
+    return [df for df in frames if df is not None]
+
+def load_pois(poi_dir, logger=None, fast=False, workers=None):
+    """
+    Loads all POI CSVs and concatenates them into a DataFrame.
+    If there is a lat/lon, it creates a GeoDataFrame; if not, it returns a regular DataFrame.
+
+    fast=True reads files concurrently (`workers` threads, default one per CPU)
+    with the pyarrow CSV engine when available, only the columns in
+    POI_SCHEMA plus coordinates, and the schema's explicit dtypes.
+    """
+    files = sorted(glob.glob(os.path.join(poi_dir, "*.csv")))
+    if fast:
+        def reader(f):
+            df = _read_poi_csv_fast(f, logger)
+            df['source_file'] = os.path.basename(f)
+            return df
+        dfs = _load_files(files, reader, workers or os.cpu_count(), logger, label="POI CSV")
+    else:
+        dfs = []
+        for f in files:
+            try:
+                df = pd.read_csv(f)
+                if logger:
+                    logger.info(f"POI CSV loadind: {f}, filas: {len(df)}")
+                df['source_file'] = os.path.basename(f)
+                dfs.append(df)
+            except Exception as e:
+                if logger:
+                    logger.error(f"Error cargando {f}: {e}")
     if not dfs:
         return pd.DataFrame()
-    result = pd.concat(dfs, ignore_index=True)
-    lat, lon = find_coord_columns(result)
-    if lat and lon:
-        result = gpd.GeoDataFrame(result, geometry=gpd.points_from_xy(result[lon], result[lat]), crs="EPSG:4326")
-        if logger:
-            logger.info("POIs loaded as GeoDataFrame")
+    result = _with_coordinates(pd.concat(dfs, ignore_index=True))
+    if logger and isinstance(result, gpd.GeoDataFrame):
+        logger.info("POIs loaded as GeoDataFrame")
     return result
 
-def load_streets(streets_dir, logger=None):
+def _with_coordinates(df):
     """
-    Loads all street GeoJSONs and concatenates them into a GeoDataFrame.
+    Turns a POI frame into a GeoDataFrame when it has lat/lon columns.
     """
-    files = glob.glob(os.path.join(streets_dir, "*.geojson"))
-    gdfs = []
-    for f in files:
+    lat, lon = find_coord_columns(df)
+    if lat and lon:
+        return gpd.GeoDataFrame(df, geometry=gpd.points_from_xy(df[lon], df[lat]), crs="EPSG:4326")
+    return df
+
+def iter_poi_chunks(poi_dir, chunk_size=100000, logger=None, fast=False):
+    """
+    Yields POI CSV rows in chunks of at most `chunk_size`, file by file, so
+    callers never hold the whole POI set in memory. Each chunk carries
+    `source_file` and geometry (when coordinates exist), like load_pois.
+    fast=True applies the same column projection and dtypes as load_pois.
+    """
+    for f in sorted(glob.glob(os.path.join(poi_dir, "*.csv"))):
+        kwargs = {}
+        if fast:
+            columns, dtypes = _project(pd.read_csv(f, nrows=0).columns, POI_SCHEMA, COORD_NAMES)
+            kwargs = {"usecols": columns, "dtype": dtypes}
         try:
-            gdf = gpd.read_file(f)
+            rows = 0
+            for chunk in pd.read_csv(f, chunksize=chunk_size, **kwargs):
+                chunk['source_file'] = os.path.basename(f)
+                rows += len(chunk)
+                yield _with_coordinates(chunk)
             if logger:
-                logger.info(f"GeoJSON loaded from {f}: {len(gdf)} geometries")
-            gdfs.append(gdf)
+                logger.info(f"POI CSV streamed: {f}, rows: {rows}")
         except Exception as e:
             if logger:
                 logger.error(f"Error loading {f}: {e}")
+
+def _read_street_file_fast(f, logger=None):
+    gdf = None
+    if pyogrio is not None:
+        try:
+            fields = pyogrio.read_info(f)["fields"]
+            columns, dtypes = _project(fields, STREET_SCHEMA)
+            gdf = pyogrio.read_dataframe(f, columns=columns, use_arrow=True)
+        except Exception as e:
+            # e.g. a GDAL build without Arrow support: the plain reader still gets the file
+            if logger:
+                logger.warning(f"Arrow read failed for {f} ({e}); reading it without Arrow")
+    if gdf is None:
+        gdf = gpd.read_file(f)
+        columns, dtypes = _project(gdf.columns, STREET_SCHEMA)
+        gdf = gdf[columns + [gdf.geometry.name]]
+    for col, dtype in dtypes.items():
+        if dtype == "float64" or dtype == "Int64":
+            gdf[col] = pd.to_numeric(gdf[col], errors="coerce").astype(dtype)
+        else:
+            gdf[col] = gdf[col].astype(dtype)
+    return gdf
+
+def load_streets(streets_dir, logger=None, fast=False, workers=None):
+    """
+    Loads all street GeoJSONs and concatenates them into a GeoDataFrame.
+
+    fast=True reads files concurrently with pyogrio/Arrow when available,
+    only the columns in STREET_SCHEMA plus geometry, with explicit dtypes.
+    """
+    files = sorted(glob.glob(os.path.join(streets_dir, "*.geojson")))
+    if fast:
+        gdfs = _load_files(files, lambda f: _read_street_file_fast(f, logger), workers or os.cpu_count(), logger,
+                           label="GeoJSON")
+    else:
+        gdfs = []
+        for f in files:
+            try:
+                gdf = gpd.read_file(f)
+                if logger:
+                    logger.info(f"GeoJSON loaded from {f}: {len(gdf)} geometries")
+                gdfs.append(gdf)
+            except Exception as e:
+                if logger:
+                    logger.error(f"Error loading {f}: {e}")
     if not gdfs:
         return gpd.GeoDataFrame()
     result = gpd.GeoDataFrame(pd.concat(gdfs, ignore_index=True))
@@ -60,6 +217,71 @@ def load_streets(streets_dir, logger=None):
         logger.info(f"Total geometries loaded with {streets_dir}: {len(result)}")
     return result
 
+def street_filter_for(pois_df, margin=STREET_BBOX_MARGIN):
+    """
+    What a POI batch needs from the street network: the st_names it
+    references (stripped and upper-cased, as StreetIndex matches them), its
+    link_ids and, when the POIs carry coordinates, their bounding box in
+    EPSG:4326 grown by `margin` degrees. Streets matching any of the three
+    are kept by filter_streets, so geocoding and link_id validation see
+    every segment they would see in the full network.
+    """
+    names = pois_df["st_name"] if "st_name" in pois_df.columns else pd.Series([], dtype="string")
+    link_ids = pois_df["link_id"] if "link_id" in pois_df.columns else pd.Series([], dtype="Int64")
+    bbox = None
+    if isinstance(pois_df, gpd.GeoDataFrame) and pois_df.geometry.name in pois_df.columns:
+        points = pois_df.geometry.to_crs("EPSG:4326") if pois_df.crs else pois_df.geometry
+        bounds = points[points.notna() & ~points.is_empty].total_bounds
+    else:
+        lat, lon = find_coord_columns(pois_df)
+        bounds = np.full(4, np.nan)
+        if lat and lon:
+            x = pd.to_numeric(pois_df[lon], errors="coerce")
+            y = pd.to_numeric(pois_df[lat], errors="coerce")
+            bounds = np.array([x.min(), y.min(), x.max(), y.max()], dtype=float)
+    if not np.isnan(bounds).any():
+        bbox = [float(bounds[0] - margin), float(bounds[1] - margin), float(bounds[2] + margin), float(bounds[3] + margin)]
+    return {
+        "st_names": sorted(names.dropna().astype(str).str.strip().str.upper().unique().tolist()),
+        "link_ids": sorted(pd.unique(link_ids.dropna()).tolist()),
+        "bbox": bbox,
+    }
+
+def street_filter_mask(streets_gdf, street_filter):
+    """
+    Boolean mask of the street rows a street_filter keeps: referenced name or
+    link_id, or bounds overlapping the filter's bbox. Works on raw and
+    normalized frames (column names are matched case-insensitively, the
+    bbox is projected to the frame's CRS).
+    """
+    columns = {c.strip().lower(): c for c in streets_gdf.columns}
+    keep = np.zeros(len(streets_gdf), dtype=bool)
+    if street_filter["st_names"] and "st_name" in columns:
+        names = streets_gdf[columns["st_name"]].astype("string").str.strip().str.upper()
+        keep |= names.isin(street_filter["st_names"]).fillna(False).to_numpy(dtype=bool)
+    if street_filter["link_ids"] and "link_id" in columns:
+        keep |= streets_gdf[columns["link_id"]].isin(street_filter["link_ids"]).fillna(False).to_numpy(dtype=bool)
+    if street_filter["bbox"] and len(streets_gdf):
+        bbox = street_filter["bbox"]
+        if streets_gdf.crs is not None and streets_gdf.crs != "EPSG:4326":
+            bbox = gpd.GeoSeries([shapely.box(*bbox)], crs="EPSG:4326").to_crs(streets_gdf.crs).total_bounds
+        bounds = shapely.bounds(np.asarray(streets_gdf.geometry.values, dtype=object))
+        with np.errstate(invalid="ignore"):
+            keep |= ((bounds[:, 0] <= bbox[2]) & (bounds[:, 2] >= bbox[0])
+                     & (bounds[:, 1] <= bbox[3]) & (bounds[:, 3] >= bbox[1]))
+    return keep
+
+def filter_streets(streets_gdf, street_filter, logger=None):
+    """
+    The street rows a street_filter keeps (all of them for street_filter=None).
+    """
+    if street_filter is None:
+        return streets_gdf
+    kept = streets_gdf[street_filter_mask(streets_gdf, street_filter)]
+    if logger:
+        logger.info(f"Street filter kept {len(kept)} of {len(streets_gdf)} segments")
+    return kept
+
 def load_any_csv(csv_file, logger=None):
     """
     Utility to load any flat CSV (for catalogs, lookups, etc.).
@@ -0,0 +1,134 @@
+# src/data_loader/street_cache.py
+
+import os
+import glob
+import json
+import hashlib
+import geopandas as gpd
+import shapely
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from .data_loader import load_streets, filter_streets
+from ..preprocessing.normalizer import normalize_streets
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "streets")
+
+def street_files_signature(streets_dir, target_crs="EPSG:4326", fast=False):
+    """
+    Describes the street inputs: path, size and mtime of every GeoJSON,
+    plus the target CRS and loader mode. Any change yields a new cache key.
+    """
+    files = []
+    for f in sorted(glob.glob(os.path.join(streets_dir, "*.geojson"))):
+        st = os.stat(f)
+        files.append([os.path.abspath(f), st.st_size, st.st_mtime_ns])
+    return {"files": files, "target_crs": target_crs, "fast": bool(fast)}
+
+def street_cache_key(signature):
+    return hashlib.sha1(json.dumps(signature, sort_keys=True).encode("utf-8")).hexdigest()
+
+def street_data_key(streets_dir, target_crs="EPSG:4326"):
+    """
+    Cache key of the street files whichever loader mode reads them: the
+    normal and fast loaders give the same names, address ranges, link_ids
+    and geometries, so results derived from those (the geocode cache) are
+    shared between the two.
+    """
+    return street_cache_key(street_files_signature(streets_dir, target_crs))
+
+def _dir_prefix(streets_dir):
+    return hashlib.sha1(os.path.abspath(streets_dir).encode("utf-8")).hexdigest()[:12]
+
+def _parquet_filter(cache_file, street_filter, target_crs):
+    """
+    The street_filter as a Parquet row filter on the cache file, or None
+    when the file cannot express it (caches written before the bbox
+    covering column existed).
+    """
+    columns = set(pq.read_schema(cache_file).names)
+    bbox = street_filter["bbox"]
+    if bbox and "bbox" not in columns:
+        return None
+    condition = pc.scalar(False)
+    if street_filter["st_names"] and "st_name" in columns:
+        names = pc.utf8_upper(pc.utf8_trim_whitespace(pc.field("st_name")))
+        condition = condition | names.isin(street_filter["st_names"])
+    if street_filter["link_ids"] and "link_id" in columns:
+        condition = condition | pc.field("link_id").isin(street_filter["link_ids"])
+    if bbox:
+        if target_crs != "EPSG:4326":
+            bbox = gpd.GeoSeries([shapely.box(*bbox)], crs="EPSG:4326").to_crs(target_crs).total_bounds
+        condition = condition | ((pc.field("bbox", "xmin") <= bbox[2]) & (pc.field("bbox", "xmax") >= bbox[0])
+                                 & (pc.field("bbox", "ymin") <= bbox[3]) & (pc.field("bbox", "ymax") >= bbox[1]))
+    return condition
+
+def _read_cache(cache_file, street_filter, target_crs, logger=None):
+    condition = _parquet_filter(cache_file, street_filter, target_crs) if street_filter else None
+    if condition is None:
+        return filter_streets(gpd.read_parquet(cache_file), street_filter, logger)
+    streets_gdf = gpd.read_parquet(cache_file, filters=condition)
+    if logger:
+        total = pq.ParquetFile(cache_file).metadata.num_rows
+        logger.info(f"Street filter kept {len(streets_gdf)} of {total} segments")
+    return streets_gdf
+
+def load_normalized_streets(streets_dir, logger=None, target_crs="EPSG:4326", fast=False,
+                            cache_dir=DEFAULT_CACHE_DIR, rebuild=False, street_filter=None):
+    """
+    Loads and normalizes the street network, reusing a GeoParquet cache.
+
+    The cache file is keyed by the input files' paths, sizes and mtimes and
+    the target CRS. A hit skips GeoJSON parsing, validity checks and
+    reprojection; rebuild=True forces a fresh load and overwrites the cache.
+
+    With a `street_filter` (see street_filter_for) only the streets it keeps
+    are returned. A cache hit reads just those rows (the filter is pushed
+    down to Parquet, geometries are only decoded for kept rows). A miss
+    still normalizes and caches the whole network, as GeoJSON has no
+    spatial index and is parsed in full either way, and later regional runs
+    then read from the cache; without a cache the filter is applied before
+    the validity checks and reprojection.
+    Returns (streets GeoDataFrame, cache key). The key is that of the full
+    network: a filter keeps every segment of each referenced street name,
+    so per-address geocode results do not depend on it.
+    """
+    key = street_cache_key(street_files_signature(streets_dir, target_crs, fast))
+    prefix = _dir_prefix(streets_dir)
+    cache_file = os.path.join(cache_dir, f"{prefix}_{key}.parquet") if cache_dir else None
+
+    if cache_file and not rebuild and os.path.exists(cache_file):
+        try:
+            streets_gdf = _read_cache(cache_file, street_filter, target_crs, logger)
+            if logger:
+                logger.info(f"Street cache hit: {cache_file} ({len(streets_gdf)} segments)")
+            return streets_gdf, key
+        except Exception as e:
+            if logger:
+                logger.warning(f"Unreadable street cache {cache_file} ({e}); rebuilding")
+
+    streets_gdf = load_streets(streets_dir, logger, fast=fast)
+    if logger:
+        logger.info(f"Raw street segments loaded: {len(streets_gdf)}")
+    if not cache_file:
+        streets_gdf = filter_streets(streets_gdf, street_filter, logger)
+    streets_gdf = normalize_streets(streets_gdf, logger, target_crs=target_crs)
+
+    if cache_file and not streets_gdf.empty:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_file = f"{cache_file}.tmp"
+            # The bbox covering column lets filtered reads skip rows by extent
+            streets_gdf.to_parquet(tmp_file, write_covering_bbox=True)
+            os.replace(tmp_file, cache_file)
+            # Only the newest cache of a directory is kept
+            for stale in glob.glob(os.path.join(cache_dir, f"{prefix}_*.parquet")):
+                if stale != cache_file:
+                    os.remove(stale)
+            if logger:
+                logger.info(f"Street cache written: {cache_file}")
+        except Exception as e:
+            if logger:
+                logger.warning(f"Could not write street cache {cache_file}: {e}")
+    if cache_file:
+        streets_gdf = filter_streets(streets_gdf, street_filter, logger)
+    return streets_gdf, key
@@ -0,0 +1,168 @@
+# src/pipeline/chunked.py
+
+import os
+import glob
+import uuid
+import shutil
+import hashlib
+from contextlib import contextmanager
+import pandas as pd
+import geopandas as gpd
+from ..preprocessing.geocode import geocode_pois
+from ..preprocessing.parallel_geocode import GeocodePool
+from ..preprocessing.street_index import build_street_index
+from ..validation.validator import validate_pois
+from ..validation.fixer import fix_pois, apply_multidigit_fixes
+from ..utils.metrics import track
+from .incremental import _hash_rows, STREET_COLUMNS
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(".cache", "checkpoints")
+DEFAULT_CHUNK_SIZE = 100000
+
+def checkpoint_key(pois_df, streets_gdf, chunk_size, street_key=None):
+    """
+    Identifies a run by its POI rows, its street data and the chunk size, so
+    checkpoints are only reused for exactly the same input. A `street_key`
+    that already identifies the street data (e.g. the resident dataset's
+    signature) is used instead of hashing every street row.
+    """
+    digest = hashlib.sha1()
+    digest.update(_hash_rows(pois_df).tobytes())
+    if street_key:
+        digest.update(str(street_key).encode("utf-8"))
+    else:
+        cols = [c for c in STREET_COLUMNS if c in streets_gdf.columns]
+        digest.update(_hash_rows(streets_gdf[cols + [streets_gdf.geometry.name]]).tobytes())
+    digest.update(str(int(chunk_size)).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+def _chunk_file(run_dir, chunk_no):
+    return os.path.join(run_dir, f"chunk_{chunk_no:05d}.pkl")
+
+def _pid_alive(pid):
+    if os.name == "nt":
+        return True  # no cheap check; treat the owner as active
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+@contextmanager
+def _owned(run_dir):
+    """
+    Registers this run as an owner of run_dir (an owner-<pid>-<id>.lock
+    file), so concurrent runs over the same input share its checkpoints
+    without removing them under each other. Yields the lock path (None
+    without run_dir). On success run_dir is removed unless another live run
+    still owns it (locks of dead processes do not count); on failure or
+    cancellation only the claim is dropped and the checkpoints stay.
+    """
+    if not run_dir:
+        yield None
+        return
+    os.makedirs(run_dir, exist_ok=True)
+    lock = os.path.join(run_dir, f"owner-{os.getpid()}-{uuid.uuid4().hex[:8]}.lock")
+    open(lock, "w").close()
+    try:
+        yield lock
+    except BaseException:
+        _remove(lock)
+        raise
+    _remove(lock)
+    for other in glob.glob(os.path.join(run_dir, "owner-*.lock")):
+        if _pid_alive(int(os.path.basename(other).split("-")[1])):
+            return
+    shutil.rmtree(run_dir, ignore_errors=True)
+
+def run_chunked(pois_df, streets_gdf, logger=None, chunk_size=DEFAULT_CHUNK_SIZE, token=None,
+                checkpoint_dir=DEFAULT_CHECKPOINT_DIR, geocode_workers=1, street_index=None, metrics=None,
+                progress=None, geocode_cache=None, street_key=None):
+    """
+    Geocodes, validates and fixes the POIs chunk by chunk, checking `token`
+    (a CancellationToken) before every stage of every chunk.
+
+    Each finished chunk is written to <checkpoint_dir>/<run key>/, so a
+    cancelled or crashed run over the same POIs and streets picks up after
+    the last finished chunk. Concurrent runs over the same input share the
+    directory (each registers as an owner); it is removed once the last of
+    them completes. checkpoint_dir=None disables checkpoints. `street_key`
+    is passed to checkpoint_key.
+    Street `multidigit` corrections are applied once at the end, as in a
+    single-pass run. `progress(chunk_no, n_chunks)` is called after each chunk.
+    `geocode_cache` (a GeocodeCache) is handed to geocode_pois.
+    With geocode_workers > 1 one GeocodePool serves every chunk.
+    Returns (pois_geo, validation_results, pois_fixed).
+    """
+    pois_df = pois_df.reset_index(drop=True)
+    run_dir = None
+    if checkpoint_dir:
+        run_dir = os.path.join(checkpoint_dir, checkpoint_key(pois_df, streets_gdf, chunk_size, street_key))
+        done = len(glob.glob(os.path.join(run_dir, "chunk_*.pkl")))
+        if done and logger:
+            logger.info(f"Resuming from checkpoints in {run_dir}: {done} chunks already finished")
+
+    if street_index is None and len(pois_df):
+        street_index = build_street_index(streets_gdf, logger)
+    n_chunks = -(-len(pois_df) // chunk_size)
+    parts = []
+    # One worker pool and shared street index for all chunks
+    with _owned(run_dir) as lock, GeocodePool(street_index, geocode_workers) as pool:
+        for chunk_no in range(n_chunks):
+            path = _chunk_file(run_dir, chunk_no) if run_dir else None
+            if path and os.path.exists(path):
+                parts.append(pd.read_pickle(path))
+                if progress:
+                    progress(chunk_no + 1, n_chunks)
+                continue
+
+            chunk = pois_df.iloc[chunk_no * chunk_size:(chunk_no + 1) * chunk_size]
+            if token:
+                token.raise_if_cancelled(f"before geocoding chunk {chunk_no + 1}/{n_chunks}")
+            with track(metrics, "geocode", rows=len(chunk)) as stage:
+                chunk_geo = geocode_pois(chunk, streets_gdf, street_index=street_index, workers=geocode_workers,
+                                         cache=geocode_cache, pool=pool)
+                stage["output"] = chunk_geo
+            if token:
+                token.raise_if_cancelled(f"before validating chunk {chunk_no + 1}/{n_chunks}")
+            with track(metrics, "validate", rows=len(chunk_geo)) as stage:
+                chunk_val = validate_pois(chunk_geo, streets_gdf)
+                stage["output"] = chunk_val
+            if token:
+                token.raise_if_cancelled(f"before fixing chunk {chunk_no + 1}/{n_chunks}")
+            with track(metrics, "fix", rows=len(chunk_val)) as stage:
+                chunk_fixed = fix_pois(chunk_val, chunk_geo, streets_gdf, update_streets=False)
+                stage["output"] = chunk_fixed
+
+            part = {"geo": chunk_geo, "validation": chunk_val, "fixed": chunk_fixed}
+            if path:
+                # Own temp name: another owner may be writing the same chunk
+                tmp = f"{lock}.{chunk_no}.tmp"
+                pd.to_pickle(part, tmp)
+                os.replace(tmp, path)
+            parts.append(part)
+            if logger:
+                logger.info(f"Chunk {chunk_no + 1}/{n_chunks} finished ({len(chunk)} POIs)")
+            if progress:
+                progress(chunk_no + 1, n_chunks)
+
+    if parts:
+        pois_geo = gpd.GeoDataFrame(pd.concat([p["geo"] for p in parts]), geometry="geometry", crs=streets_gdf.crs)
+        validation_results = pd.concat([p["validation"] for p in parts], ignore_index=True)
+        pois_fixed = gpd.GeoDataFrame(pd.concat([p["fixed"] for p in parts]), geometry="geometry", crs=streets_gdf.crs)
+    else:
+        pois_geo = geocode_pois(pois_df, streets_gdf)
+        validation_results = validate_pois(pois_geo, streets_gdf)
+        pois_fixed = fix_pois(validation_results, pois_geo, streets_gdf, update_streets=False)
+
+    flagged = validation_results.loc[validation_results["violation_code"] == "FIX_MULTIDIGIT", "poi_id"]
+    apply_multidigit_fixes(streets_gdf, pois_geo.loc[pois_geo["poi_id"].isin(flagged), "link_id"])
+    return pois_geo, validation_results, pois_fixed
@@ -0,0 +1,146 @@
+# src/pipeline/incremental.py
+
+import os
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+from ..preprocessing.geocode import geocode_pois
+from ..validation.validator import validate_pois
+from ..validation.fixer import fix_pois, apply_multidigit_fixes
+from ..utils.metrics import track
+
+DEFAULT_STATE_DIR = os.path.join(".cache", "incremental")
+STATE_FILE = "incremental_state.pkl"
+STREET_COLUMNS = ["st_name", "link_id", "l_refaddr", "l_nrefaddr", "r_refaddr", "r_nrefaddr", "multidigit"]
+
+def _hash_rows(df):
+    """
+    64-bit fingerprint of every row's content (geometry hashed as WKB).
+    """
+    df = pd.DataFrame(df)
+    for col in df.columns:
+        if isinstance(df[col].dtype, gpd.array.GeometryDtype):
+            df[col] = gpd.GeoSeries(df[col]).to_wkb()
+    return pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+
+def poi_fingerprints(pois_df):
+    return _hash_rows(pois_df)
+
+def _lookup(keys, values, wanted):
+    """
+    values[keys == wanted] for each wanted key, 0 when the key is unknown.
+    """
+    found = pd.Index(keys).get_indexer(pd.Index(wanted))
+    return np.where(found >= 0, values[np.maximum(found, 0)], np.uint64(0)).astype(np.uint64)
+
+def street_fingerprints(pois_df, streets_gdf):
+    """
+    Fingerprint of the street data each POI depends on: every segment of
+    its street name (geocoding) and the first segment of its link_id
+    (validation). Changing any of those segments changes the fingerprint.
+    """
+    cols = [c for c in STREET_COLUMNS if c in streets_gdf.columns]
+    seg_hash = _hash_rows(streets_gdf[cols + [streets_gdf.geometry.name]])
+    poi_names = pois_df['st_name'].astype("string").str.strip().str.upper().fillna("")
+    by_name = np.zeros(len(pois_df), dtype=np.uint64)
+    by_link = np.zeros(len(pois_df), dtype=np.uint64)
+
+    if 'st_name' in cols and len(seg_hash):
+        names = streets_gdf['st_name'].astype("string").str.strip().str.upper().fillna("").to_numpy(dtype=object)
+        codes, uniques = pd.factorize(names)
+        name_hash = np.zeros(len(uniques), dtype=np.uint64)
+        np.add.at(name_hash, codes, seg_hash)  # order-independent, wraps on overflow
+        by_name = _lookup(uniques, name_hash, poi_names.to_numpy(dtype=object))
+    if 'link_id' in cols and len(seg_hash):
+        first = ~streets_gdf['link_id'].duplicated().to_numpy()
+        by_link = _lookup(streets_gdf['link_id'].to_numpy()[first], seg_hash[first], pois_df['link_id'].to_numpy())
+    return by_name * np.uint64(31) ^ by_link
+
+def load_state(state_dir):
+    path = os.path.join(state_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return None
+    return pd.read_pickle(path)
+
+def save_state(state_dir, state):
+    os.makedirs(state_dir, exist_ok=True)
+    path = os.path.join(state_dir, STATE_FILE)
+    pd.to_pickle(state, f"{path}.tmp")
+    os.replace(f"{path}.tmp", path)
+
+def run_incremental(pois_df, streets_gdf, state_dir=DEFAULT_STATE_DIR, logger=None, street_index=None, geocode_workers=1,
+                    metrics=None, geocode_cache=None):
+    """
+    Geocodes, validates and fixes only the POIs whose row content or
+    referenced street segments changed since the previous run, reusing the
+    stored results for everything else.
+
+    The state in `state_dir` maps each POI row fingerprint to its street
+    fingerprint and its geocoded, validation and fixed rows; it is replaced
+    with the current run's rows at the end.
+    Returns (pois_geo, validation_results, pois_fixed) in input order.
+    With `metrics` the change detection, the three stages over the changed
+    POIs and the state merge are timed separately. `geocode_cache` (a
+    GeocodeCache) is handed to geocode_pois.
+    """
+    pois_df = pois_df.reset_index(drop=True)
+    with track(metrics, "fingerprint", rows=len(pois_df)):
+        row_hash = poi_fingerprints(pois_df)
+        street_hash = street_fingerprints(pois_df, streets_gdf)
+        state = load_state(state_dir)
+
+    reuse = np.zeros(len(pois_df), dtype=bool)
+    if state is not None and len(state["row_hash"]):
+        known = pd.Index(state["row_hash"])
+        unique = ~known.duplicated()
+        found = known[unique].get_indexer(pd.Index(row_hash))
+        previous = state["street_hash"][unique][np.maximum(found, 0)]
+        reuse = (found >= 0) & (previous == street_hash)
+        # Repeated rows in the input are always recomputed
+        reuse &= ~pd.Series(row_hash).duplicated(keep=False).to_numpy()
+    changed = np.flatnonzero(~reuse)
+    if logger:
+        logger.info(f"Incremental run: {len(changed)} of {len(pois_df)} POIs changed, {int(reuse.sum())} reused")
+
+    delta = pois_df.iloc[changed]
+    with track(metrics, "geocode", rows=len(delta)):
+        delta_geo = geocode_pois(delta, streets_gdf, logger, street_index=street_index, workers=geocode_workers,
+                                 cache=geocode_cache)
+    with track(metrics, "validate", rows=len(delta_geo)):
+        delta_val = validate_pois(delta_geo, streets_gdf, logger)
+    with track(metrics, "fix", rows=len(delta_val)):
+        delta_fixed = fix_pois(delta_val, delta_geo, streets_gdf, logger, update_streets=False)
+    delta_geo = delta_geo.assign(_row_hash=row_hash[changed], _row=changed)
+    delta_val = delta_val.assign(_row_hash=row_hash[changed], _row=changed)
+    fixed_rows = delta_fixed.index.to_numpy()
+    delta_fixed = delta_fixed.assign(_row_hash=row_hash[fixed_rows], _row=fixed_rows)
+
+    with track(metrics, "merge", rows=len(pois_df)):
+        merged = [delta_geo, delta_val, delta_fixed]
+        if reuse.any():
+            # Reused rows are unique in the input, so their fingerprint gives their position
+            position = pd.Series(np.flatnonzero(reuse), index=row_hash[reuse])
+            for i, old in enumerate((state["geo"], state["validation"], state["fixed"])):
+                old = old[old["_row_hash"].isin(position.index) & ~old["_row_hash"].duplicated()]
+                old = old.assign(_row=position.reindex(old["_row_hash"].to_numpy()).to_numpy())
+                merged[i] = pd.concat([old, merged[i]], ignore_index=True)
+
+        # Restore input order
+        pois_geo, validation_results, pois_fixed = (
+            df.sort_values("_row", kind="stable").drop(columns="_row").reset_index(drop=True) for df in merged
+        )
+
+        save_state(state_dir, {
+            "row_hash": row_hash,
+            "street_hash": street_hash,
+            "geo": pois_geo,
+            "validation": validation_results,
+            "fixed": pois_fixed,
+        })
+
+    flagged = validation_results.loc[validation_results["violation_code"] == "FIX_MULTIDIGIT", "poi_id"]
+    apply_multidigit_fixes(streets_gdf, pois_geo.loc[pois_geo["poi_id"].isin(flagged), "link_id"])
+
+    pois_geo = gpd.GeoDataFrame(pois_geo.drop(columns="_row_hash"), geometry="geometry", crs=streets_gdf.crs)
+    pois_fixed = gpd.GeoDataFrame(pois_fixed.drop(columns="_row_hash"), geometry="geometry", crs=streets_gdf.crs)
+    return pois_geo, validation_results.drop(columns="_row_hash"), pois_fixed
@@ -0,0 +1,132 @@
+# src/pipeline/stages.py
+
+import os
+import glob
+import json
+import shutil
+import hashlib
+import pandas as pd
+from ..data_loader import data_loader, street_cache
+from ..data_loader.street_cache import street_files_signature, street_cache_key
+from ..preprocessing import (normalizer, geocode, street_index, spatial, interpolator, parallel_geocode,
+                             geocode_cache)
+from ..validation import validator, fixer
+from ..utils.run_manifest import get_run, DEFAULT_MANIFEST
+from . import incremental, chunked
+
+STAGES = ("load_pois", "normalize", "geocode", "validate", "fix", "process")
+# Every module a stage executes: loading and normalizing the streets, address
+# matching, nearest-segment and side logic, worker processes and the geocode cache
+GEOCODE_MODULES = (data_loader, street_cache, normalizer, geocode, street_index, spatial, interpolator,
+                   parallel_geocode, geocode_cache)
+# Source files whose changes invalidate a stage's checkpoint
+STAGE_MODULES = {
+    "load_pois": (data_loader,),
+    "normalize": (normalizer,),
+    "geocode": GEOCODE_MODULES,
+    "validate": (validator,),
+    "fix": (fixer,),
+    "process": (incremental, chunked) + GEOCODE_MODULES + (validator, fixer),
+}
+
+def _digest(*parts):
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def code_version(stage):
+    """
+    Hash of the source of the modules implementing a stage.
+    """
+    digest = hashlib.sha1()
+    for module in STAGE_MODULES[stage]:
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def poi_files_signature(pois_dir=None, test_file=None):
+    """
+    Path, size and mtime of every POI input file (or of the test CSV).
+    """
+    paths = [test_file] if test_file else sorted(glob.glob(os.path.join(pois_dir, "*.csv")))
+    return [[os.path.abspath(f), os.stat(f).st_size, os.stat(f).st_mtime_ns] for f in paths if os.path.exists(f)]
+
+def stage_keys(pois_dir, streets_dir, test_file=None, fast=False, compact=False, test_mode=False, mode="batch",
+               chunk_size=None, filter_streets=False):
+    """
+    One key per stage, chained so a stage's key covers its own code and
+    parameters plus everything its input was derived from: a changed POI
+    file, street file or module invalidates that stage and all later ones.
+    """
+    keys = {}
+    keys["load_pois"] = _digest(poi_files_signature(pois_dir, test_file), fast, code_version("load_pois"))
+    keys["normalize"] = _digest(keys["load_pois"], compact, code_version("normalize"))
+    streets = [street_cache_key(street_files_signature(streets_dir, fast=fast)), filter_streets]
+    keys["geocode"] = _digest(keys["normalize"], streets, test_mode, code_version("geocode"))
+    keys["validate"] = _digest(keys["geocode"], code_version("validate"))
+    keys["fix"] = _digest(keys["validate"], code_version("fix"))
+    keys["process"] = _digest(keys["normalize"], streets, test_mode, mode, chunk_size, code_version("process"))
+    return keys
+
+class StageCheckpoints:
+    """
+    Pickled stage outputs in `stage_dir`, each next to a small JSON file
+    holding the stage key it was produced under. A checkpoint only counts
+    as completed while its key matches the current one.
+    """
+
+    def __init__(self, stage_dir, keys, logger=None):
+        self.stage_dir = stage_dir
+        self.keys = keys
+        self.logger = logger
+        os.makedirs(stage_dir, exist_ok=True)
+
+    def _paths(self, stage):
+        return os.path.join(self.stage_dir, f"{stage}.pkl"), os.path.join(self.stage_dir, f"{stage}.json")
+
+    def completed(self, stage):
+        data_path, meta_path = self._paths(stage)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return False
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f).get("key") == self.keys[stage]
+
+    def load(self, stage):
+        output = pd.read_pickle(self._paths(stage)[0])
+        if self.logger:
+            self.logger.info(f"Stage {stage}: reusing checkpoint from {self.stage_dir}")
+        return output
+
+    def save(self, stage, output):
+        data_path, meta_path = self._paths(stage)
+        # The old key goes first, so a crash mid-write never leaves a
+        # matching key next to a partial file
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        pd.to_pickle(output, f"{data_path}.tmp")
+        os.replace(f"{data_path}.tmp", data_path)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"stage": stage, "key": self.keys[stage]}, f)
+
+    def clear(self):
+        shutil.rmtree(self.stage_dir, ignore_errors=True)
+
+def stage_dir_for(report_dir, run_id):
+    return os.path.join(report_dir, f"{run_id}_stages")
+
+def find_stage_dir(run, output_dir="output", manifest=DEFAULT_MANIFEST):
+    """
+    Resolves --resume: a stage directory path, or a run id looked up in the
+    run manifest (falling back to <output_dir>/<date>/<run id>_stages).
+    Returns None when nothing is found.
+    """
+    if os.path.isdir(run):
+        return run
+    recorded = get_run(run, manifest)
+    stage_dir = ((recorded or {}).get("params") or {}).get("stage_dir")
+    if stage_dir and os.path.isdir(stage_dir):
+        return stage_dir
+    parts = run.split("_")
+    if len(parts) >= 3:
+        guess = stage_dir_for(os.path.join(output_dir, parts[1]), run)
+        if os.path.isdir(guess):
+            return guess
+    return None
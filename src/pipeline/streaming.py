@@ -0,0 +1,126 @@
+# src/pipeline/streaming.py
+
+import os
+import itertools
+from collections import Counter
+import pandas as pd
+import geopandas as gpd
+from ..data_loader.data_loader import iter_poi_chunks
+from ..preprocessing.normalizer import normalize_pois
+from ..preprocessing.geocode import geocode_pois
+from ..preprocessing.parallel_geocode import GeocodePool
+from ..preprocessing.street_index import build_street_index
+from ..validation.validator import validate_pois, violation_counts
+from ..validation.fixer import fix_pois, apply_multidigit_fixes
+from ..utils.metrics import track
+from ..storage.results_store import write_results, source_files_of
+
+SAMPLE_ROWS = 10
+
+def _append_csv(df, path):
+    """
+    Appends a frame to a CSV, writing the header only for a new file.
+    Geometries are written as WKT.
+    """
+    if isinstance(df, gpd.GeoDataFrame):
+        df = pd.DataFrame(df).assign(**{df.geometry.name: df.geometry.to_wkt()})
+    df.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+
+def run_streaming(pois_dir, streets_gdf, output_dir, stamp, logger=None, chunk_size=100000,
+                  limit=None, fast=False, geocode_workers=1, metrics=None, results_dir=None, run_id=None,
+                  run_date=None, compact=False, geocode_cache=None):
+    """
+    Runs normalize -> geocode -> validate -> fix chunk by chunk against the
+    resident street data, appending each chunk's results to
+    `validation_<stamp>.csv` and `pois_fixed_<stamp>.csv` in output_dir.
+
+    Only aggregates and a small sample of rows are kept, so peak memory is
+    bounded by chunk_size. Duplicate rows are removed within each chunk.
+    Street `multidigit` corrections are applied to streets_gdf once at the
+    end, so every chunk is validated against the same street data.
+
+    Returns a dict with "summary" (as expected by generate_report), the
+    sample frames "pois_fixed_sample" / "validation_sample" and the
+    output file paths. With `metrics` (a StageMetrics) each stage's time
+    is accumulated over all chunks. With `results_dir` every chunk's
+    geocoded, validated and fixed POIs are also stored as partitioned
+    Parquet (see write_results), one part per chunk. compact=True keeps
+    each chunk in compact dtypes (see compact_dtypes). `geocode_cache` (a
+    GeocodeCache) is handed to geocode_pois; with geocode_workers > 1 one
+    GeocodePool serves every chunk.
+    """
+    validation_path = os.path.join(output_dir, f"validation_{stamp}.csv")
+    fixed_path = os.path.join(output_dir, f"pois_fixed_{stamp}.csv")
+    for path in (validation_path, fixed_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+    street_index = build_street_index(streets_gdf, logger)
+    counts = Counter()
+    multidigit_links = set()
+    totals = {"raw": 0, "normalized": 0, "geocoded": 0, "fixed": 0}
+    fixed_sample, validation_sample = [], []
+
+    chunks = iter_poi_chunks(pois_dir, chunk_size, logger, fast=fast)
+    # One worker pool and shared street index for all chunks
+    with GeocodePool(street_index, geocode_workers) as pool:
+        for chunk_no in itertools.count():
+            with track(metrics, "load_pois") as stage:
+                chunk = next(chunks, None)
+                stage["rows"] = 0 if chunk is None else len(chunk)
+            if chunk is None:
+                break
+            if limit is not None:
+                chunk = chunk.iloc[:max(limit - totals["raw"], 0)]
+                if chunk.empty:
+                    break
+            totals["raw"] += len(chunk)
+
+            with track(metrics, "normalize", rows=len(chunk)) as stage:
+                pois = normalize_pois(chunk, compact=compact)
+                stage["output"] = pois
+            with track(metrics, "geocode", rows=len(pois)) as stage:
+                pois_geo = geocode_pois(pois, streets_gdf, street_index=street_index, workers=geocode_workers,
+                                        cache=geocode_cache, pool=pool)
+                stage["output"] = pois_geo
+            with track(metrics, "validate", rows=len(pois_geo)) as stage:
+                validation = validate_pois(pois_geo, streets_gdf)
+                stage["output"] = validation
+            with track(metrics, "fix", rows=len(validation)) as stage:
+                pois_fixed = fix_pois(validation, pois_geo, streets_gdf, update_streets=False)
+                stage["output"] = pois_fixed
+
+            totals["normalized"] += len(pois)
+            totals["geocoded"] += int(pois_geo.geometry.notnull().sum())
+            totals["fixed"] += len(pois_fixed)
+            counts.update(violation_counts(validation))
+            flagged = validation.loc[validation["violation_code"] == "FIX_MULTIDIGIT", "poi_id"]
+            multidigit_links.update(pois_geo.loc[pois_geo["poi_id"].isin(flagged), "link_id"].dropna().tolist())
+
+            with track(metrics, "write", rows=len(validation) + len(pois_fixed)):
+                _append_csv(validation, validation_path)
+                _append_csv(pois_fixed, fixed_path)
+                if results_dir:
+                    write_results(results_dir, run_id, run_date,
+                                  {"pois_geo": pois_geo, "validation": validation, "pois_fixed": pois_fixed},
+                                  source_files=source_files_of(pois_geo), part=chunk_no)
+            if sum(len(df) for df in fixed_sample) < SAMPLE_ROWS:
+                fixed_sample.append(pois_fixed.head(SAMPLE_ROWS))
+                validation_sample.append(validation.head(SAMPLE_ROWS))
+            if logger:
+                logger.info(f"Chunk {chunk_no + 1}: {len(pois)} POIs, {totals['normalized']} so far")
+
+    if multidigit_links:
+        apply_multidigit_fixes(streets_gdf, list(multidigit_links))
+
+    if logger:
+        logger.info(f"Streaming finished: {totals['raw']} raw, {totals['normalized']} normalized, "
+                    f"{totals['geocoded']} geocoded, {totals['fixed']} after fixes")
+    return {
+        "summary": {"total_pois": totals["fixed"], "violation_counts": dict(counts)},
+        "totals": totals,
+        "pois_fixed_sample": pd.concat(fixed_sample).head(SAMPLE_ROWS) if fixed_sample else pd.DataFrame(),
+        "validation_sample": pd.concat(validation_sample).head(SAMPLE_ROWS) if validation_sample else pd.DataFrame(),
+        "validation_path": validation_path,
+        "pois_fixed_path": fixed_path,
+    }
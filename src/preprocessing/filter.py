@@ -4,6 +4,7 @@ import pandas as pd
 import geopandas as gpd
 from shapely.geometry import LineString, Point
 from utils.logger import get_logger
+from .street_index import build_street_index, normalize_street_name
 
 logger = get_logger(__name__)
 
@@ -14,24 +15,21 @@ def interpolate_point_on_line(line: LineString, num: float, num_start: float, nu
     t = np.clip(t, 0, 1)
     return line.interpolate(t, normalized=True)
 
-def enrich_pois_geometry(pois_df: pd.DataFrame, naming_gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
-    naming_gdf = naming_gdf.copy()
-    naming_gdf.columns = naming_gdf.columns.str.lower().str.strip()
+def enrich_pois_geometry(pois_df: pd.DataFrame, naming_gdf: gpd.GeoDataFrame, street_index=None) -> gpd.GeoDataFrame:
+    if street_index is None:
+        street_index = build_street_index(naming_gdf)
     pois_df = pois_df.copy()
     pois_df['geometry'] = None
 
     for idx, row in pois_df.iterrows():
-        street = str(row.get('st_name') or '').strip().upper()
+        street = normalize_street_name(row.get('st_name') or '')
         num = row.get('st_num_ful')
         if pd.isna(street) or pd.isna(num):
             continue
-        segs = naming_gdf[naming_gdf['st_name'].str.strip().str.upper() == street]
-        if segs.empty:
-            continue
         found = False
-        for _, seg in segs.iterrows():
-            for side, (n1, n2) in [('L', (seg.get('l_nrefaddr'), seg.get('l_refaddr'))),
-                                   ('R', (seg.get('r_nrefaddr'), seg.get('r_refaddr')))]:
+        for _, line, l_ref, l_nref, r_ref, r_nref in street_index.segments(street):
+            for side, (n1, n2) in [('L', (l_nref, l_ref)),
+                                   ('R', (r_nref, r_ref))]:
                 if pd.isna(n1) or pd.isna(n2):
                     continue
                 try:
@@ -41,7 +39,8 @@ def enrich_pois_geometry(pois_df: pd.DataFrame, naming_gdf: gpd.GeoDataFrame) ->
                     continue
                 min_addr, max_addr = sorted([n1, n2])
                 if min_addr <= num_f <= max_addr:
-                    geom = interpolate_point_on_line(seg.geometry, num_f, min_addr, max_addr)
+                    # Measured from the reference node (n2), as geocode_pois does
+                    geom = interpolate_point_on_line(line, num_f, n2, n1)
                     pois_df.at[idx, 'geometry'] = geom
                     found = True
                     break
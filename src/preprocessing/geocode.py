@@ -1,42 +1,253 @@
 import pandas as pd
 import numpy as np
 import geopandas as gpd
+import shapely
 from shapely.geometry import Point
 from .interpolator import interpolate_point_on_line
+from .parallel_geocode import geocode_parallel
+from .street_index import build_street_index, normalize_street_name
+from .spatial import poi_points, nearest_segments
+from .geocode_cache import cache_summary
 
-def geocode_pois(pois_df: pd.DataFrame, streets_gdf: gpd.GeoDataFrame, logger=None) -> gpd.GeoDataFrame:
+def _pick(primary, fallback):
+    # Mirrors the `l_* or r_*` fallback: empty/zero left values use the right side
+    return fallback if np.isnan(primary) or primary == 0 else primary
+
+def parse_house_numbers(values) -> np.ndarray:
+    """
+    Parses `st_num_ful` values into floats; anything that is not a whole number is NaN.
+    """
+    values = pd.Series(values)
+    if not pd.api.types.is_numeric_dtype(values):
+        values = values.astype("string").str.strip()
+    nums = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float, na_value=np.nan, copy=True)
+    nums[nums != np.floor(nums)] = np.nan
+    return nums
+
+def _match_side(street_index, side, codes, nums, pending):
+    """
+    Resolves house numbers against the sorted address ranges of one street side.
+    Returns (poi rows, segment positions, fractions along the segment).
+    """
+    seg_codes, low, high, ref, nref, seg_pos = street_index.side_intervals(side)
+    rows = np.flatnonzero(pending)
+    if not len(rows) or not len(seg_codes):
+        return rows[:0], rows[:0], np.empty(0)
+    poi_codes, poi_nums = codes[rows], nums[rows]
+
+    # Rank addresses so (street code, address) packs into one sortable int64 key
+    ranks = np.unique(np.concatenate([low, poi_nums]))
+    width = len(ranks) + 1
+    seg_keys = seg_codes * width + np.searchsorted(ranks, low)
+    poi_keys = poi_codes * width + np.searchsorted(ranks, poi_nums)
+
+    # Last interval of the same street starting at or below the number
+    cand = np.searchsorted(seg_keys, poi_keys, side="right") - 1
+    cand_ok = cand >= 0
+    cand = np.where(cand_ok, cand, 0)
+    same_street = cand_ok & (seg_codes[cand] == poi_codes)
+    hit = same_street & (high[cand] >= poi_nums)
+
+    # Overlapping ranges: an earlier interval of the street may still cover the number
+    reach = pd.Series(high).groupby(seg_codes).cummax().to_numpy()
+    for i in np.flatnonzero(same_street & ~hit & (reach[cand] >= poi_nums)):
+        k = cand[i]
+        while k >= 0 and seg_codes[k] == poi_codes[i]:
+            if low[k] <= poi_nums[i] <= high[k]:
+                cand[i], hit[i] = k, True
+                break
+            k -= 1
+
+    cand = cand[hit]
+    span = nref[cand] - ref[cand]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        frac = np.where(span == 0, 0.5, (poi_nums[hit] - ref[cand]) / span)
+    return rows[hit], seg_pos[cand], np.clip(frac, 0, 1)
+
+def match_addresses(street_index, street_names, house_numbers):
+    """
+    Batch-resolves (street name, house number) pairs to street segments.
+    Left ranges are tried first, then right ranges, each side on its own.
+    Returns arrays of segment position (-1 if unmatched), fraction along
+    the segment measured from the reference node, and side ('L'/'R'/None).
+    """
+    # Normalize each distinct name once, then broadcast the street codes back
+    name_ids, distinct = pd.factorize(pd.Series(street_names), use_na_sentinel=True)
+    distinct = pd.Series(distinct, dtype="string").str.strip().str.upper().fillna("")
+    # Missing names (id -1) pick the trailing -1, also when no name is given at all
+    codes = np.append(street_index.codes_for(distinct.to_numpy(dtype=object)), -1)[name_ids]
+    nums = parse_house_numbers(house_numbers)
+    n = len(codes)
+    positions = np.full(n, -1, dtype=np.int64)
+    fractions = np.full(n, np.nan)
+    sides = np.full(n, None, dtype=object)
+    for side in ("L", "R"):
+        pending = (positions < 0) & (codes >= 0) & ~np.isnan(nums)
+        rows, pos, frac = _match_side(street_index, side, codes, nums, pending)
+        positions[rows], fractions[rows], sides[rows] = pos, frac, side
+    return positions, fractions, sides
+
+def interpolate_matches(street_index, positions, fractions) -> np.ndarray:
+    """
+    Interpolates all matched points in one vectorized call; unmatched rows stay None.
+    """
+    points = np.full(len(positions), None, dtype=object)
+    matched = positions >= 0
+    if matched.any():
+        points[matched] = shapely.line_interpolate_point(
+            street_index.geometry[positions[matched]], fractions[matched], normalized=True)
+    return points
+
+def _resolve(street_index, names, nums, workers, chunk_size, logger=None, pool=None):
+    """
+    Matches and interpolates addresses, in a process pool when worthwhile.
+    Returns (positions, sides, points).
+    """
+    if workers and workers > 1 and len(names) > chunk_size:
+        positions, _, sides, points = geocode_parallel(street_index, names, nums, workers, chunk_size, logger, pool)
+    else:
+        positions, fractions, sides = match_addresses(street_index, names, nums)
+        points = interpolate_matches(street_index, positions, fractions)
+    return positions, sides, points
+
+def _geocode_cached(street_index, street_names, house_numbers, cache, workers, chunk_size, logger=None, pool=None):
+    """
+    Geocodes each distinct (normalized st_name, house number) once: cached
+    addresses come from `cache`, the rest are resolved and added to it.
+    Returns (link_ids, sides, points, matched) per POI.
+    """
+    n = len(street_names)
+    name_ids, distinct = pd.factorize(pd.Series(street_names), use_na_sentinel=True)
+    distinct = pd.Series(distinct, dtype="string").str.strip().str.upper()
+    names = np.where(name_ids >= 0, distinct.to_numpy(dtype=object, na_value=None)[name_ids], None)
+    nums = parse_house_numbers(house_numbers)
+    valid = np.flatnonzero(pd.notna(names) & ~np.isnan(nums))
+
+    address_ids, addresses = pd.MultiIndex.from_arrays([names[valid], nums[valid]]).factorize()
+    found, values = cache.lookup(addresses)
+    missing = np.flatnonzero(~found)
+    if len(missing):
+        positions, sides, points = _resolve(street_index, addresses.get_level_values(0)[missing].to_numpy(dtype=object),
+                                            addresses.get_level_values(1)[missing].to_numpy(dtype=float),
+                                            workers, chunk_size, logger, pool)
+        resolved = pd.DataFrame({
+            "link_id": _link_ids(street_index, positions),
+            "side": np.asarray(sides, dtype=object),
+            "x": shapely.get_x(np.asarray(points, dtype=object)),
+            "y": shapely.get_y(np.asarray(points, dtype=object)),
+        })
+        cache.store(addresses[missing], resolved)
+        values = values.astype({"link_id": object, "side": object, "x": float, "y": float})
+        values.iloc[missing] = resolved.to_numpy(dtype=object)
+
+    link_ids = np.full(n, None, dtype=object)
+    sides = np.full(n, None, dtype=object)
+    points = np.full(n, None, dtype=object)
+    matched = np.zeros(n, dtype=bool)
+    if len(addresses):
+        link_ids[valid] = values["link_id"].to_numpy(dtype=object)[address_ids]
+        sides[valid] = values["side"].to_numpy(dtype=object)[address_ids]
+        matched[valid] = values["link_id"].notna().to_numpy()[address_ids]
+        hit = matched[valid]
+        points[valid[hit]] = shapely.points(values["x"].to_numpy(dtype=float)[address_ids][hit],
+                                            values["y"].to_numpy(dtype=float)[address_ids][hit])
+    return link_ids, sides, points, matched
+
+def geocode_pois(pois_df: pd.DataFrame, streets_gdf: gpd.GeoDataFrame, logger=None, street_index=None, mode="batch",
+                 workers=1, chunk_size=50000, spatial=True, cache=None, pool=None) -> gpd.GeoDataFrame:
     """
     Geocodes POIs by interpolating over street segments.
+    Candidate segments come from a street-name index built once per run
+    (pass `street_index` to reuse one across calls).
+
+    mode="batch" resolves all POIs with array interval joins and adds the
+    matched `geo_link_id` and `geo_side`, and `geo_source`: 'address' for an
+    address match, 'nearest' for the spatial fallback below, None when the
+    POI was not located; mode="legacy" walks POIs one by one.
+    With workers > 1 the batch mode runs `chunk_size` POIs at a time in a
+    process pool that reads the street index from shared memory; pass a
+    `pool` (GeocodePool over `street_index`) to reuse one across calls.
+
+    When the POIs carry coordinates (point geometry or lat/lon columns) and
+    spatial=True, the batch mode also snaps them to their nearest segment
+    (`near_link_id`, `near_side`, `near_percfrref`). POIs without an address
+    match then fall back to their own location and nearest segment.
+
+    With a `cache` (GeocodeCache for this street dataset) the batch mode
+    resolves every distinct normalized address once and reuses earlier
+    results; hits and misses are logged.
     """
+    if street_index is None:
+        street_index = build_street_index(streets_gdf, logger)
+    if mode == "legacy":
+        return _geocode_pois_legacy(pois_df, streets_gdf, street_index, logger)
+
+    if cache is not None:
+        before = cache.stats()
+        link_ids, sides, points, matched = _geocode_cached(
+            street_index, pois_df['st_name'], pois_df['st_num_ful'], cache, workers, chunk_size, logger, pool)
+        if logger:
+            logger.info(cache_summary(before, cache.stats()))
+    else:
+        positions, sides, points = _resolve(
+            street_index, pois_df['st_name'], parse_house_numbers(pois_df['st_num_ful']), workers, chunk_size, logger,
+            pool)
+        link_ids, matched = _link_ids(street_index, positions), positions >= 0
+    result = pd.DataFrame(pois_df, copy=True)
+    result['geo_link_id'] = link_ids
+    result['geo_side'] = sides
+    result['geo_source'] = np.where(matched, 'address', None)
+
+    own_points = poi_points(pois_df, streets_gdf.crs) if spatial else None
+    if own_points is not None:
+        near_pos, near_frac, near_sides = nearest_segments(street_index, own_points)
+        result['near_link_id'] = _link_ids(street_index, near_pos)
+        result['near_side'] = near_sides
+        result['near_percfrref'] = np.round(near_frac * 100, 1)
+        fallback = ~matched & (near_pos >= 0)
+        points = np.asarray(points, dtype=object).copy()
+        points[fallback] = own_points[fallback]
+        result.loc[fallback, 'geo_link_id'] = result.loc[fallback, 'near_link_id']
+        result.loc[fallback, 'geo_side'] = near_sides[fallback]
+        result.loc[fallback, 'geo_source'] = 'nearest'
+        if logger:
+            logger.info(f"Spatial fallback located {int(fallback.sum())} POIs without an address match")
+
+    result = gpd.GeoDataFrame(result.drop(columns='geometry', errors='ignore'),
+                              geometry=points, crs=streets_gdf.crs)
+    if logger:
+        logger.info(f"{len(result)} POIs processed ({int(matched.sum())} matched)")
+    return result
+
+def _link_ids(street_index, positions):
+    if not len(street_index):
+        return np.full(len(positions), None, dtype=object)
+    return np.where(positions >= 0, street_index.link_id[np.maximum(positions, 0)], None)
+
+def _geocode_pois_legacy(pois_df, streets_gdf, street_index, logger=None):
     geocoded = []
     for idx, poi in pois_df.iterrows():
-        street_name = str(poi['st_name']).strip().upper()
+        street_name = normalize_street_name(poi['st_name'])
         num_str = str(poi['st_num_ful']).replace('.0','').strip()
         try:
             poi_num = int(num_str)
         except:
             poi_num = np.nan
 
-        # Search street segment
-        segments = streets_gdf[streets_gdf['st_name'].str.upper().str.strip() == street_name]
-        if segments.empty:
-            geom = None
-        else:
-            # Search all segments and choose the first one that contains the number in its range
-            geom = None
-            for _, seg in segments.iterrows():
-                min_num = seg['l_nrefaddr'] if seg['l_nrefaddr'] else seg['r_nrefaddr']
-                max_num = seg['l_refaddr']  if seg['l_refaddr']  else seg['r_refaddr']
-                # Treat fields as numbers
-                try:
-                    min_num, max_num = int(min_num), int(max_num)
-                except:
-                    continue
-                if np.isnan(poi_num) or poi_num < min_num or poi_num > max_num:
-                    continue
-                geom = interpolate_point_on_line(seg.geometry, poi_num, min_num, max_num)
-                if geom:
-                    break
+        # Search all segments of the street and choose the first one that contains the number in its range
+        geom = None
+        for _, line, l_ref, l_nref, r_ref, r_nref in street_index.segments(street_name):
+            ref_num = _pick(l_ref, r_ref)
+            nref_num = _pick(l_nref, r_nref)
+            if np.isnan(ref_num) or np.isnan(nref_num):
+                continue
+            ref_num, nref_num = int(ref_num), int(nref_num)
+            # Ranges run either way; the point is measured from the reference node as in batch mode
+            if np.isnan(poi_num) or not min(ref_num, nref_num) <= poi_num <= max(ref_num, nref_num):
+                continue
+            geom = interpolate_point_on_line(line, poi_num, ref_num, nref_num)
+            if geom:
+                break
         row = poi.copy()
         row['geometry'] = geom if geom else None
         geocoded.append(row)
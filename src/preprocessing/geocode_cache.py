@@ -0,0 +1,218 @@
+# src/preprocessing/geocode_cache.py
+
+import os
+import glob
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "geocode")
+# Addresses kept in memory per street dataset
+CACHE_ENTRIES = int(os.environ.get("POI_GEOCODE_CACHE_SIZE", "2000000"))
+# Part files on disk before they are merged into one
+MAX_PARTS = 16
+# Caches of other versions of a streets directory unused this long are deleted
+STALE_AFTER = float(os.environ.get("POI_GEOCODE_CACHE_STALE_HOURS", "24")) * 3600
+VALUE_COLUMNS = ["link_id", "side", "x", "y"]
+
+def _empty_table():
+    index = pd.MultiIndex.from_arrays([np.array([], dtype=object), np.array([], dtype=float)],
+                                      names=["st_name", "st_num"])
+    return pd.DataFrame({"link_id": np.array([], dtype=object), "side": np.array([], dtype=object),
+                         "x": np.array([], dtype=float), "y": np.array([], dtype=float),
+                         "tick": np.array([], dtype=np.int64)}, index=index)
+
+class GeocodeCache:
+    """
+    Geocode results of one street dataset version, keyed by (normalized
+    st_name, parsed house number). Values are link_id, side and the point's
+    x/y, with link_id None for addresses that did not match.
+
+    The memory tier is a table indexed by address, so a whole batch of
+    addresses is looked up in one vectorized step; beyond `max_entries` the
+    least recently used addresses are dropped. With `path` (a directory)
+    new entries are also appended as Parquet part files, which the next
+    process loads in bulk on its first lookup. Counters (hits, misses,
+    entries loaded from disk) accumulate; stats() snapshots them.
+    """
+
+    def __init__(self, path=None, max_entries=CACHE_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._table = _empty_table()
+        self._tick = 0
+        self._loaded = path is None
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "loaded": 0}
+
+    def _parts(self):
+        return sorted(glob.glob(os.path.join(self.path, "part-*.parquet")))
+
+    def _read_parts(self, parts):
+        tables = []
+        for part in parts:
+            try:
+                tables.append(pq.read_table(part))
+            except FileNotFoundError:
+                pass  # merged and removed by another process's _compact meanwhile
+        if not tables:
+            return _empty_table()
+        table = pa.concat_tables(tables, promote_options="permissive")
+        frame = pd.DataFrame({
+            "st_name": table.column("st_name").to_numpy(zero_copy_only=False).astype(object),
+            "st_num": table.column("st_num").to_numpy(zero_copy_only=False),
+            # to_pylist keeps integer link_ids as int next to None
+            "link_id": np.array(table.column("link_id").to_pylist(), dtype=object),
+            "side": table.column("side").to_numpy(zero_copy_only=False).astype(object),
+            "x": table.column("x").to_numpy(zero_copy_only=False),
+            "y": table.column("y").to_numpy(zero_copy_only=False),
+        })
+        frame = frame.drop_duplicates(["st_name", "st_num"], keep="last")
+        return frame.set_index(["st_name", "st_num"]).assign(tick=np.int64(0))
+
+    def _load(self):
+        parts = self._parts()
+        self._table = self._read_parts(parts)
+        self.counters["loaded"] += len(self._table)
+        self._evict()
+        self._loaded = True
+        if len(parts) > MAX_PARTS:
+            self._compact(parts)
+
+    def _compact(self, parts):
+        merged = os.path.join(self.path, f"part-{uuid.uuid4().hex}.parquet")
+        self._write(self._read_parts(parts), merged)
+        for part in parts:
+            try:
+                os.remove(part)
+            except FileNotFoundError:
+                pass  # another process compacted the same parts
+
+    def _write(self, frame, path):
+        frame = frame.reset_index()
+        table = pa.table({
+            "st_name": pa.array(frame["st_name"], type=pa.string()),
+            "st_num": pa.array(frame["st_num"], type=pa.float64()),
+            "link_id": pa.array([v.item() if hasattr(v, "item") else v for v in frame["link_id"]]),
+            "side": pa.array(frame["side"], type=pa.string()),
+            "x": pa.array(frame["x"], type=pa.float64()),
+            "y": pa.array(frame["y"], type=pa.float64()),
+        })
+        pq.write_table(table, f"{path}.tmp", compression="zstd")
+        os.replace(f"{path}.tmp", path)
+
+    def _evict(self):
+        if len(self._table) > self.max_entries:
+            keep = np.argsort(self._table["tick"].to_numpy(), kind="stable")[-self.max_entries:]
+            self._table = self._table.iloc[np.sort(keep)]
+
+    def lookup(self, addresses):
+        """
+        Looks up a MultiIndex of distinct (st_name, st_num) addresses.
+        Returns (found mask, DataFrame of VALUE_COLUMNS aligned to addresses).
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            self._tick += 1
+            positions = self._table.index.get_indexer(addresses) if len(self._table) else np.full(len(addresses), -1)
+            found = positions >= 0
+            tick = self._table["tick"].to_numpy(copy=True)
+            tick[positions[found]] = self._tick
+            self._table["tick"] = tick
+            values = self._table[VALUE_COLUMNS].iloc[np.maximum(positions, 0)] if len(self._table) else None
+            self.counters["hits"] += int(found.sum())
+            self.counters["misses"] += int((~found).sum())
+        if values is None:
+            values = pd.DataFrame({c: np.full(len(addresses), None, dtype=object) for c in VALUE_COLUMNS})
+        return found, values.reset_index(drop=True)
+
+    def store(self, addresses, values):
+        """
+        Adds results for new addresses (a MultiIndex and a DataFrame of
+        VALUE_COLUMNS in the same order) to memory and disk.
+        """
+        if not len(addresses):
+            return
+        new = pd.DataFrame({c: values[c].to_numpy() for c in VALUE_COLUMNS},
+                           index=addresses.set_names(["st_name", "st_num"]))
+        with self._lock:
+            self._tick += 1
+            new["tick"] = np.int64(self._tick)
+            new = new[~new.index.isin(self._table.index)]
+            self._table = pd.concat([self._table, new]) if len(self._table) else new
+            self._evict()
+        if self.path and len(new):
+            os.makedirs(self.path, exist_ok=True)
+            self._write(new.drop(columns="tick"), os.path.join(self.path, f"part-{uuid.uuid4().hex}.parquet"))
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+def cache_summary(before, after):
+    """
+    Log line for the hits and misses between two stats() snapshots.
+    """
+    delta = {k: after[k] - before.get(k, 0) for k in after}
+    lookups = delta["hits"] + delta["misses"]
+    rate = f"{100 * delta['hits'] / lookups:.1f}%" if lookups else "n/a"
+    loaded = f", {delta['loaded']} entries loaded from disk" if delta["loaded"] else ""
+    return (f"Geocode cache: {delta['hits']} hits, {delta['misses']} misses over {lookups} distinct addresses, "
+            f"hit rate {rate}{loaded}")
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def _remove_stale(cache_dir, prefix, path, logger=None):
+    # Other versions of the directory may still be in use by another run (one
+    # on older code, or on the street files before an edit), so only caches
+    # nobody opened or wrote to within STALE_AFTER are removed
+    cutoff = time.time() - STALE_AFTER
+    for stale in glob.glob(os.path.join(cache_dir, f"{prefix}_*")):
+        try:
+            if stale != path and os.path.getmtime(stale) < cutoff:
+                shutil.rmtree(stale, ignore_errors=True)
+                if logger:
+                    logger.info(f"Stale geocode cache removed: {stale}")
+        except FileNotFoundError:
+            pass
+
+def open_geocode_cache(streets_dir, street_key, cache_dir=DEFAULT_CACHE_DIR, logger=None):
+    """
+    The process-wide GeocodeCache for one street dataset version, stored in
+    <cache_dir>/<dir hash>_<street key>_<code version>/. `street_key`
+    identifies the street data (street_data_key, the same for fast and
+    normal loads). The code version hashes the geocode stage's modules (see
+    stages.code_version), so a change to matching, interpolation or house
+    number parsing starts a new cache. Caches of other versions of the same
+    directory are deleted once unused for STALE_AFTER seconds.
+    """
+    # Imported here: the stage module list includes this module
+    from ..pipeline.stages import code_version
+
+    prefix = hashlib.sha1(os.path.abspath(streets_dir).encode("utf-8")).hexdigest()[:12]
+    version = f"{street_key}_{code_version('geocode')[:12]}"
+    path = os.path.join(cache_dir, f"{prefix}_{version}") if cache_dir else None
+    with _caches_lock:
+        cache = _caches.get((prefix, version))
+        if cache is None:
+            cache = GeocodeCache(path)
+            _caches[(prefix, version)] = cache
+            for stale_key in [k for k in _caches if k[0] == prefix and k[1] != version]:
+                del _caches[stale_key]
+            if path:
+                _remove_stale(cache_dir, prefix, path, logger)
+            if logger:
+                logger.info(f"Geocode cache opened: {path or 'memory only'}")
+        if path:
+            # Every open marks the cache as in use for _remove_stale
+            os.makedirs(path, exist_ok=True)
+            os.utime(path)
+    return cache
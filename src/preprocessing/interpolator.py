@@ -1,12 +1,16 @@
 import numpy as np
 from shapely.geometry import LineString, Point
 
-def interpolate_point_on_line(line: LineString, num, min_num, max_num):
+def interpolate_point_on_line(line: LineString, num, ref_num, nref_num):
     """
-    Interpolates a point on the line using the number 'num' in the range [min_num, max_num]
+    Interpolates a point on the line for the number 'num', measured from the
+    reference node (address ref_num, the line's start) towards nref_num, as
+    the batch geocoder does. A range with one address gives the midpoint.
     """
-    if np.isnan(num) or np.isnan(min_num) or np.isnan(max_num) or min_num == max_num:
+    if np.isnan(num) or np.isnan(ref_num) or np.isnan(nref_num):
         return None
-    frac = (num - min_num) / (max_num - min_num)
+    if ref_num == nref_num:
+        return line.interpolate(0.5, normalized=True)
+    frac = (num - ref_num) / (nref_num - ref_num)
     frac = max(0, min(frac, 1))  # Clamp to [0,1]
     return line.interpolate(frac, normalized=True)
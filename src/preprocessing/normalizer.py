@@ -2,12 +2,48 @@
 
 import geopandas as gpd
 import pandas as pd
+import numpy as np
 import logging
 
-def normalize_pois(df: pd.DataFrame, logger: logging.Logger = None) -> gpd.GeoDataFrame:
+# String columns with fewer distinct values than this share of rows become
+# categoricals in compact mode
+CATEGORY_RATIO = 0.5
+# Values the fixer may write into a categorical column
+EXTRA_CATEGORIES = {"poi_st_sd": ["L", "R"]}
+
+def compact_dtypes(df: pd.DataFrame, logger: logging.Logger = None) -> pd.DataFrame:
+    """
+    Shrinks a POI frame in memory: low-cardinality string columns (st_name,
+    poi_st_sd, source_file, ...) become categoricals and integer columns
+    (poi_id, link_id, numeric st_num_ful) are downcast to the smallest
+    integer type holding their values. Floats and geometry are left as is.
+    """
+    before = df.memory_usage(deep=True).sum()
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_integer_dtype(values.dtype) and not isinstance(values.dtype, pd.CategoricalDtype):
+            columns[col] = pd.to_numeric(values, downcast="integer")
+        elif values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+            if isinstance(values.dtype, gpd.array.GeometryDtype) or not len(values):
+                continue
+            if values.nunique(dropna=True) < CATEGORY_RATIO * len(values):
+                values = values.astype("category")
+                missing = [v for v in EXTRA_CATEGORIES.get(col, []) if v not in values.cat.categories]
+                columns[col] = values.cat.add_categories(missing) if missing else values
+    if columns:
+        df = df.assign(**columns)
+    if logger:
+        after = df.memory_usage(deep=True).sum()
+        logger.info(f"Compact dtypes: {before / 1024 ** 2:.1f} MB -> {after / 1024 ** 2:.1f} MB "
+                    f"(categorical: {[c for c in columns if isinstance(df[c].dtype, pd.CategoricalDtype)]})")
+    return df
+
+def normalize_pois(df: pd.DataFrame, logger: logging.Logger = None, compact: bool = False) -> gpd.GeoDataFrame:
     """
     Standardizes POI columns and prepares for geocoding.
     It doesn't create geometry here; it just normalizes names and cleans up nulls/duplicates.
+    With compact=True the result goes through compact_dtypes.
     """
     # Standardize names to lowercase and remove spaces
     df = df.rename(columns={c: c.strip().lower().replace(" ", "_") for c in df.columns})
@@ -18,6 +54,9 @@ def normalize_pois(df: pd.DataFrame, logger: logging.Logger = None) -> gpd.GeoDa
     df = df.drop_duplicates()
     df = df.dropna(subset=["st_name"]) 
 
+    if compact:
+        df = compact_dtypes(df, logger)
+
     # Returns DataFrame for further geocoding
     return df
 
@@ -0,0 +1,190 @@
+# src/preprocessing/parallel_geocode.py
+
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import shapely
+
+SIDES = np.array([None, "L", "R"], dtype=object)
+
+
+def _to_shared(arrays):
+    """
+    Copies numpy arrays into shared memory blocks.
+    Returns (blocks, spec) where spec is the picklable {name: (shm name, dtype, shape)}.
+    """
+    blocks, spec = [], {}
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+        blocks.append(shm)
+        spec[name] = (shm.name, arr.dtype.str, arr.shape)
+    return blocks, spec
+
+
+def _pack_bytes(items):
+    lengths = np.fromiter((len(b) for b in items), dtype=np.int64, count=len(items))
+    offsets = np.zeros(len(items) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return np.frombuffer(b"".join(items), dtype=np.uint8), offsets
+
+
+class SharedStreetIndex:
+    """
+    Read-only copy of a StreetIndex in shared memory, for geocoding workers.
+
+    Holds the street names, the sorted left/right address intervals and the
+    segment geometries as WKB. Workers attach to the blocks by name instead
+    of receiving a pickled copy of the street table.
+    """
+
+    def __init__(self, street_index):
+        names_buf, names_off = _pack_bytes([n.encode("utf-8") for n in street_index.name_lookup])
+        wkb_buf, wkb_off = _pack_bytes(list(shapely.to_wkb(street_index.geometry)) if len(street_index) else [])
+        arrays = {"names": names_buf, "names_off": names_off, "wkb": wkb_buf, "wkb_off": wkb_off}
+        for side in ("L", "R"):
+            for key, arr in zip(("code", "low", "high", "ref", "nref", "pos"), street_index.side_intervals(side)):
+                arrays[f"{side}_{key}"] = arr
+        self._blocks, self.spec = _to_shared(arrays)
+
+    def close(self):
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _AttachedIndex:
+    """
+    Worker-side view over a SharedStreetIndex, with the attributes the
+    batch matcher in geocode.py needs.
+    """
+
+    def __init__(self, spec):
+        self._blocks = []
+        arrays = {}
+        for name, (shm_name, dtype, shape) in spec.items():
+            # Spawned workers share the parent's resource tracker, so the
+            # parent's unlink in SharedStreetIndex.close() cleans these up
+            shm = shared_memory.SharedMemory(name=shm_name)
+            self._blocks.append(shm)
+            arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        self.arrays = arrays
+        buf, off = arrays["names"].tobytes(), arrays["names_off"]
+        self.name_lookup = pd.Index([buf[off[i]:off[i + 1]].decode("utf-8") for i in range(len(off) - 1)], dtype=object)
+
+    def codes_for(self, names):
+        return self.name_lookup.get_indexer(pd.Index(names, dtype=object))
+
+    def side_intervals(self, side):
+        a = self.arrays
+        return tuple(a[f"{side}_{key}"] for key in ("code", "low", "high", "ref", "nref", "pos"))
+
+    def geometries(self, positions):
+        buf, off = self.arrays["wkb"], self.arrays["wkb_off"]
+        return shapely.from_wkb([buf[off[p]:off[p + 1]].tobytes() for p in positions])
+
+
+_worker_index = None
+
+
+def _init_worker(spec):
+    global _worker_index
+    _worker_index = _AttachedIndex(spec)
+
+
+def _geocode_chunk(chunk):
+    from .geocode import match_addresses
+
+    names, numbers = chunk
+    positions, fractions, sides = match_addresses(_worker_index, names, numbers)
+    matched = positions >= 0
+    x = np.full(len(positions), np.nan)
+    y = np.full(len(positions), np.nan)
+    if matched.any():
+        # Decode only the segments this chunk actually hit
+        unique_pos, inverse = np.unique(positions[matched], return_inverse=True)
+        lines = _worker_index.geometries(unique_pos)[inverse]
+        points = shapely.line_interpolate_point(lines, fractions[matched], normalized=True)
+        x[matched], y[matched] = shapely.get_x(points), shapely.get_y(points)
+    side_codes = np.select([sides == "L", sides == "R"], [1, 2], 0).astype(np.int8)
+    return positions, fractions, side_codes, x, y
+
+
+class GeocodePool:
+    """
+    A spawn-context process pool whose workers are attached to one
+    SharedStreetIndex, kept for a whole run. Pipelines that geocode chunk by
+    chunk pass it to every geocode_pois call, so worker startup and the index
+    export are paid once per run instead of once per chunk. Both are created
+    on first use; close() (or leaving the `with` block) releases them.
+    """
+
+    def __init__(self, street_index, workers):
+        self.street_index = street_index
+        self.workers = workers
+        self._shared = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._shared = SharedStreetIndex(self.street_index)
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context("spawn"),
+                                                     initializer=_init_worker, initargs=(self._shared.spec,))
+            return self._executor
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._shared.close()
+            self._executor = self._shared = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def geocode_parallel(street_index, street_names, house_numbers, workers, chunk_size=50000, logger=None, pool=None):
+    """
+    Matches and interpolates POIs in a process pool sharing the street index.
+    POIs are split into chunks and results are merged back in input order.
+    `pool` (a GeocodePool over the same street index) is reused as is;
+    without one a pool is started and shut down for this call.
+    Returns (positions, fractions, sides, points) like the serial batch path.
+    """
+    if pool is None:
+        with GeocodePool(street_index, workers) as pool:
+            return geocode_parallel(street_index, street_names, house_numbers, workers, chunk_size, logger, pool)
+
+    names = np.asarray(street_names, dtype=object)
+    numbers = np.asarray(house_numbers, dtype=object)
+    n_chunks = max(1, int(np.ceil(len(names) / chunk_size)))
+    chunks = [(names[s], numbers[s]) for s in np.array_split(np.arange(len(names)), n_chunks)]
+    results = list(pool.executor().map(_geocode_chunk, chunks))
+
+    if not results:
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0, dtype=object), np.empty(0, dtype=object)
+    positions, fractions, side_codes, x, y = (np.concatenate(parts) for parts in zip(*results))
+    points = np.full(len(positions), None, dtype=object)
+    matched = positions >= 0
+    points[matched] = shapely.points(x[matched], y[matched])
+    if logger:
+        logger.info(f"Parallel geocoding: {len(chunks)} chunks on {pool.workers} workers")
+    return positions, fractions, SIDES[side_codes], points
@@ -0,0 +1,72 @@
+# src/preprocessing/spatial.py
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from ..data_loader.data_loader import find_coord_columns
+
+# Step (as a fraction of segment length) used to read the digitizing direction
+_DIRECTION_STEP = 1e-3
+
+def poi_points(pois_df, crs=None):
+    """
+    Returns the POIs' own locations as an array of points (None where missing),
+    from a point geometry column or from lat/lon columns; None if the POIs
+    carry no coordinates at all.
+    """
+    if isinstance(pois_df, gpd.GeoDataFrame) and pois_df.geometry.name in pois_df.columns:
+        points = pois_df.geometry
+    else:
+        lat, lon = find_coord_columns(pois_df)
+        if not (lat and lon):
+            return None
+        x = pd.to_numeric(pois_df[lon], errors="coerce").to_numpy(dtype=float)
+        y = pd.to_numeric(pois_df[lat], errors="coerce").to_numpy(dtype=float)
+        points = gpd.GeoSeries(shapely.points(x, y), index=pois_df.index, crs="EPSG:4326")
+        points[np.isnan(x) | np.isnan(y)] = None
+    if crs is not None and points.crs is not None and points.crs != crs:
+        points = points.to_crs(crs)
+    values = np.asarray(points.values, dtype=object)
+    values[~shapely.is_valid_input(values) | shapely.is_empty(values)] = None
+    return values
+
+def nearest_segments(street_index, points, max_distance=None):
+    """
+    Bulk nearest-segment search over an STRtree of the street segments.
+
+    For each point returns the segment position in the street index (-1 if
+    none), the side of the segment it lies on ('L'/'R', relative to the
+    digitizing direction, i.e. from the reference node) and its fractional
+    position along the segment (0..1 from the reference node).
+    `max_distance` (in CRS units) bounds the search; farther points get no segment.
+    """
+    points = np.asarray(points, dtype=object)
+    n = len(points)
+    positions = np.full(n, -1, dtype=np.int64)
+    fractions = np.full(n, np.nan)
+    sides = np.full(n, None, dtype=object)
+    valid = np.flatnonzero(pd.notna(points))
+    if not len(valid) or not len(street_index):
+        return positions, fractions, sides
+
+    pairs = street_index.spatial_tree().query_nearest(points[valid], max_distance=max_distance)
+    # Equidistant ties return several segments per point: keep the first
+    first = np.unique(pairs[0], return_index=True)[1]
+    rows, segs = valid[pairs[0][first]], pairs[1][first]
+
+    lines = street_index.geometry[segs]
+    pts = points[rows]
+    frac = shapely.line_locate_point(lines, pts, normalized=True)
+    # Direction of the segment at the projected point, read forwards (or backwards at its end)
+    step = np.where(frac + _DIRECTION_STEP <= 1, _DIRECTION_STEP, -_DIRECTION_STEP)
+    here = shapely.line_interpolate_point(lines, frac, normalized=True)
+    ahead = shapely.line_interpolate_point(lines, frac + step, normalized=True)
+    dx = (shapely.get_x(ahead) - shapely.get_x(here)) * np.sign(step)
+    dy = (shapely.get_y(ahead) - shapely.get_y(here)) * np.sign(step)
+    cross = dx * (shapely.get_y(pts) - shapely.get_y(here)) - dy * (shapely.get_x(pts) - shapely.get_x(here))
+
+    positions[rows] = segs
+    fractions[rows] = frac
+    sides[rows] = np.where(cross >= 0, "L", "R")
+    return positions, fractions, sides
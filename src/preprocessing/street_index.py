@@ -0,0 +1,134 @@
+# src/preprocessing/street_index.py
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+from shapely import STRtree
+
+ADDRESS_COLUMNS = ["l_refaddr", "l_nrefaddr", "r_refaddr", "r_nrefaddr"]
+
+
+def normalize_street_name(name) -> str:
+    """
+    Normalizes a street name the same way for POIs and street segments.
+    """
+    if name is None or (isinstance(name, float) and np.isnan(name)):
+        return ""
+    return str(name).strip().upper()
+
+
+class StreetIndex:
+    """
+    Street segments grouped by normalized street name.
+
+    Segments are sorted by name once, so every street is a contiguous block
+    of rows; lookups return that block in constant time instead of scanning
+    the whole street table per POI.
+    """
+
+    def __init__(self, streets_gdf: gpd.GeoDataFrame):
+        streets = streets_gdf.rename(columns={c: c.strip().lower() for c in streets_gdf.columns})
+        if "st_name" in streets.columns:
+            names = streets["st_name"].astype("string").str.strip().str.upper().fillna("")
+        else:
+            names = pd.Series("", index=streets.index, dtype="string")
+        order = np.argsort(names.to_numpy(dtype=object), kind="stable")
+
+        self.crs = streets_gdf.crs
+        self.names = names.to_numpy(dtype=object)[order]
+        self.row_index = streets.index.to_numpy()[order]
+        self.geometry = np.asarray(streets.geometry.values, dtype=object)[order] if len(streets) else np.array([], dtype=object)
+        for col in ADDRESS_COLUMNS:
+            values = streets[col] if col in streets.columns else pd.Series(np.nan, index=streets.index)
+            setattr(self, col, pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)[order])
+        if "link_id" in streets.columns:
+            self.link_id = streets["link_id"].to_numpy()[order]
+        else:
+            self.link_id = np.full(len(streets), None, dtype=object)
+
+        # name -> (start, stop) into the sorted arrays
+        self.blocks = {}
+        self.name_codes = np.zeros(len(self.names), dtype=np.int64)
+        self.name_lookup = pd.Index([], dtype=object)
+        if len(self.names):
+            unique, starts, inverse, counts = np.unique(self.names, return_index=True, return_inverse=True, return_counts=True)
+            codes = inverse.astype(np.int64)
+            if unique[0] == "":
+                # Nameless segments (sorted first) belong to no street: code -1,
+                # so a blank POI name cannot match them
+                unique, starts, counts = unique[1:], starts[1:], counts[1:]
+                codes -= 1
+            self.blocks = {name: (int(s), int(s + c)) for name, s, c in zip(unique, starts, counts)}
+            self.name_codes = codes
+            self.name_lookup = pd.Index(unique, dtype=object)
+        self._intervals = {}
+        self._tree = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return normalize_street_name(name) in self.blocks
+
+    def block(self, name):
+        """
+        Returns the (start, stop) slice of the segments of a street, or None.
+        """
+        return self.blocks.get(normalize_street_name(name))
+
+    def codes_for(self, names) -> np.ndarray:
+        """
+        Maps already-normalized street names to street codes (-1 when unknown).
+        """
+        return self.name_lookup.get_indexer(pd.Index(names, dtype=object))
+
+    def side_intervals(self, side: str):
+        """
+        Address ranges of one side ('L' or 'R') as arrays sorted by
+        (street code, lowest address): (code, low, high, ref, nref, position).
+        Segments without a complete range on that side, or without a name,
+        are left out.
+        """
+        if side not in self._intervals:
+            prefix = side.lower()
+            ref = getattr(self, f"{prefix}_refaddr")
+            nref = getattr(self, f"{prefix}_nrefaddr")
+            valid = ~(np.isnan(ref) | np.isnan(nref)) & (self.name_codes >= 0)
+            pos = np.flatnonzero(valid)
+            low = np.minimum(ref[pos], nref[pos])
+            high = np.maximum(ref[pos], nref[pos])
+            codes = self.name_codes[pos]
+            order = np.lexsort((low, codes))
+            self._intervals[side] = (codes[order], low[order], high[order],
+                                     ref[pos][order], nref[pos][order], pos[order])
+        return self._intervals[side]
+
+    def spatial_tree(self) -> STRtree:
+        """
+        STRtree over the segment geometries (tree indices are index positions), built on first use.
+        """
+        if self._tree is None:
+            self._tree = STRtree(self.geometry)
+        return self._tree
+
+    def segments(self, name):
+        """
+        Yields (position, geometry, l_refaddr, l_nrefaddr, r_refaddr, r_nrefaddr)
+        for every segment of the given street.
+        """
+        block = self.block(name)
+        if block is None:
+            return
+        for pos in range(*block):
+            yield (pos, self.geometry[pos], self.l_refaddr[pos], self.l_nrefaddr[pos],
+                   self.r_refaddr[pos], self.r_nrefaddr[pos])
+
+
+def build_street_index(streets_gdf: gpd.GeoDataFrame, logger=None) -> StreetIndex:
+    """
+    Builds the street-name index once per run.
+    """
+    index = StreetIndex(streets_gdf)
+    if logger:
+        logger.info(f"Street index built: {len(index.blocks)} streets, {len(index)} segments")
+    return index
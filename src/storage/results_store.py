@@ -0,0 +1,227 @@
+# src/storage/results_store.py
+
+import os
+import glob
+import json
+import threading
+from urllib.parse import quote
+import pandas as pd
+import geopandas as gpd
+import shapely
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+from ..data_loader.data_loader import POI_SCHEMA
+
+DEFAULT_RESULTS_DIR = os.path.join("output", "results")
+TABLES = ("pois_geo", "validation", "pois_fixed")
+COMPRESSION = "zstd"
+PARTITIONING = ds.partitioning(pa.schema([("run_date", pa.string()), ("source_file", pa.string())]), flavor="hive")
+# Files of one run are named <run_id>-<part>.parquet, so several runs of a
+# day share a partition and every chunk of a run gets its own file
+PART_NAME = "{run_id}-{part:05d}.parquet"
+# POI columns are stored with one type whatever a run's loader inferred
+# (e.g. st_num_ful is float after a plain read_csv, text with --fast_load)
+STORED_TYPES = {col: {"Int64": pa.int64(), "float64": pa.float64()}.get(dtype, pa.large_string())
+                for col, dtype in POI_SCHEMA.items()}
+
+def _arrow_table(frame):
+    """
+    Converts a (Geo)DataFrame to Arrow, the geometry as WKB with GeoParquet
+    metadata. Object columns Arrow cannot type (mixed values) become strings;
+    categoricals are stored as plain values (Parquet dictionary-encodes them
+    anyway) so chunks with different categories share one schema. POI
+    columns are cast to STORED_TYPES, or to strings when their values do
+    not fit (e.g. a text percfrref).
+    """
+    frame = pd.DataFrame(frame)
+    geo_col = next((c for c in frame.columns if isinstance(frame[c].dtype, gpd.array.GeometryDtype)), None)
+    metadata = {}
+    if geo_col:
+        geometry = gpd.GeoSeries(frame[geo_col])
+        crs = geometry.crs
+        metadata[b"geo"] = json.dumps({
+            "version": "1.0.0",
+            "primary_column": geo_col,
+            "columns": {geo_col: {
+                "encoding": "WKB",
+                "geometry_types": sorted(t for t in geometry.geom_type.dropna().unique()),
+                "crs": crs.to_json_dict() if crs else None,
+            }},
+        }).encode("utf-8")
+        frame[geo_col] = shapely.to_wkb(geometry.to_numpy())
+    arrays = {}
+    for col in frame.columns:
+        try:
+            arrays[col] = pa.array(frame[col], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            arrays[col] = pa.array(frame[col].astype("string"), from_pandas=True)
+        if pa.types.is_dictionary(arrays[col].type):
+            arrays[col] = arrays[col].dictionary_decode()
+        if col in STORED_TYPES and arrays[col].type != STORED_TYPES[col]:
+            try:
+                arrays[col] = arrays[col].cast(STORED_TYPES[col])
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                arrays[col] = arrays[col].cast(pa.large_string())
+    table = pa.table(arrays)
+    return table.replace_schema_metadata(metadata) if metadata else table
+
+def source_files_of(pois):
+    """
+    poi_id -> source_file lookup for write_results, from a frame that has
+    both columns (None when it has no source_file, e.g. a test CSV).
+    """
+    if pois is None or "source_file" not in pois.columns:
+        return None
+    return pois.drop_duplicates("poi_id").set_index("poi_id")["source_file"]
+
+def write_results(results_dir, run_id, run_date, frames, source_files=None, part=0, logger=None):
+    """
+    Writes result tables as compressed (Geo)Parquet, partitioned Hive style:
+    <results_dir>/<table>/run_date=<YYYYMMDD>/source_file=<file>/<run_id>-<part>.parquet
+
+    `frames` maps a table name (see TABLES) to its frame; None frames are
+    skipped. Frames without a source_file column (validation results) take
+    it from `source_files`, a poi_id -> source_file Series. Every row gets a
+    run_id column. Call again with the next `part` to append a chunk.
+    Returns the paths written.
+    """
+    written = []
+    for table_name, frame in frames.items():
+        if frame is None:
+            continue
+        frame = frame.assign(run_id=run_id)
+        if "source_file" in frame.columns:
+            sources = frame["source_file"]
+        elif source_files is not None:
+            sources = frame["poi_id"].map(source_files)
+        else:
+            sources = pd.Series(None, index=frame.index, dtype=object)
+        sources = sources.astype(object).where(sources.notna(), "__unknown__")
+        frame = frame.drop(columns=["source_file"], errors="ignore")
+        for source_file, group in frame.groupby(sources.to_numpy(), sort=False):
+            partition = os.path.join(results_dir, table_name, f"run_date={run_date}",
+                                     f"source_file={quote(str(source_file), safe='')}")
+            os.makedirs(partition, exist_ok=True)
+            path = os.path.join(partition, PART_NAME.format(run_id=run_id, part=part))
+            pq.write_table(_arrow_table(group.reset_index(drop=True)), path, compression=COMPRESSION)
+            written.append(path)
+    if logger:
+        logger.info(f"Results part {part} of {run_id} written to {results_dir} ({len(written)} files)")
+    return written
+
+def _unify(schemas):
+    """
+    Unifies the schemas of different runs/chunks (e.g. a column that was all
+    null in one chunk). Fields whose types cannot be merged, such as numbers
+    in one run and text in another, are read as strings.
+    """
+    try:
+        return pa.unify_schemas(schemas, promote_options="permissive")
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        pass
+    fields = {}
+    for schema in schemas:
+        for field in schema:
+            fields.setdefault(field.name, []).append(field.type)
+    merged = []
+    for name, types in fields.items():
+        try:
+            merged.append(pa.unify_schemas([pa.schema([(name, t)]) for t in types], promote_options="permissive")[0])
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            merged.append(pa.field(name, pa.large_string()))
+    metadata = next((schema.metadata for schema in schemas if schema.metadata), None)
+    return pa.schema(merged, metadata=metadata)
+
+# table directory -> (files covered, their unified schema)
+_schemas = {}
+_schemas_lock = threading.Lock()
+
+def _table_schema(table_dir, files):
+    """
+    Unified schema of a table's part files. Footers are read once per file
+    and process: later queries only read the parts added since.
+    """
+    key, files = os.path.abspath(table_dir), frozenset(files)
+    with _schemas_lock:
+        known, schema = _schemas.get(key, (frozenset(), None))
+    if not known <= files:
+        known, schema = frozenset(), None  # parts were removed
+    new = sorted(files - known)
+    if new or schema is None:
+        schema = _unify(([schema] if schema is not None else []) + [pq.read_schema(f, memory_map=True) for f in new])
+        with _schemas_lock:
+            _schemas[key] = (files, schema)
+    return schema
+
+def _dataset(results_dir, table_name):
+    table_dir = os.path.join(results_dir, table_name)
+    files = glob.glob(os.path.join(table_dir, "run_date=*", "source_file=*", "*.parquet"))
+    if not files:
+        return None
+    # Memory-mapped reads over the unified schema of all runs/chunks
+    local = fs.LocalFileSystem(use_mmap=True)
+    schema = pa.unify_schemas([_table_schema(table_dir, files), PARTITIONING.schema])
+    return ds.dataset(files, schema=schema, format="parquet", filesystem=local,
+                      partitioning=PARTITIONING, partition_base_dir=table_dir)
+
+def read_results(results_dir=DEFAULT_RESULTS_DIR, table="validation", run_id=None, run_date=None,
+                 source_file=None, violation_codes=None, poi_ids=None, columns=None, limit=None):
+    """
+    Reads one results table, pushing the filters down to Parquet: run_date
+    and source_file prune whole partitions, run_id, violation_codes (for the
+    validation table) and poi_ids skip row groups by their statistics.
+    Each filter is a single value or a list. Only `columns` are read when
+    given. Returns a GeoDataFrame for tables with geometry, else a DataFrame.
+    """
+    dataset = _dataset(results_dir, table)
+    if dataset is None:
+        return pd.DataFrame(columns=columns or [])
+
+    condition = None
+    for field, value in (("run_id", run_id), ("run_date", run_date), ("source_file", source_file),
+                         ("violation_code", violation_codes), ("poi_id", poi_ids)):
+        if value is None:
+            continue
+        values = [value] if isinstance(value, (str, int)) else list(value)
+        if field == "run_date":
+            values = [str(v) for v in values]
+        expr = ds.field(field).isin(values)
+        condition = expr if condition is None else condition & expr
+
+    if limit is not None:
+        scanned = dataset.scanner(columns=columns, filter=condition).head(int(limit))
+    else:
+        scanned = dataset.to_table(columns=columns, filter=condition)
+
+    frame = scanned.to_pandas()
+    geo = _geo_metadata(dataset)
+    geo_col = geo.get("primary_column") if geo else None
+    if geo_col and geo_col in frame.columns:
+        crs = geo["columns"][geo_col].get("crs")
+        frame[geo_col] = gpd.GeoSeries.from_wkb(frame[geo_col], index=frame.index)
+        return gpd.GeoDataFrame(frame, geometry=geo_col, crs=json.dumps(crs) if crs else None)
+    return frame
+
+def _geo_metadata(dataset):
+    metadata = dataset.schema.metadata or {}
+    if b"geo" in metadata:
+        return json.loads(metadata[b"geo"])
+    for fragment in dataset.get_fragments():
+        fragment_metadata = fragment.physical_schema.metadata or {}
+        if b"geo" in fragment_metadata:
+            return json.loads(fragment_metadata[b"geo"])
+        break
+    return None
+
+def list_runs(results_dir=DEFAULT_RESULTS_DIR):
+    """
+    Run ids and dates with stored results, read from the file names only.
+    """
+    runs = {}
+    for path in glob.glob(os.path.join(results_dir, "*", "run_date=*", "source_file=*", "*.parquet")):
+        run_id = os.path.basename(path).rsplit("-", 1)[0]
+        run_date = os.path.basename(os.path.dirname(os.path.dirname(path))).split("=", 1)[1]
+        runs.setdefault(run_id, run_date)
+    return [{"run_id": run_id, "run_date": run_date} for run_id, run_date in sorted(runs.items(), reverse=True)]
@@ -0,0 +1,142 @@
+# src/test/test_api_online.py
+
+import sys
+import os
+import json
+import pandas as pd
+import geopandas as gpd
+import pytest
+from shapely.geometry import LineString
+from fastapi.testclient import TestClient
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from api.app import app
+from src.preprocessing.geocode import geocode_pois
+from src.preprocessing.normalizer import normalize_streets
+
+client = TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def streets_dir(tmp_path_factory):
+    path = tmp_path_factory.mktemp("streets")
+    gpd.GeoDataFrame({
+        'link_id': [1100, 1200],
+        'ST_NAME': ['MAIN ST', 'OAK AVE'],
+        'L_REFADDR': [1, 100], 'L_NREFADDR': [99, 200],
+        'R_REFADDR': [2, None], 'R_NREFADDR': [100, None],
+        'MULTIDIGIT': ['Y', 'N'],
+    }, geometry=[LineString([(0, 0), (0.01, 0)]), LineString([(0, 0.01), (0.01, 0.01)])],
+        crs="EPSG:4326").to_file(path / "streets.geojson", driver="GeoJSON")
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def cache_in_tmp(tmp_path, monkeypatch):
+    # Street and geocode caches go under the working directory
+    monkeypatch.chdir(tmp_path)
+
+
+def _validate(streets_dir, records, fix=True):
+    response = client.post("/validate", params={"fix": fix}, json={"records": records, "streets_dir": streets_dir})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_validate_empty_batch(streets_dir):
+    assert _validate(streets_dir, []) == {"records": 0, "violation_counts": {}, "results": []}
+
+
+def test_validate_missing_fields(streets_dir):
+    body = _validate(streets_dir, [{}, {"poi_name": "Cafe"}])
+    assert [r["violation_code"] for r in body["results"]] == ["DELETE", "UPDATE_SIDE"]
+    assert body["results"][0]["fixed"] is None
+
+
+def test_validate_non_numeric_percfrref(streets_dir):
+    body = _validate(streets_dir, [
+        {"poi_name": "Cafe", "link_id": 1200, "poi_st_sd": "L", "percfrref": "abc"},
+        {"poi_name": "Shop", "link_id": 1200, "poi_st_sd": "L", "percfrref": 20},
+        {"poi_name": "Bank", "link_id": 1200, "poi_st_sd": "L", "percfrref": [20]},
+    ])
+    results = body["results"]
+    assert results[0]["violation_code"] == "FIX_PERCFRREF"
+    assert results[0]["fixed"]["percfrref"] == 50
+    assert results[1]["violation_code"] == "LEGIT_EXCEPTION"
+    assert results[1]["fixed"]["percfrref"] == 20
+    assert results[2]["fixed"]["percfrref"] == 50
+
+
+def test_validate_string_link_ids(streets_dir):
+    records = [
+        {"poi_name": "Cafe", "link_id": "1200", "poi_st_sd": "L", "percfrref": 20},
+        {"poi_name": "Shop", "link_id": 1200, "poi_st_sd": "L", "percfrref": 20},
+        {"poi_name": "Bank", "link_id": "L-7", "poi_st_sd": "L", "percfrref": 20},
+        {"poi_name": "Bar", "link_id": {"id": 1200}, "poi_st_sd": "L", "percfrref": 20},
+    ]
+    results = _validate(streets_dir, records)["results"]
+    assert [r["violation_code"] for r in results] == ["LEGIT_EXCEPTION", "LEGIT_EXCEPTION",
+                                                      "UPDATE_SIDE", "UPDATE_SIDE"]
+    # Records come back as sent
+    assert results[0]["link_id"] == "1200"
+    assert results[2]["fixed"]["link_id"] == "L-7"
+
+
+def test_validate_multidigit_street_fix(streets_dir):
+    result = _validate(streets_dir, [{"poi_name": "Cafe", "link_id": 1100, "poi_st_sd": "L", "percfrref": 150}])
+    assert result["results"][0]["violation_code"] == "FIX_MULTIDIGIT"
+    assert result["results"][0]["street_fix"] == {"link_id": 1100, "multidigit": "N"}
+
+
+def test_geocode_missing_and_non_scalar_fields(streets_dir):
+    response = client.post("/geocode", json={"records": [
+        {"st_name": "Main St", "st_num_ful": "50"},
+        {},
+        {"st_name": ["MAIN ST"], "st_num_ful": {"n": 50}},
+    ], "streets_dir": streets_dir})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["matched"] == 1
+    assert [r["link_id"] for r in body["results"]] == [1100, None, None]
+
+
+def test_unreadable_body_and_unknown_streets_dir(streets_dir):
+    assert client.post("/validate", content=b"{not json").status_code == 400
+    assert client.post("/validate", json={"records": [1, 2]}).status_code == 400
+    assert client.post("/validate", json={"records": [], "streets_dir": "no/such/dir"}).status_code == 404
+
+
+def test_geocode_matches_the_pipeline(streets_dir):
+    records = [{"poi_id": 1, "st_name": "MAIN ST", "st_num_ful": 50}, {"st_name": "oak ave", "st_num_ful": 150},
+               {"st_name": "MAIN ST", "st_num_ful": 5000}]
+    response = client.post("/geocode", json=records, params={"streets_dir": streets_dir})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["crs"] == "EPSG:4326" and body["records"] == 3 and body["matched"] == 2
+    results = body["results"]
+    assert results[0]["poi_id"] == 1 and [r["link_id"] for r in results] == [1100, 1200, None]
+    assert [r["side"] for r in results[:2]] == ["L", "L"] and results[2]["x"] is None
+
+    pois = pd.DataFrame(records)
+    streets = normalize_streets(gpd.read_file(os.path.join(streets_dir, "streets.geojson")))
+    expected = geocode_pois(pois, streets, spatial=False)
+    assert results[0]["x"] == pytest.approx(expected.geometry[0].x)
+    assert results[1]["y"] == pytest.approx(expected.geometry[1].y)
+
+
+def test_geocode_ndjson(streets_dir):
+    lines = b'{"st_name": "MAIN ST", "st_num_ful": 50}\n\n{"st_name": "ELM ST", "st_num_ful": 1}\n'
+    response = client.post("/geocode", content=lines, params={"streets_dir": streets_dir},
+                           headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["matched"] for r in results] == [True, False]
+
+    # A JSON request answered in NDJSON when asked for it
+    response = client.post("/geocode", json={"records": [{"st_name": "MAIN ST", "st_num_ful": 50}],
+                                             "streets_dir": streets_dir},
+                           headers={"Accept": "application/x-ndjson"})
+    assert json.loads(response.text.strip())["link_id"] == 1100
+    assert client.post("/geocode", content=b"{not json\n", params={"streets_dir": streets_dir},
+                       headers={"Content-Type": "application/x-ndjson"}).status_code == 400
@@ -0,0 +1,61 @@
+# src/test/test_benchmark.py
+
+import sys
+import os
+import json
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.benchmark.run_benchmark import parse_size, compare_results, main
+from src.benchmark.synthetic import write_dataset
+
+
+def _results(stages, end_to_end, size="1k"):
+    return {"sizes": {size: {"stages": [{"stage": s, "wall_s": t} for s, t in stages.items()],
+                             "end_to_end_s": end_to_end}}}
+
+
+def test_parse_size():
+    assert [parse_size(s) for s in ("1k", " 10M", "2500", "1.5k")] == [1000, 10_000_000, 2500, 1500]
+
+
+def test_compare_results_flags_slower_stages():
+    baseline = _results({"geocode_pois": 1.0, "validate_pois": 1.0, "fix_pois": 0.01}, 3.0)
+    current = _results({"geocode_pois": 1.3, "validate_pois": 1.2, "fix_pois": 0.04, "new_stage": 5.0}, 3.5)
+    regressions = compare_results(current, baseline)
+    # 25% allowed; fix_pois stays under MIN_SECONDS and new_stage has no baseline
+    assert [(r["stage"], r["change"]) for r in regressions] == [("geocode_pois", 0.3)]
+    assert compare_results(current, baseline, threshold=0.1)[-1]["stage"] == "end_to_end"
+    assert compare_results(_results({"geocode_pois": 9.0}, 9.0, size="1M"), baseline) == []
+
+
+def test_dataset_is_reused(tmp_path):
+    pois_dir, streets_dir = write_dataset(str(tmp_path), 300, seed=1)
+    first = pd.read_csv(os.path.join(pois_dir, "pois_000.csv"))
+    assert len(first) == 300 and os.listdir(streets_dir) == ["streets.geojson"]
+    mtime = os.path.getmtime(os.path.join(pois_dir, "pois_000.csv"))
+    write_dataset(str(tmp_path), 300, seed=1)
+    assert os.path.getmtime(os.path.join(pois_dir, "pois_000.csv")) == mtime
+    write_dataset(str(tmp_path), 200, seed=1)
+    assert len(pd.read_csv(os.path.join(pois_dir, "pois_000.csv"))) == 200
+
+
+def test_main_against_baseline(tmp_path):
+    output, baseline = str(tmp_path / "results.json"), str(tmp_path / "baseline.json")
+    args = ["--sizes", "200", "--data_dir", str(tmp_path / "data"), "--output", output]
+    assert main(args) == 0
+    with open(output, encoding="utf-8") as f:
+        results = json.load(f)
+    stages = [s["stage"] for s in results["sizes"]["200"]["stages"]]
+    assert stages[:2] == ["load_pois", "normalize_pois"] and results["regressions"] == []
+
+    # A baseline where everything took no time at all flags the end-to-end run
+    for size in results["sizes"].values():
+        size["end_to_end_s"] = 0.0
+        for stage in size["stages"]:
+            stage["wall_s"] = 0.0
+    with open(baseline, "w", encoding="utf-8") as f:
+        json.dump(results, f)
+    assert main(args + ["--baseline", baseline, "--threshold", "0", "--update_baseline"]) == 0
+    with open(baseline, encoding="utf-8") as f:
+        assert json.load(f)["regressions"]
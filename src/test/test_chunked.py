@@ -0,0 +1,116 @@
+# src/test/test_chunked.py
+
+import sys
+import os
+import subprocess
+import geopandas as gpd
+import pandas as pd
+import pytest
+from shapely.geometry import LineString
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.pipeline import chunked
+from src.pipeline.chunked import run_chunked, checkpoint_key, _owned
+from src.preprocessing.geocode import geocode_pois
+from src.validation.validator import validate_pois
+from src.utils.cancellation import CancellationToken, PipelineCancelled
+
+
+def _streets():
+    return gpd.GeoDataFrame({
+        'link_id': [1100, 1200], 'st_name': ['MAIN ST', 'OAK AVE'],
+        'l_refaddr': [1, 100], 'l_nrefaddr': [99, 200], 'multidigit': ['Y', 'N'],
+    }, geometry=[LineString([(0, 0), (0.01, 0)]), LineString([(0, 0.01), (0.01, 0.01)])], crs="EPSG:4326")
+
+
+def _pois():
+    n = 7
+    return pd.DataFrame({
+        'poi_id': range(1, n + 1),
+        'poi_name': [f'POI {i}' for i in range(n)],
+        'link_id': [1100, 1200] * 3 + [1100],
+        'poi_st_sd': ['L'] * n,
+        'percfrref': [20, 40, 150, 40, 30, 60, 10],
+        'st_name': ['MAIN ST', 'OAK AVE'] * 3 + ['MAIN ST'],
+        'st_num_ful': [50, 150, 20, 120, 10, 180, 90],
+    })
+
+
+@pytest.fixture
+def geocoded(monkeypatch):
+    calls = []
+
+    def counting(pois, *args, **kwargs):
+        calls.append(pois['poi_id'].tolist())
+        return geocode_pois(pois, *args, **kwargs)
+
+    monkeypatch.setattr(chunked, "geocode_pois", counting)
+    return calls
+
+
+def test_resume_after_cancel(tmp_path, geocoded):
+    checkpoint_dir = str(tmp_path)
+    run_dir = os.path.join(checkpoint_dir, checkpoint_key(_pois(), _streets(), 3))
+    token = CancellationToken()
+    with pytest.raises(PipelineCancelled, match="before geocoding chunk 2/3"):
+        run_chunked(_pois(), _streets(), chunk_size=3, token=token, checkpoint_dir=checkpoint_dir,
+                    progress=lambda done, total: token.cancel())
+    # The finished chunk stays, the run's claim on the directory does not
+    assert os.listdir(run_dir) == ["chunk_00000.pkl"]
+
+    progress = []
+    _, validation, pois_fixed = run_chunked(_pois(), _streets(), chunk_size=3, checkpoint_dir=checkpoint_dir,
+                                            progress=lambda done, total: progress.append((done, total)))
+    assert geocoded == [[1, 2, 3], [4, 5, 6], [7]]
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+    assert not os.path.exists(run_dir)
+
+    expected = validate_pois(geocode_pois(_pois(), _streets()), _streets())
+    assert validation['poi_id'].tolist() == expected['poi_id'].tolist()
+    assert validation['violation_code'].tolist() == expected['violation_code'].tolist()
+    assert len(pois_fixed) == 7
+
+
+def test_key_depends_on_input():
+    key = checkpoint_key(_pois(), _streets(), 3)
+    pois = _pois()
+    pois.loc[6, 'st_num_ful'] = 91
+    assert checkpoint_key(pois, _streets(), 3) != key
+    assert checkpoint_key(_pois(), _streets(), 4) != key
+    assert checkpoint_key(_pois(), _streets(), 3, street_key="abc") != key
+
+
+def test_multidigit_fixes_applied_at_the_end():
+    streets_gdf = _streets()
+    _, validation, _ = run_chunked(_pois(), streets_gdf, chunk_size=1, checkpoint_dir=None)
+    assert (validation['violation_code'] == 'FIX_MULTIDIGIT').sum() == 4
+    assert streets_gdf.set_index('link_id').loc[1100, 'multidigit'] == 'N'
+
+
+def _finished_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_checkpoints_kept_while_another_run_owns_them(tmp_path):
+    run_dir = str(tmp_path / "run")
+    with _owned(run_dir):
+        with _owned(run_dir) as lock:
+            assert len(os.listdir(run_dir)) == 2
+        # The other owner is still running
+        assert len(os.listdir(run_dir)) == 1 and not os.path.exists(lock)
+    assert not os.path.exists(run_dir)
+
+    with _owned(run_dir):
+        open(os.path.join(run_dir, f"owner-{_finished_pid()}-dead.lock"), "w").close()
+    assert not os.path.exists(run_dir)
+
+
+def test_failed_run_keeps_checkpoints(tmp_path):
+    run_dir = str(tmp_path / "run")
+    with pytest.raises(RuntimeError):
+        with _owned(run_dir):
+            open(os.path.join(run_dir, "chunk_00000.pkl"), "w").close()
+            raise RuntimeError("crash")
+    assert os.listdir(run_dir) == ["chunk_00000.pkl"]
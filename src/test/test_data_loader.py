@@ -0,0 +1,50 @@
+# src/test/test_data_loader.py
+
+import sys
+import os
+import logging
+import geopandas as gpd
+from shapely.geometry import LineString
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.data_loader import data_loader
+from src.data_loader.data_loader import load_pois, load_streets
+from src.preprocessing.normalizer import normalize_pois, normalize_streets
+
+logger = logging.getLogger("test_data_loader")
+
+
+def _write_streets(path):
+    gpd.GeoDataFrame({
+        'LINK_ID': [1100, 1200], 'ST NAME': ['MAIN ST', 'OAK AVE'],
+        'L_REFADDR': [1, 100], 'L_NREFADDR': [99, 200], 'COMMENT': ['a', 'b'],
+    }, geometry=[LineString([(0, 0), (0.01, 0)]), LineString([(0, 0.01), (0.01, 0.01)])],
+        crs="EPSG:4326").to_file(path / "streets.geojson", driver="GeoJSON")
+
+
+def test_fast_load_keeps_headers_with_spaces(tmp_path):
+    (tmp_path / "pois.csv").write_text("POI ID,POI NAME,Link ID,ST NAME,ST_NUM_FUL,Extra Col\n"
+                                       "1,Cafe,1100,MAIN ST,5,x\n")
+    pois = normalize_pois(load_pois(str(tmp_path), fast=True))
+    assert sorted(pois.columns) == ['link_id', 'poi_id', 'poi_name', 'source_file', 'st_name', 'st_num_ful']
+
+    _write_streets(tmp_path)
+    streets = normalize_streets(load_streets(str(tmp_path), fast=True))
+    assert set(streets.columns) == {'link_id', 'st_name', 'l_refaddr', 'l_nrefaddr', 'geometry'}
+    assert streets['st_name'].tolist() == ['MAIN ST', 'OAK AVE']
+
+
+def test_fast_street_load_falls_back_without_arrow(tmp_path, monkeypatch):
+    _write_streets(tmp_path)
+
+    read_dataframe = data_loader.pyogrio.read_dataframe
+
+    def arrow_unavailable(*args, **kwargs):
+        if kwargs.get("use_arrow"):
+            raise RuntimeError("GDAL built without Arrow")
+        return read_dataframe(*args, **kwargs)
+
+    monkeypatch.setattr(data_loader.pyogrio, "read_dataframe", arrow_unavailable)
+    streets = load_streets(str(tmp_path), logger, fast=True)
+    assert len(streets) == 2 and 'COMMENT' not in streets.columns
+    assert streets['LINK_ID'].tolist() == [1100, 1200]
@@ -0,0 +1,58 @@
+# src/test/test_fixer.py
+
+import sys
+import os
+import io
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.validation.validator import validate_pois
+from src.validation.fixer import fix_pois
+
+streets_df = pd.DataFrame([
+    {'st_name': 'STREET A', 'link_id': 1001, 'multidigit': 'N'},
+    {'st_name': 'STREET B', 'link_id': 2002, 'multidigit': 'Y'},
+])
+
+
+def _fix(pois_df):
+    streets = streets_df.copy()
+    fixed = fix_pois(validate_pois(pois_df, streets), pois_df, streets)
+    return fixed.set_index('poi_id'), streets
+
+
+def test_non_numeric_percfrref_from_csv():
+    # read_csv gives percfrref str dtype as soon as one value is not a number
+    pois_df = pd.read_csv(io.StringIO(
+        "poi_id,poi_name,link_id,poi_st_sd,percfrref\n"
+        "1,A,1001,L,abc\n"
+        "2,B,1001,L,150\n"
+        "3,C,1001,L,25\n"))
+    fixed, _ = _fix(pois_df)
+    assert fixed['percfrref'].tolist() == [50, 50, '25']
+
+
+def test_non_numeric_percfrref_kept_outside_fixed_rows():
+    pois_df = pd.read_csv(io.StringIO(
+        "poi_id,poi_name,link_id,poi_st_sd,percfrref\n"
+        "1,A,999999,L,xyz\n"
+        "2,B,1001,L,abc\n"
+        "3,C,1001,L,25\n"))
+    fixed, _ = _fix(pois_df)
+    # POI 1 only gets UPDATE_SIDE: its percfrref is left as it was
+    assert fixed['poi_st_sd'].tolist() == ['R', 'L', 'L']
+    assert fixed['percfrref'].tolist() == ['xyz', 50, '25']
+
+
+def test_corrections():
+    pois_df = pd.DataFrame([
+        {'poi_id': 1, 'poi_name': '', 'link_id': 1001, 'poi_st_sd': 'L', 'percfrref': 25},
+        {'poi_id': 2, 'poi_name': 'Side', 'link_id': 999999, 'poi_st_sd': 'L', 'percfrref': 80},
+        {'poi_id': 3, 'poi_name': 'Multi', 'link_id': 2002, 'poi_st_sd': 'R', 'percfrref': -5},
+        {'poi_id': 4, 'poi_name': 'Good', 'link_id': 1001, 'poi_st_sd': 'L', 'percfrref': 40},
+    ])
+    fixed, streets = _fix(pois_df)
+    assert fixed.index.tolist() == [2, 3, 4]
+    assert fixed['poi_st_sd'].tolist() == ['R', 'R', 'L']
+    assert fixed['percfrref'].tolist() == [80, 50, 40]
+    assert streets['multidigit'].tolist() == ['N', 'N']
@@ -0,0 +1,135 @@
+# src/test/test_geocode.py
+
+import sys
+import os
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from shapely.geometry import LineString
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.preprocessing.geocode import parse_house_numbers, match_addresses, interpolate_matches, geocode_pois
+from src.preprocessing.street_index import build_street_index
+
+# Three segments of MAIN ST (the first two with overlapping left ranges) and one of OAK AVE
+streets_gdf = gpd.GeoDataFrame({
+    'link_id': [1001, 1002, 1003, 2001],
+    'st_name': ['Main St', 'MAIN ST', 'main st', 'OAK AVE'],
+    'l_refaddr': [1, 51, np.nan, 100],
+    'l_nrefaddr': [101, 61, np.nan, 200],
+    'r_refaddr': [np.nan, np.nan, 300, np.nan],
+    'r_nrefaddr': [np.nan, np.nan, 400, np.nan],
+}, geometry=[
+    LineString([(0, 0), (100, 0)]),
+    LineString([(0, 10), (10, 10)]),
+    LineString([(0, 20), (100, 20)]),
+    LineString([(0, 30), (0, 130)]),
+], crs="EPSG:3857")
+street_index = build_street_index(streets_gdf)
+
+
+def test_parse_float_house_numbers():
+    # read_csv gives a float column whenever st_num_ful has a gap
+    nums = parse_house_numbers(pd.Series([12.0, 15.5, np.nan]))
+    np.testing.assert_array_equal(nums, [12.0, np.nan, np.nan])
+
+
+def test_parse_string_house_numbers():
+    nums = parse_house_numbers(pd.Series([' 12 ', '12A', '', None, '7.0', 'abc'], dtype=object))
+    np.testing.assert_array_equal(nums, [12.0, np.nan, np.nan, np.nan, 7.0, np.nan])
+
+
+def test_parse_does_not_modify_input():
+    values = pd.Series([12.0, 15.5])
+    parse_house_numbers(values)
+    assert values.tolist() == [12.0, 15.5]
+
+
+def test_match_left_then_right():
+    positions, fractions, sides = match_addresses(street_index, ['main st', ' Main St ', 'OAK AVE'], [26, 350, 150])
+    assert street_index.link_id[positions].tolist() == [1001, 1003, 2001]
+    assert sides.tolist() == ['L', 'R', 'L']
+    np.testing.assert_allclose(fractions, [0.25, 0.5, 0.5])
+
+
+def test_match_overlapping_ranges():
+    # 55 lies in both left ranges of MAIN ST; 71 only in the wider, earlier one
+    positions, _, sides = match_addresses(street_index, ['MAIN ST', 'MAIN ST'], [55, 71])
+    assert street_index.link_id[positions[0]] in (1001, 1002)
+    assert street_index.link_id[positions[1]] == 1001
+    assert sides.tolist() == ['L', 'L']
+
+
+def test_match_unmatched():
+    positions, fractions, sides = match_addresses(
+        street_index, ['MAIN ST', 'ELM ST', None, 'MAIN ST', 'OAK AVE'], [np.nan, 10, 10, '12B', 250.0])
+    assert positions.tolist() == [-1] * 5
+    assert np.isnan(fractions).all()
+    assert sides.tolist() == [None] * 5
+
+
+def test_match_without_street_names():
+    positions, _, sides = match_addresses(street_index, [None, np.nan], [10, 20])
+    assert positions.tolist() == [-1, -1]
+    assert sides.tolist() == [None, None]
+    assert len(match_addresses(street_index, [], [])[0]) == 0
+
+
+def test_blank_names_do_not_match_nameless_segments():
+    index = build_street_index(streets_gdf.assign(st_name=[None, '  ', 'MAIN ST', 'OAK AVE']))
+    positions, _, _ = match_addresses(index, ['', '  ', None, 'main st'], ['5', '5', '5', '350'])
+    assert positions[:3].tolist() == [-1, -1, -1]
+    assert index.link_id[positions[3]] == 1003
+    assert '' not in index and len(index.blocks) == 2
+    legacy = geocode_pois(pd.DataFrame({'st_name': ['', '  '], 'st_num_ful': [5, 5]}),
+                          streets_gdf.assign(st_name=[None, '  ', 'MAIN ST', 'OAK AVE']), mode="legacy")
+    assert legacy.geometry.isna().all()
+
+
+def test_match_float_and_string_numbers_agree():
+    names = ['MAIN ST', 'MAIN ST', 'OAK AVE']
+    as_float = match_addresses(street_index, names, pd.Series([26.0, np.nan, 175.0]))
+    as_string = match_addresses(street_index, names, pd.Series(['26', '', '175'], dtype=object))
+    for a, b in zip(as_float, as_string):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_interpolate_matches():
+    positions, fractions, _ = match_addresses(street_index, ['MAIN ST', 'OAK AVE', 'ELM ST'], [26, 125, 1])
+    points = interpolate_matches(street_index, positions, fractions)
+    assert points[2] is None
+    np.testing.assert_allclose(shapely.get_coordinates(points[:2].astype(object)), [[25, 0], [0, 55]])
+
+
+def test_interpolate_nothing_matched():
+    points = interpolate_matches(street_index, np.array([-1, -1]), np.array([np.nan, np.nan]))
+    assert points.tolist() == [None, None]
+
+
+def test_batch_and_legacy_modes_agree():
+    streets = gpd.GeoDataFrame({
+        'link_id': [1, 2, 3, 4],
+        'st_name': ['MAIN ST', 'MAIN ST', 'OAK AVE', 'ELM ST'],
+        'l_refaddr': [1, np.nan, 200, 7],
+        'l_nrefaddr': [49, np.nan, 100, 7],
+        'r_refaddr': [np.nan, 2, np.nan, np.nan],
+        'r_nrefaddr': [np.nan, 50, np.nan, np.nan],
+    }, geometry=[
+        LineString([(0, 0), (48, 0)]),
+        LineString([(0, 10), (48, 10)]),
+        LineString([(0, 20), (100, 20)]),
+        LineString([(0, 30), (10, 30)]),
+    ], crs="EPSG:3857")
+    pois = pd.DataFrame({
+        'st_name': ['Main St', 'MAIN ST', 'OAK AVE', 'OAK AVE', 'ELM ST', 'PINE RD', 'MAIN ST'],
+        'st_num_ful': [25, 50, 175, 100, 7, 5, '12B'],
+    })
+    batch = geocode_pois(pois, streets, spatial=False).geometry
+    legacy = geocode_pois(pois, streets, mode="legacy").geometry
+    assert batch.isna().tolist() == legacy.isna().tolist() == [False] * 5 + [True] * 2
+    np.testing.assert_allclose(shapely.get_coordinates(batch[:5].to_numpy()),
+                               shapely.get_coordinates(legacy[:5].to_numpy()))
+    # From the reference node: OAK AVE runs 200 -> 100, ELM ST has one address (midpoint)
+    np.testing.assert_allclose(shapely.get_coordinates(batch[:5].to_numpy()),
+                               [[24, 0], [48, 10], [25, 20], [100, 20], [5, 30]])
@@ -0,0 +1,77 @@
+# src/test/test_geocode_cache.py
+
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.preprocessing import geocode_cache
+from src.preprocessing.geocode_cache import GeocodeCache, open_geocode_cache, MAX_PARTS
+from src.data_loader.street_cache import street_data_key, street_cache_key, street_files_signature
+
+
+def _addresses(names, nums):
+    return pd.MultiIndex.from_arrays([names, np.asarray(nums, dtype=float)])
+
+
+def _values(link_ids):
+    n = len(link_ids)
+    return pd.DataFrame({'link_id': np.array(link_ids, dtype=object), 'side': ['L'] * n,
+                         'x': np.arange(n, dtype=float), 'y': np.zeros(n)})
+
+
+def test_lookup_store_round_trip(tmp_path):
+    cache = GeocodeCache(str(tmp_path))
+    cache.store(_addresses(['MAIN ST', 'OAK AVE'], [10, 20]), _values([1001, None]))
+
+    # A new process (new GeocodeCache) loads the entries from disk
+    reloaded = GeocodeCache(str(tmp_path))
+    found, values = reloaded.lookup(_addresses(['OAK AVE', 'ELM ST', 'MAIN ST'], [20, 1, 10]))
+    assert found.tolist() == [True, False, True]
+    assert values['link_id'][0] is None and values['link_id'][2] == 1001
+    assert values['x'][2] == 0.0
+    assert reloaded.stats() == {'hits': 2, 'misses': 1, 'loaded': 2}
+
+
+def test_compaction_merges_parts(tmp_path):
+    writer = GeocodeCache(str(tmp_path))
+    for i in range(MAX_PARTS + 2):
+        writer.store(_addresses([f'ST {i}'], [i]), _values([i]))
+    assert len(os.listdir(tmp_path)) == MAX_PARTS + 2
+
+    reader = GeocodeCache(str(tmp_path))
+    found, values = reader.lookup(_addresses([f'ST {i}' for i in range(MAX_PARTS + 2)], range(MAX_PARTS + 2)))
+    assert found.all() and values['link_id'].tolist() == list(range(MAX_PARTS + 2))
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test_parts_removed_by_another_process_are_skipped(tmp_path):
+    writer = GeocodeCache(str(tmp_path))
+    for i in range(3):
+        writer.store(_addresses([f'ST {i}'], [i]), _values([i]))
+    parts = writer._parts()
+    os.remove(parts[1])
+    assert len(GeocodeCache(str(tmp_path))._read_parts(parts)) == 2
+
+
+def test_fast_and_normal_loads_share_a_key(tmp_path):
+    (tmp_path / "streets.geojson").write_text('{"type": "FeatureCollection", "features": []}')
+    fast_key = street_cache_key(street_files_signature(str(tmp_path), fast=True))
+    assert street_data_key(str(tmp_path)) != fast_key
+    assert street_data_key(str(tmp_path)) == street_cache_key(street_files_signature(str(tmp_path), fast=False))
+
+
+def test_other_versions_removed_only_when_unused(tmp_path):
+    cache_dir, streets_dir = str(tmp_path / "cache"), str(tmp_path / "streets")
+    old = open_geocode_cache(streets_dir, 'old', cache_dir=cache_dir)
+    new = open_geocode_cache(streets_dir, 'new', cache_dir=cache_dir)
+    # A cache another run still uses is kept
+    assert os.path.isdir(old.path) and os.path.isdir(new.path)
+
+    stale = time.time() - 2 * geocode_cache.STALE_AFTER
+    os.utime(old.path, (stale, stale))
+    geocode_cache._caches.clear()
+    open_geocode_cache(streets_dir, 'new', cache_dir=cache_dir)
+    assert not os.path.exists(old.path) and os.path.isdir(new.path)
@@ -0,0 +1,107 @@
+# src/test/test_incremental.py
+
+import sys
+import os
+import geopandas as gpd
+import pandas as pd
+import pytest
+from shapely.geometry import LineString
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.pipeline import incremental
+from src.pipeline.incremental import run_incremental
+from src.preprocessing.geocode import geocode_pois
+from src.validation.validator import validate_pois
+from src.validation.fixer import fix_pois
+
+
+def _streets(oak_refaddr=100):
+    return gpd.GeoDataFrame({
+        'link_id': [1100, 1200], 'st_name': ['MAIN ST', 'OAK AVE'],
+        'l_refaddr': [1, oak_refaddr], 'l_nrefaddr': [99, 200], 'multidigit': ['Y', 'N'],
+    }, geometry=[LineString([(0, 0), (0.01, 0)]), LineString([(0, 0.01), (0.01, 0.01)])], crs="EPSG:4326")
+
+
+def _pois():
+    return pd.DataFrame({
+        'poi_id': [1, 2, 3, 4],
+        'poi_name': ['Cafe', 'Shop', 'Bank', 'Park'],
+        'link_id': [1100, 1100, 1200, 1200],
+        'poi_st_sd': ['L', 'L', 'L', 'R'],
+        'percfrref': [20, 150, 40, 40],
+        'st_name': ['MAIN ST', 'MAIN ST', 'OAK AVE', 'OAK AVE'],
+        'st_num_ful': [50, 20, 150, 120],
+    })
+
+
+@pytest.fixture
+def geocoded(monkeypatch):
+    """
+    The poi_ids handed to geocode_pois by each run.
+    """
+    calls = []
+
+    def counting(pois, *args, **kwargs):
+        calls.append(pois['poi_id'].tolist())
+        return geocode_pois(pois, *args, **kwargs)
+
+    monkeypatch.setattr(incremental, "geocode_pois", counting)
+    return calls
+
+
+def _full(pois, streets_gdf):
+    pois_geo = geocode_pois(pois, streets_gdf)
+    validation = validate_pois(pois_geo, streets_gdf)
+    return validation, fix_pois(validation, pois_geo, streets_gdf, update_streets=False)
+
+
+def _assert_same(result, expected):
+    _, validation, pois_fixed = result
+    validation_full, fixed_full = expected
+    assert validation['poi_id'].tolist() == validation_full['poi_id'].tolist()
+    assert validation['violation_code'].tolist() == validation_full['violation_code'].tolist()
+    assert pois_fixed['poi_id'].tolist() == fixed_full['poi_id'].tolist()
+    assert pois_fixed['percfrref'].tolist() == fixed_full['percfrref'].tolist()
+
+
+def test_unchanged_rows_are_reused(tmp_path, geocoded):
+    state_dir = str(tmp_path)
+    run_incremental(_pois(), _streets(), state_dir)
+    result = run_incremental(_pois(), _streets(), state_dir)
+    assert geocoded == [[1, 2, 3, 4], []]
+    _assert_same(result, _full(_pois(), _streets()))
+
+
+def test_changed_and_new_rows_are_recomputed(tmp_path, geocoded):
+    state_dir = str(tmp_path)
+    run_incremental(_pois(), _streets(), state_dir)
+    pois = _pois()
+    pois.loc[1, 'percfrref'] = 30
+    pois = pd.concat([pois, pd.DataFrame({'poi_id': [5], 'poi_name': ['Bar'], 'link_id': [1200], 'poi_st_sd': ['L'],
+                                          'percfrref': [10], 'st_name': ['OAK AVE'], 'st_num_ful': [180]})],
+                     ignore_index=True)
+    # Input order is kept whatever was reused
+    pois = pois.iloc[[4, 2, 0, 1, 3]]
+    result = run_incremental(pois, _streets(), state_dir)
+    assert geocoded[1] == [5, 2]
+    _assert_same(result, _full(pois.reset_index(drop=True), _streets()))
+
+
+def test_street_change_recomputes_its_pois(tmp_path, geocoded):
+    state_dir = str(tmp_path)
+    run_incremental(_pois(), _streets(), state_dir)
+    result = run_incremental(_pois(), _streets(oak_refaddr=110), state_dir)
+    assert geocoded[1] == [3, 4]
+    _assert_same(result, _full(_pois(), _streets(oak_refaddr=110)))
+
+
+def test_duplicate_rows_are_recomputed(tmp_path, geocoded):
+    state_dir = str(tmp_path)
+    pois = pd.concat([_pois(), _pois().iloc[[0]]], ignore_index=True)
+    run_incremental(pois, _streets(), state_dir)
+    pois_geo, validation, _ = run_incremental(pois, _streets(), state_dir)
+    assert geocoded[1] == [1, 1]
+    assert validation['poi_id'].tolist() == [1, 2, 3, 4, 1] and len(pois_geo) == 5
+    # A row repeated in the previous run is reused once
+    pois_geo, validation, _ = run_incremental(_pois(), _streets(), state_dir)
+    assert geocoded[2] == [] and validation['poi_id'].tolist() == [1, 2, 3, 4] and len(pois_geo) == 4
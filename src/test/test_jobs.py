@@ -0,0 +1,95 @@
+# src/test/test_jobs.py
+
+import sys
+import os
+import time
+import threading
+import pytest
+from fastapi.testclient import TestClient
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from api import jobs
+from api.app import app
+from api.jobs import JobManager
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """
+    Stands in for run_pipeline_html: runs until released or stopped and
+    records the jobs that actually ran.
+    """
+    release, ran = threading.Event(), []
+
+    def run(status=None, logs=None, run_id=None, **params):
+        ran.append(run_id)
+        status["running"] = True
+        logs.append(f"started {run_id}")
+        while not release.is_set() and not status["emergency_stop"]:
+            time.sleep(0.01)
+        if params.get("fail"):
+            raise RuntimeError("pipeline crashed")
+        return None if status["emergency_stop"] else "report.html"
+
+    monkeypatch.setattr(jobs, "run_pipeline_html", run)
+    return release, ran
+
+
+def _wait(job, states=("done", "failed", "cancelled"), timeout=5):
+    deadline = time.time() + timeout
+    while job.state not in states and time.time() < deadline:
+        time.sleep(0.01)
+    return job.state
+
+
+def test_cancel_queued_and_running_jobs(pipeline):
+    release, ran = pipeline
+    manager = JobManager(max_workers=1)
+    running, queued = manager.submit({}), manager.submit({})
+    assert _wait(running, ("running",)) == "running" and queued.state == "queued"
+
+    assert manager.cancel(queued.id) is queued
+    assert queued.state == "cancelled" and queued.finished
+    assert manager.cancel(running.id).status["emergency_stop"]
+    assert _wait(running) == "cancelled"
+    # The cancelled job never ran, even though a worker was free again
+    time.sleep(0.05)
+    assert ran == [running.id]
+    assert manager.cancel("unknown") is None
+
+
+def test_finished_jobs_keep_their_state(pipeline):
+    release, _ = pipeline
+    release.set()
+    manager = JobManager(max_workers=2)
+    done, failed = manager.submit({}), manager.submit({"fail": True})
+    assert _wait(done) == "done" and _wait(failed) == "failed"
+    assert failed.error == "pipeline crashed"
+    manager.cancel(done.id)
+    assert done.state == "done" and not done.status["emergency_stop"]
+    assert [j["job_id"] for j in manager.list()] == [failed.id, done.id]
+
+
+def test_forget_oldest_finished_jobs(pipeline, monkeypatch):
+    pipeline[0].set()
+    monkeypatch.setattr(jobs, "MAX_FINISHED_JOBS", 2)
+    manager = JobManager(max_workers=1)
+    first = [manager.submit({}) for _ in range(3)]
+    for job in first:
+        _wait(job)
+    last = manager.submit({})
+    _wait(last)
+    assert [j["job_id"] for j in manager.list()] == [last.id, first[2].id, first[1].id]
+
+
+def test_cancel_endpoint(pipeline, monkeypatch):
+    monkeypatch.setattr(jobs, "job_manager", JobManager(max_workers=1))
+    monkeypatch.setattr("api.app.job_manager", jobs.job_manager)
+    client = TestClient(app)
+    job_id = client.post("/jobs", json={"test_mode": True}).json()["job_id"]
+    _wait(jobs.job_manager.get(job_id), ("running",))
+
+    assert client.post(f"/jobs/{job_id}/cancel").status_code == 200
+    assert _wait(jobs.job_manager.get(job_id)) == "cancelled"
+    assert client.get(f"/jobs/{job_id}").json()["logs"] == [f"started {job_id}"]
+    assert client.post("/jobs/nope/cancel").status_code == 404
@@ -0,0 +1,60 @@
+# src/test/test_logs.py
+
+import sys
+import os
+from fastapi.testclient import TestClient
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from api import jobs
+from api.app import app
+from api.jobs import JobManager, Job
+from api.state import LogBuffer
+
+
+def test_since_returns_only_new_lines():
+    logs = LogBuffer()
+    assert logs.since(0) == ([], 0)
+    for line in ("a", "b", "c"):
+        logs.append(line)
+    lines, cursor = logs.since(0)
+    assert lines == ["a", "b", "c"] and cursor == 3
+    logs.append("d")
+    assert logs.since(cursor) == (["d"], 4)
+    assert logs.since(4) == ([], 4) and logs.since(10) == ([], 4)
+    assert logs.last() == "d" and list(logs) == ["a", "b", "c", "d"]
+
+
+def test_dropped_lines_are_skipped():
+    logs = LogBuffer(maxlen=3)
+    for i in range(5):
+        logs.append(str(i))
+    assert len(logs) == 3
+    assert logs.since(0) == (["2", "3", "4"], 5)
+    assert logs.since(3) == (["3", "4"], 5)
+
+
+def test_clear_keeps_cursors_valid():
+    logs = LogBuffer()
+    logs.append("a")
+    _, cursor = logs.since(0)
+    logs.clear()
+    assert logs.since(cursor) == ([], 1) and logs.cursor == 1
+    logs.append("b")
+    assert logs.since(cursor) == (["b"], 2)
+
+
+def test_logs_endpoint_cursor(monkeypatch):
+    manager = JobManager(max_workers=1)
+    job = Job({})
+    job.state = "done"
+    manager._jobs[job.id] = job
+    monkeypatch.setattr(jobs, "job_manager", manager)
+    monkeypatch.setattr("api.app.job_manager", manager)
+    client = TestClient(app)
+
+    job.logs.append("loading")
+    body = client.get("/logs").json()
+    assert body["logs"] == ["loading"] and body["job_id"] == job.id and body["next"] == 1
+    job.logs.append("geocoding")
+    body = client.get("/logs", params={"since": body["next"], "job_id": job.id}).json()
+    assert body["logs"] == ["geocoding"] and body["next"] == 2
@@ -0,0 +1,62 @@
+# src/test/test_metrics.py
+
+import sys
+import os
+import json
+import pandas as pd
+import pytest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.metrics import StageMetrics, track, frame_mb, metrics_path_for
+
+
+def test_repeated_stage_accumulates():
+    metrics = StageMetrics()
+    for rows in (10, 5):
+        with metrics.stage("geocode", rows=rows):
+            pass
+    with metrics.stage("write") as stage:
+        stage["rows"] = 3
+    stages = {s["stage"]: s for s in metrics.as_list()}
+    assert list(stages) == ["geocode", "write"]
+    assert stages["geocode"]["calls"] == 2 and stages["geocode"]["rows"] == 15
+    assert stages["write"]["rows"] == 3 and stages["write"]["wall_s"] >= 0
+
+
+def test_failing_stage_is_still_recorded():
+    metrics = StageMetrics()
+    with pytest.raises(ValueError):
+        with metrics.stage("validate", rows=1):
+            raise ValueError("boom")
+    assert metrics.stages["validate"]["calls"] == 1
+
+
+def test_frame_memory_and_peak(tmp_path):
+    metrics = StageMetrics(memory=True)
+    frame = pd.DataFrame({"name": ["x" * 100] * 1000})
+    with metrics.stage("normalize", rows=len(frame)) as stage:
+        stage["output"] = frame
+    entry = metrics.stages["normalize"]
+    assert entry["frame_mb"] == frame_mb(frame) and entry["frame_mb"] > 0
+    if entry["peak_rss_mb"] is not None:
+        assert metrics.peak_mb() >= entry["peak_rss_mb"]
+
+    path = metrics.write_json(str(tmp_path / "run" / "metrics.json"))
+    with open(path, encoding="utf-8") as f:
+        written = json.load(f)
+    assert written["stages"] == metrics.as_list()
+    assert set(written) == {"stages", "peak_rss_mb", "children_peak_rss_mb"}
+
+
+def test_profiles_written_per_stage(tmp_path):
+    metrics = StageMetrics(profile_dir=str(tmp_path))
+    for _ in range(2):
+        with metrics.stage("fix"):
+            sum(range(1000))
+    assert os.listdir(tmp_path) == ["fix.prof"]
+
+
+def test_track_without_metrics():
+    with track(None, "geocode", rows=5) as stage:
+        stage["rows"] = 1
+    assert metrics_path_for(os.path.join("logs", "run_1.log")) == os.path.join("logs", "run_1_metrics.json")
@@ -0,0 +1,76 @@
+# src/test/test_normalizer.py
+
+import sys
+import os
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+from shapely.geometry import LineString
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.preprocessing.normalizer import compact_dtypes, normalize_pois
+from src.preprocessing.geocode import geocode_pois
+from src.validation.validator import validate_pois, violation_counts
+from src.validation.fixer import fix_pois
+
+streets_gdf = gpd.GeoDataFrame({
+    'link_id': [1100, 1200], 'st_name': ['MAIN ST', 'OAK AVE'],
+    'l_refaddr': [1, 100], 'l_nrefaddr': [99, 200], 'multidigit': ['Y', 'N'],
+}, geometry=[LineString([(0, 0), (0.01, 0)]), LineString([(0, 0.01), (0.01, 0.01)])], crs="EPSG:4326")
+
+
+def _raw_pois():
+    return pd.DataFrame({
+        'POI_ID': [1, 2, 3, 4, 5, 6],
+        'POI_NAME': ['Cafe', 'Shop', '', 'Park', 'Bar', 'Deli'],
+        'LINK_ID': [1100, 1100, 1200, 1200, 1200, 9999],
+        'POI_ST_SD': ['L'] * 6,
+        'PERCFRREF': [20.0, 150.0, 40.0, 30.5, np.nan, 10.0],
+        'ST_NAME': ['MAIN ST', 'MAIN ST', 'OAK AVE', 'OAK AVE', 'OAK AVE', 'MAIN ST'],
+        'ST_NUM_FUL': [50, 20, 150, 120, 180, 90],
+        'source_file': ['pois.csv'] * 6,
+    })
+
+
+def test_compact_dtypes():
+    pois = normalize_pois(_raw_pois(), compact=True)
+    assert isinstance(pois['st_name'].dtype, pd.CategoricalDtype)
+    assert isinstance(pois['source_file'].dtype, pd.CategoricalDtype)
+    # The fixer may write either side into the column
+    assert set(pois['poi_st_sd'].cat.categories) == {'L', 'R'}
+    # Mostly distinct names stay strings, floats stay float64
+    assert not isinstance(pois['poi_name'].dtype, pd.CategoricalDtype)
+    assert pois['percfrref'].dtype == np.float64
+    assert pois['poi_id'].dtype == np.int8 and pois['link_id'].dtype == np.int16
+    assert pois.memory_usage(deep=True).sum() < normalize_pois(_raw_pois()).memory_usage(deep=True).sum()
+
+
+def test_compact_dtypes_leaves_empty_frames():
+    empty = pd.DataFrame({'st_name': pd.Series([], dtype=object)})
+    assert compact_dtypes(empty)['st_name'].dtype == object
+
+
+def _run(compact):
+    pois_geo = geocode_pois(normalize_pois(_raw_pois(), compact=compact), streets_gdf.copy())
+    streets = streets_gdf.copy()
+    validation = validate_pois(pois_geo, streets)
+    return validation, fix_pois(validation, pois_geo, streets, update_streets=False)
+
+
+def test_compact_run_gives_the_same_results():
+    validation, pois_fixed = _run(compact=False)
+    compact_validation, compact_fixed = _run(compact=True)
+    assert compact_validation['violation_code'].tolist() == validation['violation_code'].tolist()
+    assert compact_validation['violation_detail'].tolist() == validation['violation_detail'].tolist()
+    assert compact_fixed['poi_id'].tolist() == pois_fixed['poi_id'].tolist()
+    assert compact_fixed['poi_st_sd'].astype(str).tolist() == pois_fixed['poi_st_sd'].astype(str).tolist()
+    np.testing.assert_array_equal(compact_fixed['percfrref'].to_numpy(dtype=float),
+                                  pois_fixed['percfrref'].to_numpy(dtype=float))
+
+
+def test_violation_counts_skip_unused_codes():
+    validation, _ = _run(compact=False)
+    assert isinstance(validation['violation_code'].dtype, pd.CategoricalDtype)
+    counts = violation_counts(validation)
+    assert sum(counts.values()) == 6 and all(counts.values())
+    assert violation_counts(validation.iloc[:0]) == {}
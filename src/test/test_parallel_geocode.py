@@ -0,0 +1,75 @@
+# src/test/test_parallel_geocode.py
+
+import sys
+import os
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from shapely.geometry import LineString
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.preprocessing.geocode import match_addresses, interpolate_matches, geocode_pois
+from src.preprocessing.parallel_geocode import SharedStreetIndex, _AttachedIndex, GeocodePool, geocode_parallel
+from src.preprocessing.street_index import build_street_index
+
+rng = np.random.default_rng(7)
+N_STREETS = 40
+streets_gdf = gpd.GeoDataFrame({
+    'link_id': np.arange(1000, 1000 + 2 * N_STREETS),
+    'st_name': [f'STREET {i % N_STREETS}' for i in range(2 * N_STREETS)],
+    'l_refaddr': np.r_[np.full(N_STREETS, 1.0), np.full(N_STREETS, 101.0)],
+    'l_nrefaddr': np.r_[np.full(N_STREETS, 99.0), np.full(N_STREETS, 199.0)],
+    'r_refaddr': np.r_[np.full(N_STREETS, 200.0), np.full(N_STREETS, np.nan)],
+    'r_nrefaddr': np.r_[np.full(N_STREETS, 300.0), np.full(N_STREETS, np.nan)],
+}, geometry=[LineString([(i, 0), (i, 1 + i % 3)]) for i in range(2 * N_STREETS)], crs="EPSG:3857")
+street_index = build_street_index(streets_gdf)
+names = [f'street {i}' if i % 9 else 'NOWHERE' for i in rng.integers(0, N_STREETS, 500)]
+numbers = [str(v) if v % 11 else f'{v}A' for v in rng.integers(0, 320, 500)]
+
+
+def _serial():
+    positions, fractions, sides = match_addresses(street_index, names, numbers)
+    return positions, fractions, sides, interpolate_matches(street_index, positions, fractions)
+
+
+def _assert_same(parallel, serial):
+    for a, b in zip(parallel[:3], serial[:3]):
+        np.testing.assert_array_equal(a, b)
+    assert pd.isna(parallel[3]).tolist() == pd.isna(serial[3]).tolist()
+    matched = serial[0] >= 0
+    np.testing.assert_allclose(shapely.get_coordinates(parallel[3][matched]),
+                               shapely.get_coordinates(serial[3][matched]))
+
+
+def test_attached_index_matches_like_the_street_index():
+    with SharedStreetIndex(street_index) as shared:
+        attached = _AttachedIndex(shared.spec)
+        np.testing.assert_array_equal(attached.codes_for(['STREET 3', 'NOWHERE']),
+                                      street_index.codes_for(['STREET 3', 'NOWHERE']))
+        for a, b in zip(match_addresses(attached, names, numbers), match_addresses(street_index, names, numbers)):
+            np.testing.assert_array_equal(a, b)
+        del attached
+
+
+def test_parallel_equals_serial():
+    serial = _serial()
+    assert (serial[0] >= 0).sum() > 100
+    _assert_same(geocode_parallel(street_index, names, numbers, workers=2, chunk_size=64), serial)
+
+
+def test_pool_reused_across_calls():
+    serial = _serial()
+    with GeocodePool(street_index, 2) as pool:
+        for _ in range(2):
+            _assert_same(geocode_parallel(street_index, names, numbers, 2, chunk_size=128, pool=pool), serial)
+        pois = pd.DataFrame({'st_name': names, 'st_num_ful': numbers})
+        parallel = geocode_pois(pois, streets_gdf, street_index=street_index, workers=2, chunk_size=100, pool=pool)
+    serial_geo = geocode_pois(pois, streets_gdf, street_index=street_index)
+    assert parallel['geo_link_id'].tolist() == serial_geo['geo_link_id'].tolist()
+    assert parallel.geometry.geom_equals_exact(serial_geo.geometry, 1e-9).sum() == (serial[0] >= 0).sum()
+
+
+def test_empty_input():
+    positions, fractions, sides, points = geocode_parallel(street_index, [], [], workers=2)
+    assert len(positions) == len(points) == 0
@@ -0,0 +1,32 @@
+# src/test/test_report.py
+
+import sys
+import os
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.analysis import report
+from src.analysis.report import generate_report, wait_for_pdfs
+
+validation = pd.DataFrame({'poi_id': [1, 2], 'violation_code': ['DELETE', 'LEGIT_EXCEPTION'],
+                           'violation_detail': ['empty name', 'ok']})
+pois_fixed = pd.DataFrame({'poi_id': [2], 'poi_name': ['Cafe']})
+
+
+def test_finished_pdf_threads_are_pruned(tmp_path):
+    for i in range(5):
+        generate_report(pois_fixed, validation, str(tmp_path), pdf_path=str(tmp_path / f"r{i}.pdf"))
+        report._pdf_threads[-1].join()
+    # Only the last (finished) thread is still listed
+    assert len(report._pdf_threads) == 1
+    wait_for_pdfs()
+    assert report._pdf_threads == []
+    assert all((tmp_path / f"r{i}.pdf").exists() for i in range(5))
+
+
+def test_summary_and_tables(tmp_path):
+    html_path = tmp_path / "report.html"
+    html = generate_report(pois_fixed, validation, str(tmp_path), html_path=str(html_path))
+    assert '<b>Total POIs Processed:</b> 1' in html
+    assert '<li><b>DELETE:</b> 1</li>' in html and '<li><b>LEGIT_EXCEPTION:</b> 1</li>' in html
+    assert html_path.exists() and (tmp_path / "report_files").is_dir()
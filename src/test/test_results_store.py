@@ -0,0 +1,77 @@
+# src/test/test_results_store.py
+
+import sys
+import os
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from shapely.geometry import Point
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.storage.results_store import write_results, read_results, list_runs, source_files_of, _unify
+
+
+def _pois(ids, percfrref, st_num_ful, source_files=None):
+    frame = gpd.GeoDataFrame({
+        'poi_id': ids,
+        'percfrref': percfrref,
+        'st_num_ful': st_num_ful,
+        'note': [None] * len(ids),
+    }, geometry=[Point(i, i) for i in ids], crs="EPSG:4326")
+    if source_files:
+        frame['source_file'] = source_files
+    return frame
+
+
+def test_runs_with_different_types_read_together(tmp_path):
+    results_dir = str(tmp_path)
+    # A plain read_csv gives float house numbers, --fast_load gives text; a note column is all null
+    write_results(results_dir, "main_1", "20260101", {"pois_geo": _pois([1, 2], [20, 40], [50.0, np.nan])})
+    write_results(results_dir, "main_2", "20260102",
+                  {"pois_geo": _pois([3, 4], ["abc", "30"], ["12", "12A"]).assign(note=["x", None])})
+
+    pois = read_results(results_dir, "pois_geo")
+    assert isinstance(pois, gpd.GeoDataFrame) and pois.crs == "EPSG:4326"
+    assert sorted(pois['poi_id'].tolist()) == [1, 2, 3, 4]
+    by_id = pois.set_index('poi_id')
+    assert by_id.loc[3, 'percfrref'] == "abc" and by_id.loc[1, 'percfrref'] in ("20", "20.0")
+    assert by_id.loc[4, 'st_num_ful'] == "12A" and by_id.loc[3, 'note'] == "x"
+    assert by_id.loc[2, 'geometry'].equals(Point(2, 2))
+
+
+def test_schema_follows_added_and_removed_parts(tmp_path):
+    results_dir = str(tmp_path)
+    write_results(results_dir, "main_1", "20260101", {"pois_geo": _pois([1], [20], [50.0])})
+    assert read_results(results_dir, "pois_geo")['percfrref'].tolist() == [20]
+    paths = write_results(results_dir, "main_2", "20260101", {"pois_geo": _pois([2], ["abc"], [50.0])})
+    assert sorted(read_results(results_dir, "pois_geo")['percfrref'].astype(str)) == ["20", "abc"]
+    os.remove(paths[0])
+    assert read_results(results_dir, "pois_geo")['percfrref'].tolist() == [20]
+
+
+def test_partitions_and_filters(tmp_path):
+    results_dir = str(tmp_path)
+    pois = _pois([1, 2, 3], [20, 40, 60], [1.0, 2.0, 3.0], source_files=["a.csv", "b.csv", "a.csv"])
+    validation = pd.DataFrame({'poi_id': [1, 2, 3], 'violation_code': ['DELETE', 'FIX_PERCFRREF', 'DELETE']})
+    for part in range(2):
+        write_results(results_dir, "main_1", "20260101", {"pois_geo": pois.iloc[part::2], "validation": None},
+                      part=part)
+    write_results(results_dir, "main_1", "20260101", {"validation": validation}, source_files=source_files_of(pois))
+
+    assert len(os.listdir(os.path.join(results_dir, "pois_geo", "run_date=20260101"))) == 2
+    assert sorted(read_results(results_dir, "pois_geo", source_file="a.csv")['poi_id']) == [1, 3]
+    deleted = read_results(results_dir, "validation", violation_codes=["DELETE"], columns=["poi_id", "source_file"])
+    assert sorted(deleted['poi_id']) == [1, 3] and set(deleted['source_file']) == {"a.csv"}
+    assert len(read_results(results_dir, "validation", run_date="20260102")) == 0
+    assert len(read_results(results_dir, "validation", limit=1)) == 1
+    assert list_runs(results_dir) == [{"run_id": "main_1", "run_date": "20260101"}]
+    assert read_results(str(tmp_path / "none"), "validation").empty
+
+
+def test_unify_reads_conflicting_fields_as_text():
+    schema = _unify([pa.schema([("poi_id", pa.int64()), ("code", pa.int64())]),
+                     pa.schema([("poi_id", pa.null()), ("code", pa.string()), ("extra", pa.float64())])])
+    assert schema.field("poi_id").type == pa.int64()
+    assert schema.field("code").type == pa.large_string()
+    assert schema.field("extra").type == pa.float64()
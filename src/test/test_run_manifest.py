@@ -0,0 +1,73 @@
+# src/test/test_run_manifest.py
+
+import sys
+import os
+import json
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.run_manifest import record_run, backfill, query_runs, get_run, results_dirs, artifact_paths
+
+
+def _run(run_id, started, **values):
+    return {"run_id": run_id, "started": started, "source": "main", "status": "done", **values}
+
+
+def test_record_and_query(tmp_path):
+    manifest = str(tmp_path / "manifest.sqlite")
+    record_run(_run("main_1", "2026-01-01 10:00:00", pois_dir="data/north", params={"results_dir": "r1"},
+                    violation_counts={"DELETE": 2}), manifest)
+    record_run(_run("api_2", "2026-01-02 10:00:00", source="api", status="failed", pois_dir="data/south"), manifest)
+    record_run(_run("main_3", "2026-01-03 10:00:00", pois_dir="data/north", params={"results_dir": "r2"}), manifest)
+
+    total, runs = query_runs(manifest)
+    assert total == 3 and [r["run_id"] for r in runs] == ["main_3", "api_2", "main_1"]
+    assert query_runs(manifest, status="done", search="north")[0] == 2
+    assert [r["run_id"] for r in query_runs(manifest, source="api")[1]] == ["api_2"]
+    assert [r["run_id"] for r in query_runs(manifest, since="2026-01-02", until="2026-01-02 23:59:59")[1]] == ["api_2"]
+    total, page = query_runs(manifest, limit=1, offset=1)
+    assert total == 3 and [r["run_id"] for r in page] == ["api_2"]
+
+    run = get_run("main_1", manifest)
+    assert run["violation_counts"] == {"DELETE": 2} and run["params"] == {"results_dir": "r1"}
+    assert get_run("nope", manifest) is None
+    assert results_dirs(manifest) == ["r2", "r1"]
+
+
+def test_replace_or_keep(tmp_path):
+    manifest = str(tmp_path / "manifest.sqlite")
+    record_run(_run("main_1", "2026-01-01 10:00:00", status="running"), manifest)
+    record_run(_run("main_1", "2026-01-01 10:00:00", status="done"), manifest)
+    record_run(_run("main_1", "2026-01-01 10:00:00", status="unknown"), manifest, replace=False)
+    assert get_run("main_1", manifest)["status"] == "done"
+
+
+def test_backfill_groups_files_by_stamp(tmp_path):
+    manifest = str(tmp_path / "manifest.sqlite")
+    logs, output = tmp_path / "logs", tmp_path / "output"
+    (logs / "2026").mkdir(parents=True)
+    output.mkdir()
+    (logs / "2026" / "main_20260101_100000.log").write_text("log")
+    (logs / "2026" / "main_20260101_100000_metrics.json").write_text(json.dumps({"stages": [{"stage": "geocode"}]}))
+    (output / "main_20260101_100000.html").write_text("<html>")
+    (logs / "api_20260102_090000_ab12.log").write_text("log")
+    (output / "api_20260102_090000_ab12.pdf").write_text("pdf")
+    (output / "notes.txt").write_text("not a run")
+    # A run already in the manifest keeps its own record
+    record_run(_run("api_20260102_090000_ab12", "2026-01-02 09:00:00", status="failed"), manifest)
+
+    assert backfill(manifest, output_dirs=(str(output),), log_dirs=(str(logs),)) == 2
+    total, runs = query_runs(manifest)
+    assert total == 2
+    api_run, main_run = runs
+    assert api_run["status"] == "failed"
+    assert main_run["run_id"] == "main_20260101_100000" and main_run["status"] == "done"
+    assert main_run["started"] == "2026-01-01 10:00:00" and main_run["metrics"] == [{"stage": "geocode"}]
+    assert main_run["html_path"].endswith("main_20260101_100000.html")
+    assert api_run["pdf_path"] is None and artifact_paths(("pdf",), manifest) == []
+    assert set(artifact_paths(("log", "html"), manifest)) == {main_run["log_path"], main_run["html_path"]}
+
+    # Only once, unless forced
+    (output / "main_20260103_080000.html").write_text("<html>")
+    assert backfill(manifest, output_dirs=(str(output),), log_dirs=(str(logs),)) == 0
+    assert backfill(manifest, output_dirs=(str(output),), log_dirs=(str(logs),), force=True) == 3
+    assert get_run("run_20260103_080000", manifest)["html_path"].endswith("main_20260103_080000.html")
@@ -0,0 +1,78 @@
+# src/test/test_spatial.py
+
+import sys
+import os
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+from shapely.geometry import LineString, Point
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.preprocessing.spatial import nearest_segments
+from src.preprocessing.street_index import build_street_index
+from src.preprocessing.geocode import geocode_pois
+from src.validation.validator import validate_pois, VIOLATION_DETAILS
+from src.analysis.report import generate_report
+
+# Both segments digitized eastwards from their reference node: north is left
+streets_gdf = gpd.GeoDataFrame({
+    'link_id': [1001, 2001],
+    'st_name': ['MAIN ST', 'OAK AVE'],
+    'l_refaddr': [1, 100],
+    'l_nrefaddr': [101, 200],
+    'multidigit': ['N', 'N'],
+}, geometry=[LineString([(0, 0), (100, 0)]), LineString([(0, 50), (100, 50)])], crs="EPSG:3857")
+street_index = build_street_index(streets_gdf)
+
+
+def test_nearest_segments():
+    points = np.array([Point(25, -5), Point(80, 45), None, Point(50, 30)], dtype=object)
+    positions, fractions, sides = nearest_segments(street_index, points)
+    assert street_index.link_id[positions[[0, 1, 3]]].tolist() == [1001, 2001, 2001]
+    assert positions[2] == -1
+    np.testing.assert_allclose(fractions[[0, 1, 3]], [0.25, 0.8, 0.5])
+    assert sides.tolist() == ['R', 'R', None, 'R']
+
+
+def test_nearest_segments_max_distance():
+    positions, _, sides = nearest_segments(street_index, np.array([Point(50, 2), Point(50, 20)]), max_distance=5)
+    assert street_index.link_id[positions[0]] == 1001 and positions[1] == -1
+    assert sides.tolist() == ['L', None]
+
+
+def _pois():
+    return gpd.GeoDataFrame({
+        'poi_id': [1, 2, 3, 4],
+        'poi_name': ['Cafe', 'Shop', 'Bank', 'Park'],
+        'link_id': [1001, 1001, 2001, 2001],
+        'poi_st_sd': ['L', 'R', 'L', 'L'],
+        'percfrref': [50, 50, 50, 50],
+        'st_name': ['MAIN ST', 'MAIN ST', 'ELM ST', None],
+        'st_num_ful': [51, 51, 10, None],
+    }, geometry=[Point(50, 3), Point(50, 3), Point(30, 52), None], crs="EPSG:3857")
+
+
+def test_geo_source_tells_fallback_from_address_match():
+    geo = geocode_pois(_pois(), streets_gdf)
+    assert geo['geo_source'].fillna('').tolist() == ['address', 'address', 'nearest', '']
+    assert geo['geo_link_id'].tolist()[:3] == [1001, 1001, 2001]
+    assert geo['near_side'].tolist()[:3] == ['L', 'L', 'L']
+    # Without the spatial step nothing falls back
+    plain = geocode_pois(_pois(), streets_gdf, spatial=False)
+    assert plain['geo_source'].fillna('').tolist() == ['address', 'address', '', '']
+
+
+def test_update_side_from_geometry():
+    validation = validate_pois(geocode_pois(_pois(), streets_gdf), streets_gdf)
+    # POI 2 says R but lies north (left) of its own link
+    assert validation['violation_code'].tolist() == ['LEGIT_EXCEPTION', 'UPDATE_SIDE', 'LEGIT_EXCEPTION',
+                                                     'LEGIT_EXCEPTION']
+    assert validation['violation_detail'][1] == VIOLATION_DETAILS['UPDATE_SIDE_GEOMETRY']
+
+
+def test_report_counts_geo_sources():
+    geo = geocode_pois(_pois(), streets_gdf)
+    html = generate_report(pd.DataFrame(geo), validate_pois(geo, streets_gdf), None)
+    assert '<li><b>Address match:</b> 2</li>' in html
+    assert '<li><b>Nearest segment (own coordinates):</b> 1</li>' in html
+    assert '<li><b>Not located:</b> 1</li>' in html
@@ -0,0 +1,76 @@
+# src/test/test_stages.py
+
+import sys
+import os
+import logging
+import geopandas as gpd
+import pytest
+from shapely.geometry import LineString
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import main
+from src.pipeline.stages import StageCheckpoints, stage_keys
+
+logger = logging.getLogger("test_stages")
+
+
+@pytest.fixture
+def inputs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pois_dir, streets_dir = tmp_path / "POIs", tmp_path / "STREETS"
+    pois_dir.mkdir()
+    streets_dir.mkdir()
+    (pois_dir / "pois.csv").write_text(
+        "POI_ID,POI_NAME,LINK_ID,POI_ST_SD,PERCFRREF,ST_NAME,ST_NUM_FUL\n"
+        "1,Cafe,1100,L,20,MAIN ST,50\n"
+        "2,Shop,1100,L,150,MAIN ST,20\n"
+        "3,,1200,L,40,OAK AVE,150\n")
+    gpd.GeoDataFrame({
+        'link_id': [1100, 1200], 'ST_NAME': ['MAIN ST', 'OAK AVE'],
+        'L_REFADDR': [1, 100], 'L_NREFADDR': [99, 200], 'MULTIDIGIT': ['N', 'N'],
+    }, geometry=[LineString([(0, 0), (0.01, 0)]), LineString([(0, 0.01), (0.01, 0.01)])],
+        crs="EPSG:4326").to_file(streets_dir / "streets.geojson", driver="GeoJSON")
+    return str(pois_dir), str(streets_dir), tmp_path
+
+
+def test_keys_chain(inputs):
+    pois_dir, streets_dir, _ = inputs
+    keys = stage_keys(pois_dir, streets_dir)
+    assert keys == stage_keys(pois_dir, streets_dir)
+    changed = stage_keys(pois_dir, streets_dir, compact=True)
+    assert changed["load_pois"] == keys["load_pois"]
+    assert all(changed[s] != keys[s] for s in ("normalize", "geocode", "validate", "fix"))
+
+
+def test_checkpoint_only_counts_under_its_key(tmp_path):
+    checkpoints = StageCheckpoints(str(tmp_path), {"geocode": "a"})
+    assert not checkpoints.completed("geocode")
+    checkpoints.save("geocode", [1, 2])
+    assert checkpoints.completed("geocode") and checkpoints.load("geocode") == [1, 2]
+    assert not StageCheckpoints(str(tmp_path), {"geocode": "b"}).completed("geocode")
+
+
+def test_resume_after_failed_stage(inputs, monkeypatch):
+    pois_dir, streets_dir, tmp_path = inputs
+    stage_dir = str(tmp_path / "stages")
+    run = dict(pois_dir=pois_dir, streets_dir=streets_dir, report_dir=str(tmp_path / "out"), logger=logger,
+               results_dir=str(tmp_path / "results"), run_id="main_test", stage_dir=stage_dir,
+               use_geocode_cache=False, html_path=str(tmp_path / "r.html"), pdf_path=str(tmp_path / "r.pdf"))
+    os.makedirs(run["report_dir"])
+    validate_pois = main.validate_pois
+
+    def failing(*args, **kwargs):
+        raise RuntimeError("validation crashed")
+
+    monkeypatch.setattr(main, "validate_pois", failing)
+    assert main.run_batch_pipeline(**run) is None
+    # Raw POIs are not checkpointed, the normalized ones and the geocode output are
+    assert sorted(os.listdir(stage_dir)) == ["geocode.json", "geocode.pkl", "normalize.json", "normalize.pkl"]
+
+    geocoded = []
+    monkeypatch.setattr(main, "validate_pois", validate_pois)
+    monkeypatch.setattr(main, "geocode_pois", lambda *a, **k: geocoded.append(1))
+    summary = main.run_batch_pipeline(**run)
+    assert not geocoded
+    assert sum(summary["violation_counts"].values()) == 3 and summary["total_pois"] == 2
+    assert {"validate.pkl", "fix.pkl"} <= set(os.listdir(stage_dir))
@@ -0,0 +1,87 @@
+# src/test/test_streaming.py
+
+import sys
+import os
+import geopandas as gpd
+import pandas as pd
+import pytest
+from shapely.geometry import LineString
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.data_loader.data_loader import load_pois
+from src.preprocessing.normalizer import normalize_pois, normalize_streets
+from src.preprocessing.geocode import geocode_pois
+from src.validation.validator import validate_pois, violation_counts
+from src.validation.fixer import fix_pois
+from src.pipeline.streaming import run_streaming
+from src.utils.metrics import StageMetrics
+
+POIS_CSV = (
+    "POI_ID,POI_NAME,LINK_ID,POI_ST_SD,PERCFRREF,ST_NAME,ST_NUM_FUL\n"
+    "1,Cafe,1100,L,20,MAIN ST,50\n"
+    "2,Shop,1100,L,150,MAIN ST,20\n"
+    "3,,1200,L,40,OAK AVE,150\n"
+    "4,Bank,1200,R,40,OAK AVE,120\n"
+    "5,Park,1300,L,abc,ELM ST,10\n"
+    "6,Bar,1200,L,30,OAK AVE,180\n"
+    "7,Deli,1100,L,10,MAIN ST,\n"
+)
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    pois_dir = tmp_path / "POIs"
+    pois_dir.mkdir()
+    (pois_dir / "pois.csv").write_text(POIS_CSV)
+    return str(pois_dir), tmp_path
+
+
+def _streets():
+    return normalize_streets(gpd.GeoDataFrame({
+        'link_id': [1100, 1200, 1300], 'ST_NAME': ['MAIN ST', 'OAK AVE', 'ELM ST'],
+        'L_REFADDR': [1, 100, 1], 'L_NREFADDR': [99, 200, 20], 'MULTIDIGIT': ['Y', 'N', 'N'],
+    }, geometry=[LineString([(0, 0), (0.01, 0)]), LineString([(0, 0.01), (0.01, 0.01)]),
+                 LineString([(0, 0.02), (0.01, 0.02)])], crs="EPSG:4326"))
+
+
+def _batch(pois_dir):
+    streets_gdf = _streets()
+    pois_geo = geocode_pois(normalize_pois(load_pois(pois_dir)), streets_gdf)
+    validation = validate_pois(pois_geo, streets_gdf)
+    return validation, fix_pois(validation, pois_geo, streets_gdf, update_streets=False)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 100])
+def test_streaming_matches_batch(inputs, chunk_size):
+    pois_dir, tmp_path = inputs
+    validation, pois_fixed = _batch(pois_dir)
+    result = run_streaming(pois_dir, _streets(), str(tmp_path), "t", chunk_size=chunk_size)
+
+    streamed = pd.read_csv(result["validation_path"])
+    assert streamed["poi_id"].tolist() == validation["poi_id"].tolist()
+    assert streamed["violation_code"].tolist() == validation["violation_code"].tolist()
+    assert result["summary"] == {"total_pois": len(pois_fixed), "violation_counts": violation_counts(validation)}
+    fixed = pd.read_csv(result["pois_fixed_path"])
+    assert fixed["poi_id"].tolist() == pois_fixed["poi_id"].tolist()
+    assert fixed["percfrref"].astype(str).tolist() == pois_fixed["percfrref"].astype(str).tolist()
+    assert result["totals"]["raw"] == 7 and len(result["validation_sample"]) == 7
+
+
+def test_multidigit_fixes_applied_once_at_the_end(inputs):
+    pois_dir, tmp_path = inputs
+    streets_gdf = _streets()
+    result = run_streaming(pois_dir, streets_gdf, str(tmp_path), "t", chunk_size=1)
+    # Every chunk is validated against the original street, so all three POIs on 1100 are flagged
+    assert result["summary"]["violation_counts"]["FIX_MULTIDIGIT"] == 3
+    assert streets_gdf.set_index("link_id").loc[1100, "multidigit"] == "N"
+
+
+def test_limit_and_rerun_replace_outputs(inputs):
+    pois_dir, tmp_path = inputs
+    run_streaming(pois_dir, _streets(), str(tmp_path), "t", chunk_size=2)
+    metrics = StageMetrics()
+    result = run_streaming(pois_dir, _streets(), str(tmp_path), "t", chunk_size=2, limit=3, metrics=metrics)
+    assert result["totals"]["raw"] == 3
+    assert pd.read_csv(result["validation_path"])["poi_id"].tolist() == [1, 2, 3]
+    stages = {s["stage"]: s for s in metrics.as_list()}
+    assert stages["geocode"]["calls"] == 2 and stages["geocode"]["rows"] == 3
@@ -0,0 +1,144 @@
+# src/test/test_street_cache.py
+
+import sys
+import os
+import pandas as pd
+import geopandas as gpd
+import pytest
+from pathlib import Path
+from shapely.geometry import LineString
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.data_loader import street_cache
+from src.data_loader.street_cache import load_normalized_streets, _parquet_filter
+from src.data_loader.data_loader import street_filter_for, filter_streets
+
+
+def _write_streets(streets_dir, names=('MAIN ST', 'OAK AVE')):
+    gpd.GeoDataFrame({
+        'LINK_ID': [1100, 1200], 'ST_NAME': list(names),
+        'L_REFADDR': [1, 100], 'L_NREFADDR': [99, 200],
+    }, geometry=[LineString([(0, 0), (0.01, 0)]), LineString([(0, 0.01), (0.01, 0.01)])],
+        crs="EPSG:4326").to_file(streets_dir / "streets.geojson", driver="GeoJSON")
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    streets_dir = tmp_path / "streets"
+    streets_dir.mkdir()
+    _write_streets(streets_dir)
+    return str(streets_dir), str(tmp_path / "cache")
+
+
+def _no_geojson(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("street GeoJSON read despite a cache hit")
+    monkeypatch.setattr(street_cache, "load_streets", fail)
+
+
+def test_cache_hit_skips_geojson(dirs, monkeypatch):
+    streets_dir, cache_dir = dirs
+    first, key = load_normalized_streets(streets_dir, cache_dir=cache_dir)
+    assert len(os.listdir(cache_dir)) == 1
+
+    _no_geojson(monkeypatch)
+    cached, cached_key = load_normalized_streets(streets_dir, cache_dir=cache_dir)
+    assert cached_key == key
+    assert cached['st_name'].tolist() == first['st_name'].tolist() == ['MAIN ST', 'OAK AVE']
+    assert cached.crs == first.crs and cached.geometry.equals(first.geometry)
+
+
+def test_changed_files_rebuild_and_replace_the_cache(dirs):
+    streets_dir, cache_dir = dirs
+    _, key = load_normalized_streets(streets_dir, cache_dir=cache_dir)
+    _write_streets(Path(streets_dir), names=('ELM ST', 'OAK AVE'))
+
+    streets, new_key = load_normalized_streets(streets_dir, cache_dir=cache_dir)
+    assert new_key != key and streets['st_name'].tolist() == ['ELM ST', 'OAK AVE']
+    # Only the newest cache of the directory is kept
+    assert os.listdir(cache_dir) == [f"{street_cache._dir_prefix(streets_dir)}_{new_key}.parquet"]
+
+
+def test_key_depends_on_target_crs_and_loader_mode(dirs):
+    streets_dir, cache_dir = dirs
+    _, key = load_normalized_streets(streets_dir, cache_dir=cache_dir)
+    projected, projected_key = load_normalized_streets(streets_dir, cache_dir=cache_dir, target_crs="EPSG:3857")
+    _, fast_key = load_normalized_streets(streets_dir, cache_dir=cache_dir, fast=True)
+    assert len({key, projected_key, fast_key}) == 3
+    assert projected.crs == "EPSG:3857"
+
+
+def test_rebuild_and_unreadable_cache(dirs):
+    streets_dir, cache_dir = dirs
+    _, key = load_normalized_streets(streets_dir, cache_dir=cache_dir)
+    cache_file = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+    with open(cache_file, "wb") as f:
+        f.write(b"not parquet")
+
+    streets, rebuilt_key = load_normalized_streets(streets_dir, cache_dir=cache_dir)
+    assert rebuilt_key == key and len(streets) == 2
+    assert os.path.getsize(cache_file) > len(b"not parquet")
+
+    mtime = os.path.getmtime(cache_file)
+    os.utime(cache_file, (mtime - 60, mtime - 60))
+    load_normalized_streets(streets_dir, cache_dir=cache_dir, rebuild=True)
+    assert os.path.getmtime(cache_file) > mtime - 60
+
+
+def test_no_cache_dir(dirs):
+    streets_dir, cache_dir = dirs
+    streets, _ = load_normalized_streets(streets_dir, cache_dir=None)
+    assert len(streets) == 2 and not os.path.exists(cache_dir)
+
+
+def _filter_streets_dir(tmp_path):
+    # Four streets in a row, 0.1 degrees apart
+    streets_dir = tmp_path / "regional"
+    streets_dir.mkdir()
+    gpd.GeoDataFrame({
+        'LINK_ID': [1, 2, 3, 4], 'ST_NAME': ['Main St', 'OAK AVE', 'ELM ST', 'PINE RD'],
+        'L_REFADDR': [1, 1, 1, 1], 'L_NREFADDR': [99, 99, 99, 99],
+    }, geometry=[LineString([(x, 0), (x + 0.01, 0)]) for x in (0, 0.1, 0.2, 0.3)],
+        crs="EPSG:4326").to_file(streets_dir / "streets.geojson", driver="GeoJSON")
+    return str(streets_dir)
+
+
+def test_street_filter_for_pois():
+    pois = pd.DataFrame({'st_name': [' main st', None], 'link_id': [3, None],
+                         'lat': [0.0, 0.001], 'lon': [0.305, 0.306]})
+    street_filter = street_filter_for(pois, margin=0.01)
+    assert street_filter['st_names'] == ['MAIN ST'] and street_filter['link_ids'] == [3]
+    assert street_filter['bbox'] == pytest.approx([0.295, -0.01, 0.316, 0.011])
+    assert street_filter_for(pois[['st_name']])['bbox'] is None
+
+
+@pytest.mark.parametrize("target_crs", ["EPSG:4326", "EPSG:3857"])
+def test_filtered_cache_read_matches_full_read(tmp_path, target_crs):
+    streets_dir, cache_dir = _filter_streets_dir(tmp_path), str(tmp_path / "cache")
+    street_filter = {'st_names': ['MAIN ST'], 'link_ids': [3], 'bbox': [0.295, -0.01, 0.316, 0.011]}
+    full, key = load_normalized_streets(streets_dir, cache_dir=cache_dir, target_crs=target_crs)
+    expected = filter_streets(full, street_filter)
+    assert expected['link_id'].tolist() == [1, 3, 4]
+
+    # A cache hit pushes the filter down to Parquet
+    filtered, filtered_key = load_normalized_streets(streets_dir, cache_dir=cache_dir, target_crs=target_crs,
+                                                     street_filter=street_filter)
+    assert filtered_key == key
+    assert filtered['link_id'].tolist() == expected['link_id'].tolist()
+    assert filtered.geometry.geom_equals_exact(expected.geometry.reset_index(drop=True), 1e-6).all()
+
+    # Without a cache the filter is applied before normalizing
+    uncached, _ = load_normalized_streets(streets_dir, cache_dir=None, target_crs=target_crs,
+                                          street_filter=street_filter)
+    assert uncached['link_id'].tolist() == [1, 3, 4]
+
+
+def test_cache_without_bbox_column_is_filtered_after_reading(tmp_path):
+    streets_dir, cache_dir = _filter_streets_dir(tmp_path), str(tmp_path / "cache")
+    full, _ = load_normalized_streets(streets_dir, cache_dir=cache_dir)
+    cache_file = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+    full.to_parquet(cache_file)
+    street_filter = {'st_names': [], 'link_ids': [], 'bbox': [0.15, -1, 0.25, 1]}
+    assert _parquet_filter(cache_file, street_filter, "EPSG:4326") is None
+    filtered, _ = load_normalized_streets(streets_dir, cache_dir=cache_dir, street_filter=street_filter)
+    assert filtered['link_id'].tolist() == [3]
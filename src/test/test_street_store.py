@@ -0,0 +1,77 @@
+# src/test/test_street_store.py
+
+import sys
+import os
+import geopandas as gpd
+import pytest
+from shapely.geometry import LineString
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from api.street_store import StreetStore, estimate_bytes
+from src.validation.fixer import apply_multidigit_fixes
+
+
+def _write_streets(path, name='MAIN ST'):
+    path.mkdir(exist_ok=True)
+    gpd.GeoDataFrame({
+        'link_id': [1100, 1200], 'ST_NAME': [name, 'OAK AVE'],
+        'L_REFADDR': [1, 100], 'L_NREFADDR': [99, 200], 'MULTIDIGIT': ['Y', 'N'],
+    }, geometry=[LineString([(0, 0), (0.01, 0)]), LineString([(0, 0.01), (0.01, 0.01)])],
+        crs="EPSG:4326").to_file(path / "streets.geojson", driver="GeoJSON")
+    return str(path)
+
+
+@pytest.fixture
+def dirs(tmp_path, monkeypatch):
+    # The street cache goes under the working directory
+    monkeypatch.chdir(tmp_path)
+    return [_write_streets(tmp_path / name) for name in ("a", "b", "c")]
+
+
+def _resident(store):
+    return [d["streets_dir"] for d in store.info()["datasets"]]
+
+
+def test_reuse_and_reload_after_change(dirs, tmp_path):
+    store = StreetStore()
+    streets, index, hit = store.get(dirs[0])
+    assert not hit and len(streets) == 2
+    _, same_index, hit = store.get(dirs[0])
+    assert hit and same_index is index
+    assert store.info()["datasets"][0]["hits"] == 1
+
+    _write_streets(tmp_path / "a", name='ELM ST')
+    streets, new_index, hit = store.get(dirs[0])
+    assert not hit and new_index is not index
+    assert streets['st_name'].tolist() == ['ELM ST', 'OAK AVE']
+
+
+def test_least_recently_used_evicted_first(dirs):
+    first, _, _ = StreetStore().get(dirs[0])
+    # Room for two datasets
+    store = StreetStore(budget_mb=2.5 * estimate_bytes(first) / 1024 ** 2)
+    for d in dirs[:2]:
+        store.get(d)
+    store.get(dirs[0])
+    store.get(dirs[2])
+    assert _resident(store) == [dirs[2], dirs[0]]
+    assert store.info()["used_mb"] <= store.info()["budget_mb"]
+
+
+def test_most_recent_dataset_always_stays(dirs):
+    store = StreetStore(budget_mb=0)
+    store.get(dirs[0])
+    store.get(dirs[1])
+    assert _resident(store) == [dirs[1]]
+    store.drop(dirs[1])
+    assert _resident(store) == []
+
+
+def test_fixes_do_not_reach_the_resident_dataset(dirs):
+    store = StreetStore()
+    streets, _, _ = store.get(dirs[0])
+    apply_multidigit_fixes(streets, [1100])
+    assert streets.set_index('link_id').loc[1100, 'multidigit'] == 'N'
+    resident, _, _ = store.resident(dirs[0])
+    assert resident.set_index('link_id').loc[1100, 'multidigit'] == 'Y'
+    assert store.get(dirs[0])[0].set_index('link_id').loc[1100, 'multidigit'] == 'Y'
@@ -0,0 +1,55 @@
+# src/test/test_validator.py
+
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.validation.validator import validate_pois, violation_counts, LinkIndex, VIOLATION_DETAILS
+
+# link 2002 appears twice: the first row (multidigit Y) is the one joined
+streets_df = pd.DataFrame([
+    {'st_name': 'STREET A', 'link_id': 1001, 'multidigit': 'N'},
+    {'st_name': 'STREET B', 'link_id': 2002, 'multidigit': 'Y'},
+    {'st_name': 'STREET B', 'link_id': 2002, 'multidigit': 'N'},
+])
+
+pois_df = pd.DataFrame([
+    {'poi_id': 1, 'poi_name': '  ', 'link_id': 999999, 'percfrref': 150},
+    {'poi_id': 2, 'poi_name': 'Side', 'link_id': 999999, 'percfrref': 150},
+    {'poi_id': 3, 'poi_name': 'Multi', 'link_id': 2002, 'percfrref': 150},
+    {'poi_id': 4, 'poi_name': 'Range', 'link_id': 1001, 'percfrref': -1},
+    {'poi_id': 5, 'poi_name': 'Good', 'link_id': 1001, 'percfrref': 100},
+    {'poi_id': 6, 'poi_name': 'NoLink', 'link_id': np.nan, 'percfrref': 10},
+    {'poi_id': 7, 'poi_name': None, 'link_id': 1001, 'percfrref': 10},
+])
+EXPECTED = ['DELETE', 'UPDATE_SIDE', 'FIX_MULTIDIGIT', 'FIX_PERCFRREF', 'LEGIT_EXCEPTION', 'UPDATE_SIDE', 'DELETE']
+
+
+def test_first_matching_rule_wins():
+    validation = validate_pois(pois_df, streets_df)
+    assert validation['poi_id'].tolist() == list(range(1, 8))
+    assert validation['violation_code'].astype(str).tolist() == EXPECTED
+    assert validation['violation_detail'][0] == VIOLATION_DETAILS['DELETE']
+    assert isinstance(validation['violation_code'].dtype, pd.CategoricalDtype)
+
+
+def test_link_index_gives_the_same_results():
+    joined = validate_pois(pois_df, streets_df)
+    indexed = validate_pois(pois_df, streets_df, link_index=LinkIndex(streets_df))
+    pd.testing.assert_frame_equal(joined, indexed)
+
+
+def test_multidigit_rule_and_counts():
+    keep_multidigit = validate_pois(pois_df, streets_df, multidigit_rule=lambda pois, streets: np.ones(len(pois)))
+    # With the rule satisfied, POI 3 falls through to its percfrref check
+    assert keep_multidigit['violation_code'][2] == 'FIX_PERCFRREF'
+    assert violation_counts(validate_pois(pois_df, streets_df)) == {
+        'DELETE': 2, 'UPDATE_SIDE': 2, 'FIX_MULTIDIGIT': 1, 'FIX_PERCFRREF': 1, 'LEGIT_EXCEPTION': 1}
+
+
+def test_without_optional_columns():
+    validation = validate_pois(pd.DataFrame({'poi_id': [1, 2], 'link_id': [1001, 5]}), streets_df)
+    assert validation['violation_code'].astype(str).tolist() == ['DELETE', 'DELETE']
+    assert validate_pois(pois_df.iloc[:0], streets_df).empty
@@ -0,0 +1,33 @@
+# src/utils/cancellation.py
+
+import threading
+
+class PipelineCancelled(Exception):
+    """
+    Raised at a chunk boundary once a run has been asked to stop.
+    """
+
+class CancellationToken:
+    """
+    Cooperative stop signal shared between whoever wants a run stopped and
+    the stages doing the work, which call raise_if_cancelled() at safe
+    points. `check` is an optional callable polled as well (e.g. reading an
+    emergency-stop flag in a status dict).
+    """
+
+    def __init__(self, check=None):
+        self._event = threading.Event()
+        self._check = check
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        if not self._event.is_set() and self._check is not None and self._check():
+            self._event.set()
+        return self._event.is_set()
+
+    def raise_if_cancelled(self, where=""):
+        if self.cancelled:
+            raise PipelineCancelled(f"Cancelled {where}".strip())
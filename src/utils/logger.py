@@ -24,3 +24,14 @@ def get_logger(name: str, log_file: str = None) -> logging.Logger:
             fh.setFormatter(formatter)
             logger.addHandler(fh)
     return logger
+
+def release_logger(name: str):
+    """
+    Closes the handlers of a per-run logger and removes it from the logging
+    registry, so loggers of finished runs do not pile up.
+    """
+    logger = logging.Logger.manager.loggerDict.pop(name, None)
+    if isinstance(logger, logging.Logger):
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
@@ -0,0 +1,134 @@
+# src/utils/metrics.py
+
+import os
+import json
+import time
+import cProfile
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def peak_rss_mb(who="self"):
+    """
+    Peak resident set size in MB (None if unavailable) of this process since
+    it started or since the last reset_peak_rss(), or with who="children"
+    of its largest finished child process (e.g. a geocode worker).
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if who == "children" else resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return round(peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024, 1)
+
+def reset_peak_rss():
+    """
+    Restarts this process's peak RSS from its current RSS (Linux, through
+    /proc/self/clear_refs). Returns False where peaks cannot be reset.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def frame_mb(frames):
+    """
+    In-memory size of a frame (or a tuple of frames) in MB, strings included.
+    """
+    frames = frames if isinstance(frames, (tuple, list)) else (frames,)
+    return round(sum(int(f.memory_usage(deep=True).sum()) for f in frames if f is not None) / (1024 * 1024), 1)
+
+class StageMetrics:
+    """
+    Collects wall time, CPU time, rows/second and peak RSS per pipeline stage.
+    Entering a stage that was already recorded (e.g. once per chunk) adds to it.
+    The peak RSS of a stage is this process's own peak while it ran (the
+    largest over its calls), measured by resetting the peak on entry; it
+    is None where peaks cannot be reset. Geocode worker processes are not
+    included; write_json reports the largest of them separately. Stages of
+    concurrent runs in one process (API jobs) reset the same counter.
+    With profile_dir set, each stage is also run under cProfile and dumped
+    to <profile_dir>/<stage>.prof. With memory=True the frames a stage puts
+    under "output" in its record are measured (frame_mb, the largest seen).
+    """
+
+    def __init__(self, profile_dir=None, memory=False):
+        self.stages = {}
+        self.profile_dir = profile_dir
+        self.memory = memory
+        self._profilers = {}
+        self._peak = None
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """
+        Times a stage. The yielded dict accepts a "rows" count and an
+        "output" frame (or tuple of frames) set by the caller.
+        """
+        record = {"rows": rows}
+        profiler = None
+        if self.profile_dir:
+            profiler = self._profilers.setdefault(name, cProfile.Profile())
+            profiler.enable()
+        self._peak = max(self._peak or 0, peak_rss_mb() or 0) or None
+        reset = reset_peak_rss()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            peak = peak_rss_mb() if reset else None
+            if profiler:
+                profiler.disable()
+                os.makedirs(self.profile_dir, exist_ok=True)
+                profiler.dump_stats(os.path.join(self.profile_dir, f"{name}.prof"))
+            memory = frame_mb(record["output"]) if self.memory and record.get("output") is not None else None
+            self._add(name, wall, cpu, record.get("rows"), memory, peak)
+
+    def _add(self, name, wall, cpu, rows, memory=None, peak=None):
+        entry = self.stages.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0, "rows": None, "calls": 0})
+        entry["wall_s"] = round(entry["wall_s"] + wall, 4)
+        entry["cpu_s"] = round(entry["cpu_s"] + cpu, 4)
+        entry["calls"] += 1
+        if rows is not None:
+            entry["rows"] = (entry["rows"] or 0) + int(rows)
+        entry["rows_per_s"] = round(entry["rows"] / entry["wall_s"], 1) if entry["rows"] and entry["wall_s"] else None
+        entry.setdefault("peak_rss_mb", None)
+        if peak is not None:
+            entry["peak_rss_mb"] = max(entry["peak_rss_mb"] or 0, peak)
+            self._peak = max(self._peak or 0, peak)
+        if memory is not None:
+            entry["frame_mb"] = max(entry.get("frame_mb") or 0, memory)
+
+    def peak_mb(self):
+        """
+        Peak RSS of this process over the whole run, stage resets included.
+        """
+        return max(self._peak or 0, peak_rss_mb() or 0) or None
+
+    def as_list(self):
+        return [{"stage": name, **values} for name, values in self.stages.items()]
+
+    def write_json(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"stages": self.as_list(), "peak_rss_mb": self.peak_mb(),
+                       "children_peak_rss_mb": peak_rss_mb("children")}, f, indent=2)
+        return path
+
+def track(metrics, name, rows=None):
+    """
+    metrics.stage(name) when metrics are being collected, otherwise a no-op
+    context that still yields a dict.
+    """
+    return metrics.stage(name, rows) if metrics is not None else nullcontext({})
+
+def metrics_path_for(log_file):
+    """
+    The per-run metrics file that sits next to a log file.
+    """
+    return os.path.splitext(log_file)[0] + "_metrics.json"
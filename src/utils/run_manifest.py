@@ -0,0 +1,167 @@
+# src/utils/run_manifest.py
+
+import os
+import re
+import json
+import glob
+import sqlite3
+import datetime
+from contextlib import closing
+
+DEFAULT_MANIFEST = os.path.join(".cache", "run_manifest.sqlite")
+JSON_COLUMNS = ("params", "violation_counts", "metrics")
+COLUMNS = ("run_id", "source", "started", "finished", "status", "pois_dir", "streets_dir", "params",
+           "total_pois", "violation_counts", "metrics", "log_path", "html_path", "pdf_path")
+# <prefix>_<YYYYMMDD>_<HHMMSS>[_<job id>] in log and report file names
+STAMP = re.compile(r"^(?P<prefix>main|api|report_ex)_(?P<date>\d{8})_(?P<time>\d{6})(?:_(?P<job>[0-9a-f]+))?$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    source TEXT,
+    started TEXT,
+    finished TEXT,
+    status TEXT,
+    pois_dir TEXT,
+    streets_dir TEXT,
+    params TEXT,
+    total_pois INTEGER,
+    violation_counts TEXT,
+    metrics TEXT,
+    log_path TEXT,
+    html_path TEXT,
+    pdf_path TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started);
+CREATE INDEX IF NOT EXISTS runs_status ON runs (status, started);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+def _connect(path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+def _row_values(run):
+    values = []
+    for col in COLUMNS:
+        value = run.get(col)
+        values.append(json.dumps(value, default=str) if col in JSON_COLUMNS and value is not None else value)
+    return values
+
+def _as_dict(row):
+    run = dict(row)
+    for col in JSON_COLUMNS:
+        if run.get(col):
+            run[col] = json.loads(run[col])
+    return run
+
+def record_run(run, path=DEFAULT_MANIFEST, replace=True):
+    """
+    Inserts (or replaces) one run. `run` is a dict with any of COLUMNS;
+    params, violation_counts and metrics are stored as JSON.
+    """
+    verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+    with closing(_connect(path)) as conn, conn:
+        conn.execute(f"{verb} INTO runs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                     _row_values(run))
+
+def _stamp_time(date, time):
+    return datetime.datetime.strptime(date + time, "%Y%m%d%H%M%S").strftime("%Y-%m-%d %H:%M:%S")
+
+def backfill(path=DEFAULT_MANIFEST, output_dirs=("output",), log_dirs=("logs",), force=False):
+    """
+    One-time import of runs that predate the manifest: log and report files
+    are grouped by the timestamp (and job id) in their names, with stage
+    timings read from <log>_metrics.json where present. Runs already in the
+    manifest are kept. Returns the number of runs found.
+    """
+    with closing(_connect(path)) as conn:
+        if not force and conn.execute("SELECT 1 FROM meta WHERE key = 'backfilled'").fetchone():
+            return 0
+
+    runs = {}
+    files = [f for d in output_dirs for f in glob.glob(os.path.join(d, "**", "*.*"), recursive=True)]
+    files += [f for d in log_dirs for f in glob.glob(os.path.join(d, "**", "*.log"), recursive=True)]
+    for f in files:
+        stem, ext = os.path.splitext(os.path.basename(f))
+        match = STAMP.match(stem)
+        if not match or ext not in (".log", ".html", ".pdf"):
+            continue
+        key = (match["date"], match["time"], match["job"])
+        run = runs.setdefault(key, {"started": _stamp_time(match["date"], match["time"]), "status": "unknown"})
+        if ext == ".log":
+            run["run_id"] = stem
+            run["source"] = match["prefix"]
+            run["log_path"] = f
+            metrics_file = f"{os.path.splitext(f)[0]}_metrics.json"
+            if os.path.exists(metrics_file):
+                with open(metrics_file, encoding="utf-8") as mf:
+                    run["metrics"] = json.load(mf).get("stages")
+        else:
+            run[f"{ext[1:]}_path"] = f
+            run["status"] = "done"
+    for (date, time, job), run in runs.items():
+        run.setdefault("run_id", "_".join(filter(None, ["run", date, time, job])))
+        record_run(run, path, replace=False)
+
+    with closing(_connect(path)) as conn, conn:
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('backfilled', ?)",
+                     (datetime.datetime.now().isoformat(timespec="seconds"),))
+    return len(runs)
+
+def query_runs(path=DEFAULT_MANIFEST, limit=50, offset=0, status=None, source=None, since=None, until=None,
+               search=None):
+    """
+    Newest runs first, filtered by status, source ("main"/"api"), start time
+    range (ISO strings) and a substring of the input directories.
+    Returns (total matching, list of run dicts).
+    """
+    where, args = [], []
+    for col, value in (("status", status), ("source", source)):
+        if value:
+            where.append(f"{col} = ?")
+            args.append(value)
+    if since:
+        where.append("started >= ?")
+        args.append(since)
+    if until:
+        where.append("started <= ?")
+        args.append(until)
+    if search:
+        where.append("(pois_dir LIKE ? OR streets_dir LIKE ?)")
+        args += [f"%{search}%"] * 2
+    clause = f"WHERE {' AND '.join(where)}" if where else ""
+    with closing(_connect(path)) as conn:
+        total = conn.execute(f"SELECT COUNT(*) FROM runs {clause}", args).fetchone()[0]
+        rows = conn.execute(f"SELECT * FROM runs {clause} ORDER BY started DESC, run_id DESC LIMIT ? OFFSET ?",
+                            args + [int(limit), int(offset)]).fetchall()
+    return total, [_as_dict(row) for row in rows]
+
+def get_run(run_id, path=DEFAULT_MANIFEST):
+    with closing(_connect(path)) as conn:
+        row = conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+    return _as_dict(row) if row else None
+
+def results_dirs(path=DEFAULT_MANIFEST):
+    """
+    Distinct results directories recorded in run params, most recently used first.
+    """
+    with closing(_connect(path)) as conn:
+        rows = conn.execute("SELECT json_extract(params, '$.results_dir') AS dir, MAX(started) AS last FROM runs "
+                            "WHERE dir IS NOT NULL GROUP BY dir ORDER BY last DESC").fetchall()
+    return [row[0] for row in rows]
+
+def artifact_paths(kinds, path=DEFAULT_MANIFEST, limit=200, offset=0):
+    """
+    Newest first paths of the given artifact kinds ("log", "html", "pdf").
+    """
+    columns = [{"log": "log_path", "html": "html_path", "pdf": "pdf_path"}[kind] for kind in kinds]
+    union = " UNION ALL ".join(f"SELECT started, {col} AS path FROM runs WHERE {col} IS NOT NULL" for col in columns)
+    with closing(_connect(path)) as conn:
+        rows = conn.execute(f"SELECT path FROM ({union}) ORDER BY started DESC, path DESC LIMIT ? OFFSET ?",
+                            (int(limit), int(offset))).fetchall()
+    return [row[0] for row in rows]
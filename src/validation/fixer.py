@@ -1,36 +1,73 @@
 # src/validation/fixer.py
 
-def fix_pois(validation_results, pois_gdf, streets_gdf, logger=None):
+import numpy as np
+import pandas as pd
+
+def fix_pois(validation_results, pois_gdf, streets_gdf, logger=None, update_streets=True):
     """
     Automatically applies corrections to POIs and street segments, based on validation codes.
     Returns the updated POIs dataframe.
+
+    Corrections are grouped by violation code and applied as bulk operations
+    keyed on `poi_id`:
+    - DELETE drops every row of the POI.
+    - UPDATE_SIDE flips `poi_st_sd` (L <-> R).
+    - FIX_MULTIDIGIT and FIX_PERCFRREF reset an out-of-range or non-numeric
+      `percfrref` to 50; FIX_MULTIDIGIT also sets the street's `multidigit` to N
+      (streets_gdf is updated in place unless update_streets=False).
+    LEGIT_EXCEPTION means no change needed.
     """
     pois_fixed = pois_gdf.copy()
+    codes = validation_results.groupby('violation_code', sort=False)['poi_id'] if len(validation_results) else None
+
+    def ids_for(*violation_codes):
+        if codes is None:
+            return pd.Index([])
+        groups = [codes.get_group(c) for c in violation_codes if c in codes.groups]
+        return pd.Index(pd.concat(groups).unique()) if groups else pd.Index([])
+
+    # Corrections touch the first row of each POI, as looked up by poi_id
+    poi_ids = pois_fixed['poi_id']
+    first_row = ~poi_ids.duplicated().to_numpy()
+
+    def rows_for(ids):
+        return first_row & poi_ids.isin(ids).to_numpy()
 
-    for _, row in validation_results.iterrows():
-        idx = pois_fixed.index[pois_fixed['poi_id'] == row['poi_id']]
-        if row['violation_code'] == "DELETE":
-            pois_fixed = pois_fixed.drop(idx)
-        elif row['violation_code'] == "UPDATE_SIDE":
-            if not idx.empty and 'poi_st_sd' in pois_fixed.columns:
-                old_val = pois_fixed.at[idx[0], 'poi_st_sd']
-                pois_fixed.at[idx[0], 'poi_st_sd'] = 'R' if old_val == 'L' else 'L'
-        elif row['violation_code'] == "FIX_MULTIDIGIT":
-            if not idx.empty and 'percfrref' in pois_fixed.columns:
-                value = pois_fixed.at[idx[0], 'percfrref']
-                try:
-                    value = float(value)
-                    if value < 0 or value > 100:
-                        pois_fixed.at[idx[0], 'percfrref'] = 50
-                except Exception:
-                    pois_fixed.at[idx[0], 'percfrref'] = 50
-            link_id = pois_fixed.at[idx[0], 'link_id']
-            street_idx = streets_gdf.index[streets_gdf['link_id'] == link_id]
-            if not street_idx.empty and 'multiplydigit' in streets_gdf.columns:
-                streets_gdf.at[street_idx[0], 'multiplydigit'] = 'N'
-        # LEGIT_EXCEPTION means no change needed
+    side_ids = ids_for("UPDATE_SIDE")
+    if len(side_ids) and 'poi_st_sd' in pois_fixed.columns:
+        mask = rows_for(side_ids)
+        pois_fixed.loc[mask, 'poi_st_sd'] = np.where(pois_fixed.loc[mask, 'poi_st_sd'] == 'L', 'R', 'L')
+
+    perc_ids = ids_for("FIX_MULTIDIGIT", "FIX_PERCFRREF")
+    if len(perc_ids) and 'percfrref' in pois_fixed.columns:
+        raw = pois_fixed['percfrref']
+        values = pd.to_numeric(raw, errors='coerce')
+        bad = (raw.notna() & values.isna()) | (values < 0) | (values > 100)
+        mask = rows_for(perc_ids) & bad.to_numpy()
+        if mask.any():
+            # A str column (text values) cannot hold 50; other rows keep their values
+            if not pd.api.types.is_numeric_dtype(raw):
+                pois_fixed['percfrref'] = raw.astype(object)
+            pois_fixed.loc[mask, 'percfrref'] = 50
+
+    multidigit_ids = ids_for("FIX_MULTIDIGIT")
+    if update_streets and len(multidigit_ids):
+        apply_multidigit_fixes(streets_gdf, pois_fixed.loc[rows_for(multidigit_ids), 'link_id'])
+
+    delete_ids = ids_for("DELETE")
+    if len(delete_ids):
+        pois_fixed = pois_fixed[~poi_ids.isin(delete_ids).to_numpy()]
 
     if logger:
         logger.info(f"Automatic corrections applied. Final POIs: {len(pois_fixed)}")
     return pois_fixed
 
+def apply_multidigit_fixes(streets_gdf, link_ids):
+    """
+    Sets `multidigit` to N on the first street row of each given link_id, in place.
+    """
+    if 'multidigit' not in streets_gdf.columns or 'link_id' not in streets_gdf.columns:
+        return
+    street_links = streets_gdf['link_id']
+    mask = (street_links.isin(link_ids) & ~street_links.duplicated()).to_numpy()
+    streets_gdf.loc[mask, 'multidigit'] = 'N'
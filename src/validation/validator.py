@@ -1,76 +1,146 @@
 # src/validation/validator.py
 
+import numpy as np
 import pandas as pd
 
-def validate_pois(pois_gdf, streets_gdf, logger=None):
+VIOLATION_DETAILS = {
+    "DELETE": "POI missing or invalid (empty name)",
+    "UPDATE_SIDE": "Street segment not found – possibly wrong side",
+    "UPDATE_SIDE_GEOMETRY": "POI lies on the other side of its street segment",
+    "FIX_MULTIDIGIT": "Multiply Digitised should be N",
+    "FIX_PERCFRREF": "percfrref out of range, should be 0-100",
+    "FIX_PERCFRREF_NAN": "percfrref not a number",
+    "LEGIT_EXCEPTION": "POI passes all validation rules",
+}
+# violation_code / violation_detail are categoricals over these fixed
+# categories, so a result row costs two small integer codes
+VIOLATION_CODES = ("DELETE", "UPDATE_SIDE", "FIX_MULTIDIGIT", "FIX_PERCFRREF", "LEGIT_EXCEPTION")
+_DETAIL_KEYS = tuple(VIOLATION_DETAILS)
+
+def validate_pois(pois_gdf, streets_gdf, logger=None, multidigit_rule=None, link_index=None):
     """
     Validates each POI for rule violations based on scenarios.
-    Returns a DataFrame listing POI IDs, violation codes, and detailed descriptions.
+    Returns a DataFrame listing POI IDs, violation codes, and detailed descriptions
+    (the latter two as categoricals, see VIOLATION_CODES).
+
+    POIs are joined to streets on `link_id` once and the rule cascade is
+    evaluated as column masks; the first matching rule wins, in the order
+    DELETE, UPDATE_SIDE, FIX_MULTIDIGIT, FIX_PERCFRREF, LEGIT_EXCEPTION.
+    `multidigit_rule(pois, streets)` receives the POIs and their joined street
+    rows (aligned by position) and returns a boolean array; it defaults to
+    `should_be_multidigit_mask`.
+    With `link_index` (a LinkIndex over `streets_gdf`) the link_id join is
+    a dictionary lookup per POI instead of a join over all streets, which
+    suits validating a few POIs against a large resident network.
     """
-    results = []
-    for idx, poi in pois_gdf.iterrows():
-        # 1. POI does not exist in reality (e.g., name missing/invalid)
-        if pd.isna(poi.get('poi_name')) or (str(poi.get('poi_name')).strip() == ""):
-            results.append({
-                "poi_id": poi['poi_id'],
-                "violation_code": "DELETE",
-                "violation_detail": "POI missing or invalid (empty name)"
-            })
-            continue
-
-        # 2. POI is on the wrong side of the street (link_id not found)
-        street_row = streets_gdf[streets_gdf['link_id'] == poi['link_id']]
-        if street_row.empty:
-            results.append({
-                "poi_id": poi['poi_id'],
-                "violation_code": "UPDATE_SIDE",
-                "violation_detail": "Street segment not found – possibly wrong side"
-            })
-            continue
-
-        # 3. Multiply Digitised attribute is incorrect
-        if 'multidigit' in street_row.columns:
-            if str(street_row.iloc[0]['multidigit']).upper() == "Y":
-                if not should_be_multidigit(poi, street_row.iloc[0]):
-                    results.append({
-                        "poi_id": poi['poi_id'],
-                        "violation_code": "FIX_MULTIDIGIT",
-                        "violation_detail": "Multiply Digitised should be N"
-                    })
-                    continue
-
-        # 4. percfrref out of range (bonus critical attribute)
-        if 'percfrref' in poi and (pd.notna(poi['percfrref'])):
-            try:
-                perc = float(poi['percfrref'])
-                if perc < 0 or perc > 100:
-                    results.append({
-                        "poi_id": poi['poi_id'],
-                        "violation_code": "FIX_PERCFRREF",
-                        "violation_detail": "percfrref out of range, should be 0-100"
-                    })
-                    continue
-            except Exception:
-                results.append({
-                    "poi_id": poi['poi_id'],
-                    "violation_code": "FIX_PERCFRREF",
-                    "violation_detail": "percfrref not a number"
-                })
-                continue
-
-
-        # 5. Legitimate Exception (all correct)
-        results.append({
-            "poi_id": poi['poi_id'],
-            "violation_code": "LEGIT_EXCEPTION",
-            "violation_detail": "POI passes all validation rules"
-        })
-
-    validation_results = pd.DataFrame(results)
+    multidigit_rule = multidigit_rule or should_be_multidigit_mask
+    n = len(pois_gdf)
+    code = np.full(n, VIOLATION_CODES.index("LEGIT_EXCEPTION"), dtype=np.int8)
+    detail = np.full(n, _DETAIL_KEYS.index("LEGIT_EXCEPTION"), dtype=np.int8)
+    decided = np.zeros(n, dtype=bool)
+
+    def apply(mask, violation_code, detail_key=None):
+        mask = np.asarray(mask, dtype=bool) & ~decided
+        code[mask] = VIOLATION_CODES.index(violation_code)
+        detail[mask] = _DETAIL_KEYS.index(detail_key or violation_code)
+        decided[mask] = True
+
+    # 1. POI does not exist in reality (e.g., name missing/invalid)
+    if 'poi_name' in pois_gdf.columns:
+        names = pois_gdf['poi_name']
+        apply(names.isna().to_numpy() | (names.astype(str).str.strip() == "").to_numpy(), "DELETE")
+    else:
+        apply(np.ones(n, dtype=bool), "DELETE")
+
+    # 2. POI is on the wrong side of the street (link_id not found)
+    if link_index is not None:
+        street_pos = link_index.positions(pois_gdf['link_id'])
+    else:
+        street_pos = link_positions(streets_gdf, pois_gdf['link_id'])
+    found = street_pos >= 0
+    apply(~found, "UPDATE_SIDE")
+
+    # 2b. ...or its coordinates lie on the other side of its own segment
+    # (near_* columns come from the spatial step of geocode_pois)
+    if {'near_link_id', 'near_side', 'poi_st_sd'} <= set(pois_gdf.columns):
+        on_own_link = (pois_gdf['near_link_id'].astype(object) == pois_gdf['link_id'].astype(object)).to_numpy()
+        side = pois_gdf['poi_st_sd'].astype(str).str.strip().str.upper()
+        other_side = pois_gdf['near_side'].notna().to_numpy() & (side != pois_gdf['near_side']).to_numpy()
+        apply(on_own_link & other_side, "UPDATE_SIDE", "UPDATE_SIDE_GEOMETRY")
+
+    # 3. Multiply Digitised attribute is incorrect
+    if 'multidigit' in streets_gdf.columns and found.any():
+        joined = streets_gdf.iloc[np.where(found, street_pos, 0)].reset_index(drop=True)
+        flagged = found & (joined['multidigit'].astype(str).str.upper() == "Y").to_numpy()
+        expected = np.asarray(multidigit_rule(pois_gdf.reset_index(drop=True), joined), dtype=bool)
+        apply(flagged & ~expected, "FIX_MULTIDIGIT")
+
+    # 4. percfrref out of range (bonus critical attribute)
+    if 'percfrref' in pois_gdf.columns:
+        raw = pois_gdf['percfrref']
+        perc = pd.to_numeric(raw, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        present = raw.notna().to_numpy()
+        apply(present & np.isnan(perc), "FIX_PERCFRREF", "FIX_PERCFRREF_NAN")
+        with np.errstate(invalid='ignore'):
+            apply(present & ((perc < 0) | (perc > 100)), "FIX_PERCFRREF")
+
+    # 5. Legitimate Exception (all correct) is the default for undecided POIs
+    validation_results = pd.DataFrame({
+        "poi_id": pois_gdf['poi_id'].to_numpy() if 'poi_id' in pois_gdf.columns else np.full(n, None),
+        "violation_code": pd.Categorical.from_codes(code, categories=VIOLATION_CODES),
+        "violation_detail": pd.Categorical.from_codes(detail, categories=list(VIOLATION_DETAILS.values())),
+    })
     if logger:
         logger.info(f"Validated {len(validation_results)} POIs.")
     return validation_results
 
+def violation_counts(validation_results):
+    """
+    {violation_code: count} of the codes present, most frequent first.
+    """
+    counts = validation_results["violation_code"].value_counts()
+    return {str(code): int(count) for code, count in counts.items() if count}
+
+def link_positions(streets_gdf, link_ids):
+    """
+    Positions of the first street row for each link_id (-1 when missing).
+    """
+    if 'link_id' not in streets_gdf.columns or streets_gdf.empty:
+        return np.full(len(link_ids), -1, dtype=np.int64)
+    street_links = pd.Index(streets_gdf['link_id'])
+    first = ~street_links.duplicated()
+    lookup = street_links[first]
+    positions = np.flatnonzero(first)
+    found = lookup.get_indexer(pd.Index(link_ids))
+    found[pd.isna(np.asarray(link_ids))] = -1
+    return np.where(found >= 0, positions[np.maximum(found, 0)], -1)
+
+class LinkIndex:
+    """
+    Hash index of a street frame by link_id: link_id -> position of its
+    first row, the same row link_positions picks. Built once per street
+    dataset, then every lookup is a dictionary access.
+    """
+
+    def __init__(self, streets_gdf):
+        links = streets_gdf['link_id'] if 'link_id' in streets_gdf.columns else pd.Series([], dtype=object)
+        first = ~links.duplicated().to_numpy() & links.notna().to_numpy()
+        self._positions = dict(zip(links[first].tolist(), np.flatnonzero(first).tolist()))
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, link_id):
+        return link_id in self._positions
+
+    def positions(self, link_ids):
+        """
+        Street row positions for the given link_ids (-1 when missing).
+        """
+        get = self._positions.get
+        values = pd.Series(link_ids).astype(object)
+        return np.array([-1 if pd.isna(v) else get(v, -1) for v in values.tolist()], dtype=np.int64)
+
 def should_be_multidigit(poi, street_row):
     """
     For demo purposes: you can implement your rule.
@@ -78,3 +148,10 @@ def should_be_multidigit(poi, street_row):
     you should check your POI/street data logic.
     """
     return False
+
+def should_be_multidigit_mask(pois, streets):
+    """
+    Vectorized form of `should_be_multidigit`: one boolean per POI, given the
+    POIs and their joined street rows. Same demo rule (always False).
+    """
+    return np.zeros(len(pois), dtype=bool)